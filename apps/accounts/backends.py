@@ -0,0 +1,43 @@
+"""
+Authentication backend that serves the per-request user lookup from cache.
+
+Django's AuthenticationMiddleware resolves `request.user` by calling the
+backend's `get_user()` on every authenticated request — with the stock
+ModelBackend that is one `auth_user` SELECT per page view. Combined with the
+`cached_db` session engine, a warm request needs zero auth queries.
+
+Invalidation (see `signals.py`):
+- Any `User` save/delete (password change, staff flag, last_login) drops the entry
+- Logout drops the entry
+- Entries also expire after AUTH_USER_CACHE_TIMEOUT as a safety net for
+  `QuerySet.update()` calls that bypass signals
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from apps.core import metrics
+
+USER_CACHE_KEY = "auth:user:{}"
+
+
+def user_cache_key(user_id) -> str:
+    return USER_CACHE_KEY.format(user_id)
+
+
+def invalidate_cached_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        metrics.inc("mooc_cache_requests_total", {"cache": "auth_user", "result": "miss" if user is None else "hit"})
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,45 @@
+"""
+Delete expired sessions in bounded batches.
+
+Django's `clearsessions` issues one unbounded DELETE, which holds locks on
+`django_session` for as long as it takes on a large table. This command
+deletes by primary key in batches so concurrent logins are never blocked
+for long.
+
+Usage:
+    python manage.py purge_sessions
+    python manage.py purge_sessions --batch-size 5000 --sleep 0.1
+"""
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions from the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep", type=float, default=0.0,
+            help="Seconds to pause between batches to reduce lock pressure.",
+        )
+
+    def handle(self, *args, batch_size: int, sleep: float, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list("session_key", flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            self.stdout.write(f"Deleted {total} expired sessions so far…")
+            if sleep:
+                time.sleep(sleep)
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} expired sessions."))
@@ -0,0 +1,27 @@
+"""
+Cache invalidation for CachedModelBackend.
+
+Password changes go through `user.save()`, so the post_save hook also
+covers them: the next request re-reads the user and the session hash check
+in `django.contrib.auth.get_user()` logs out other sessions as usual.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user_on_change(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def drop_cached_user_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("courses/", views.course_list, name="course_list"),
+    path("courses/<int:pk>/", views.course_detail, name="course_detail"),
+    path("me/enrollments/", views.my_enrollments, name="my_enrollments"),
+    path("me/progress/<int:course_pk>/", views.my_progress, name="my_progress"),
+    path("typeahead/", views.typeahead, name="typeahead"),
+]
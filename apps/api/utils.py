@@ -0,0 +1,147 @@
+"""
+Small helpers shared by the JSON API views.
+
+- Sparse fieldsets:   ?fields=id,title         (parse_fields)
+- Cursor pagination:  ?cursor=<opaque>&limit=  (paginate)
+- ETag / 304:         If-None-Match            (json_response)
+
+Rows are plain dicts from `.values()` — no model instances are built.
+"""
+import base64
+import functools
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def api_view(view):
+    """Turn ApiError into a JSON error response."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({"error": exc.message}, status=exc.status)
+    return wrapper
+
+
+def api_login_required(view):
+    """Like @login_required, but answers 401 JSON instead of redirecting."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise ApiError("Authentication required.", status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def parse_fields(request, allowed: tuple[str, ...], param: str = "fields",
+                 default: tuple[str, ...] | None = None) -> tuple[str, ...]:
+    """Return the requested subset of `allowed`, preserving `allowed` order."""
+    raw = request.GET.get(param)
+    if not raw:
+        return default or allowed
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ApiError(f"Unknown {param}: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}.")
+    return tuple(f for f in allowed if f in requested)
+
+
+def pick(row: dict, fields) -> dict:
+    return {f: row[f] for f in fields}
+
+
+# ---------------------------------------------------------------------------
+# Cursor (keyset) pagination
+# ---------------------------------------------------------------------------
+
+def _encode_cursor(row: dict, ts_field: str) -> str:
+    payload = json.dumps([row[ts_field].isoformat(), row["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, pk = json.loads(base64.urlsafe_b64decode(padded))
+        ts = parse_datetime(ts)
+        if ts is None:
+            raise ValueError
+        return ts, int(pk)
+    except (ValueError, TypeError):
+        raise ApiError("Invalid cursor.")
+
+
+def paginate(request, queryset, ts_field: str, fields) -> dict:
+    """
+    Keyset-paginate `queryset` newest-first on (ts_field, id).
+
+    Unlike OFFSET pagination, the cost of a page does not grow with its
+    depth and rows inserted meanwhile never shift pages.
+    """
+    try:
+        limit = min(int(request.GET.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+    if limit < 1:
+        raise ApiError("limit must be positive.")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        ts, pk = _decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f"{ts_field}__lt": ts}) | Q(**{ts_field: ts, "id__lt": pk}))
+
+    columns = set(fields) | {ts_field, "id"}
+    rows = list(queryset.order_by(f"-{ts_field}", "-id").values(*columns)[: limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params["cursor"] = _encode_cursor(rows[-1], ts_field)
+        next_url = f"{request.path}?{urlencode(params, doseq=True)}"
+    return {"results": [pick(row, fields) for row in rows], "next": next_url}
+
+
+# ---------------------------------------------------------------------------
+# Conditional responses
+# ---------------------------------------------------------------------------
+
+def json_response(request, payload, private: bool = False):
+    """
+    Serialize `payload` and answer 304 when the client already has it.
+
+    The ETag is a hash of the body, so it changes exactly when the
+    representation does. GZip (applied outside this helper) weakens the
+    tag to W/"…", so the comparison ignores the weak prefix.
+    """
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"))
+    etag = '"%s"' % hashlib.md5(body.encode(), usedforsecurity=False).hexdigest()
+    cache_control = "private, no-cache" if private else "no-cache"
+
+    client_tags = {
+        tag.strip().removeprefix("W/")
+        for tag in request.headers.get("If-None-Match", "").split(",")
+    }
+    if etag in client_tags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
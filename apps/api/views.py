@@ -0,0 +1,104 @@
+"""
+Read-only JSON API (v1) for the mobile app.
+
+All endpoints are GET-only, gzip-compressed, ETag-validated and built on
+the service layer. Rows are serialized straight from `.values()`.
+
+    GET /api/v1/courses/                        catalog (cursor-paginated)
+    GET /api/v1/courses/<pk>/                   course + lesson outline
+    GET /api/v1/me/enrollments/                 current user's enrollments (cursor-paginated)
+    GET /api/v1/me/progress/<course_pk>/        current user's progress in a course
+    GET /api/v1/typeahead/?q=<prefix>           course/lesson title suggestions
+"""
+from django.db.models import F
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from apps.courses import typeahead as title_index
+from apps.courses.models import Course, Lesson
+from apps.enrollments.services import EnrollmentService
+from apps.progress.services import ProgressService
+from .utils import (
+    ApiError, api_login_required, api_view, json_response, paginate, parse_fields, pick,
+)
+
+TYPEAHEAD_MAX_LIMIT = 20
+COURSE_FIELDS = (
+    "id", "title", "short_description", "description", "created_at", "updated_at", "enrollment_count", "lesson_count",
+)
+LESSON_PUBLIC_FIELDS = ("id", "title", "order", "video_type")
+# Lesson material is only served to enrolled learners, as in the HTML lesson view
+LESSON_FIELDS = LESSON_PUBLIC_FIELDS + ("video_url", "content", "updated_at")
+ENROLLMENT_FIELDS = ("id", "course_id", "course_title", "enrolled_at")
+
+
+@gzip_page
+@require_GET
+@api_view
+def course_list(request):
+    fields = parse_fields(request, COURSE_FIELDS)
+    return json_response(request, paginate(request, Course.objects.all(), "created_at", fields))
+
+
+@gzip_page
+@require_GET
+@api_view
+def course_detail(request, pk: int):
+    fields = parse_fields(request, COURSE_FIELDS)
+    course = Course.objects.filter(pk=pk).values(*set(fields) | {"id"}).first()
+    if course is None:
+        raise ApiError("Course not found.", status=404)
+
+    is_enrolled = request.user.is_authenticated and EnrollmentService.is_enrolled(
+        user=request.user, course=pk,
+    )
+    allowed = LESSON_FIELDS if is_enrolled else LESSON_PUBLIC_FIELDS
+    lesson_fields = parse_fields(request, allowed, param="lesson_fields")
+
+    lessons = Lesson.objects.filter(course_id=pk).values(*lesson_fields)
+    payload = pick(course, fields)
+    payload["is_enrolled"] = is_enrolled
+    payload["lessons"] = list(lessons)
+    return json_response(request, payload, private=request.user.is_authenticated)
+
+
+@gzip_page
+@require_GET
+@api_view
+@api_login_required
+def my_enrollments(request):
+    fields = parse_fields(request, ENROLLMENT_FIELDS)
+    enrollments = EnrollmentService.user_enrollments(request.user).annotate(
+        course_title=F("course__title"),
+    )
+    return json_response(request, paginate(request, enrollments, "enrolled_at", fields), private=True)
+
+
+@gzip_page
+@require_GET
+@api_view
+@api_login_required
+def my_progress(request, course_pk: int):
+    lesson_count = Course.objects.filter(pk=course_pk).values_list("lesson_count", flat=True).first()
+    if lesson_count is None:
+        raise ApiError("Course not found.", status=404)
+    visited = ProgressService.get_visited_ids(user=request.user, course=course_pk)
+    payload = {
+        "course_id": course_pk,
+        "visited_lesson_ids": sorted(visited),
+        "visited_count": len(visited),
+        "lesson_count": lesson_count,
+    }
+    return json_response(request, payload, private=True)
+
+
+@require_GET
+@api_view
+def typeahead(request):
+    """Answered from the worker's in-memory title index; no database query once it is warm."""
+    try:
+        limit = min(int(request.GET.get("limit", 8)), TYPEAHEAD_MAX_LIMIT)
+    except ValueError:
+        raise ApiError("limit must be an integer.") from None
+    query = request.GET.get("q", "")
+    return json_response(request, {"query": query, "results": title_index.search(query, limit=max(limit, 1))})
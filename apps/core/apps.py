@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    """Cross-cutting infrastructure: middleware and operational commands."""
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.core"
+    label = "core"
@@ -0,0 +1,118 @@
+"""
+Read-through caching helper shared by the apps' page-fragment caches
+(apps/courses/caching.py, EnrollmentService.enrolled_course_ids).
+
+An expiring hot entry must not send every concurrent request to the
+database at once, so `get_or_build` coalesces rebuilds:
+
+- entries are stored as (value, refresh_at, build_seconds) and kept
+  STALE_SECONDS past refresh_at
+- early refresh (XFetch, Vattani et al.): a reader rebuilds an entry before
+  refresh_at with a probability that rises as refresh_at nears, scaled by
+  how long the last build took — a hot entry is normally rebuilt by one
+  request before it ever expires
+- single flight: only the caller that wins a `cache.add` lock builds;
+  the others serve the stale value or, when there is none (first request,
+  just invalidated), wait up to WAIT_SECONDS for the winner's result
+  before building themselves
+
+The lock lives in the same cache, so single flight is only as good as the
+backend's `add`. The production LockingFileBasedCache (apps/core/filecache.py)
+adds under a file lock, so it coalesces across gunicorn workers as well as
+threads; LocMemCache only within one process. Stock FileBasedCache's `add`
+is a `has_key()` then a `set()`, so there several workers can win the lock
+at once.
+
+Waiting is not free: a caller with nothing to serve sleeps in `_wait_for`
+for up to WAIT_SECONDS, and with sync gunicorn workers that holds the
+whole worker. Every invalidation of a hot key (any course or lesson
+write, for the catalog) can therefore park the workers that hit it for up
+to WAIT_SECONDS while one of them rebuilds.
+
+Lookups are counted in mooc_cache_requests_total by cache name and
+result: hit, miss (this caller built) or stale.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core import metrics
+
+STALE_SECONDS = 60  # how long past refresh_at an entry may be served while it is rebuilt
+LOCK_SECONDS = 30  # a builder that dies holds its lock at most this long
+WAIT_SECONDS = 2.0  # how long a caller with nothing to serve waits for another's build
+POLL_SECONDS = 0.02
+XFETCH_BETA = 1.0  # > 1 refreshes earlier, < 1 later
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:building"
+
+
+def _entry(value, timeout: int, build_seconds: float) -> tuple:
+    return value, time.time() + timeout, build_seconds
+
+
+def _refresh_due(entry: tuple) -> bool:
+    _, refresh_at, build_seconds = entry
+    # -log(u) for u in (0, 1] is exponentially distributed: usually small, rarely large
+    return time.time() - build_seconds * XFETCH_BETA * math.log(1.0 - random.random()) >= refresh_at
+
+
+def _wait_for(key: str) -> tuple | None:
+    """Another caller's fresh entry, or None if it is not there within WAIT_SECONDS."""
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+        if cache.get(_lock_key(key)) is None:  # the builder gave up
+            return None
+    return None
+
+
+def get_or_build(name: str, key: str, build, timeout: int | None = None):
+    """The cached value for `key`, or `build()` stored under it — built by one caller at a time."""
+    timeout = settings.CONTENT_CACHE_TIMEOUT if timeout is None else timeout
+    entry = cache.get(key)
+    if entry is not None and not _refresh_due(entry):
+        metrics.inc("mooc_cache_requests_total", {"cache": name, "result": "hit"})
+        return entry[0]
+
+    lock = _lock_key(key)
+    if not cache.add(lock, True, LOCK_SECONDS):
+        if entry is not None:
+            metrics.inc("mooc_cache_requests_total", {"cache": name, "result": "stale"})
+            return entry[0]
+        entry = _wait_for(key)
+        if entry is not None:
+            metrics.inc("mooc_cache_requests_total", {"cache": name, "result": "hit"})
+            return entry[0]
+        return _build(name, key, build, timeout)  # the builder is stuck or failed: don't wait on it
+    try:
+        # Someone may have finished a build between our get and our add
+        latest = cache.get(key)
+        if latest is not None and (entry is None or latest[1] > entry[1]):
+            metrics.inc("mooc_cache_requests_total", {"cache": name, "result": "hit"})
+            return latest[0]
+        return _build(name, key, build, timeout)
+    finally:
+        cache.delete(lock)
+
+
+def _build(name: str, key: str, build, timeout: int):
+    metrics.inc("mooc_cache_requests_total", {"cache": name, "result": "miss"})
+    started = time.monotonic()
+    value = build()
+    cache.set(key, _entry(value, timeout, time.monotonic() - started), timeout + STALE_SECONDS)
+    return value
+
+
+def store_many(values: dict, timeout: int | None = None) -> None:
+    """Cache prebuilt `{key: value}` entries for `get_or_build` (the `warm_*` functions)."""
+    timeout = settings.CONTENT_CACHE_TIMEOUT if timeout is None else timeout
+    cache.set_many({key: _entry(value, timeout, 0.0) for key, value in values.items()}, timeout + STALE_SECONDS)
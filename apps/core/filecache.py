@@ -0,0 +1,56 @@
+"""
+The production cache backend: Django's FileBasedCache, shared by every
+gunicorn worker of a container, with `add` and `incr` made atomic.
+
+Stock FileBasedCache implements `add` as `has_key()` then `set()` and
+`incr` as `get()` then `set()`, so two workers can both win the same
+single-flight lock (apps/core/caching.py) or lose a typeahead version
+bump. Here both run under an exclusive lock (flock via
+django.core.files.locks) on one of LOCK_STRIPES lock files picked by the
+key's file name, so they are atomic against each other across processes
+and threads. Plain `set`/`get`/`delete` need no lock: `set` already
+writes to a temporary file and renames it into place.
+
+Lock files live in a `locks/` subdirectory, which the cache's culling and
+`clear()` (they only look at `*.djcache` files) leave alone.
+"""
+import os
+from hashlib import md5
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+LOCK_STRIPES = 64
+
+
+class LockingFileBasedCache(FileBasedCache):
+
+    def _locked(self, key, version):
+        return _StripeLock(self._dir, self._key_to_file(key, version))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked(key, version):
+            return super().incr(key, delta, version)
+
+
+class _StripeLock:
+    """Exclusive lock on the stripe file for a cache file name."""
+
+    def __init__(self, cache_dir: str, fname: str):
+        stripe = int(md5(os.path.basename(fname).encode(), usedforsecurity=False).hexdigest(), 16) % LOCK_STRIPES
+        self.path = os.path.join(cache_dir, "locks", f"{stripe}.lock")
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, "ab")
+        locks.lock(self.file, locks.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        locks.unlock(self.file)
+        self.file.close()
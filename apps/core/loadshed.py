@@ -0,0 +1,156 @@
+"""
+Adaptive load shedding.
+
+Each worker process keeps two overload signals:
+- queue latency: how long a request waited before a worker picked it up,
+  from the `X-Request-Start` header the reverse proxy stamps on it
+  (nginx: `proxy_set_header X-Request-Start "t=${msec}";`), smoothed with
+  an EWMA
+- in-flight requests in this process (matters for threaded workers)
+
+They map to a pressure level, and each level sheds one more class of
+low-priority traffic with `503` + `Retry-After`:
+
+    level 1  anonymous catalog browsing   (cheapest to turn away, CDN-able)
+    level 2  + progress heartbeat writes  (clients retry; visits are still
+                                           recorded by lesson_detail)
+
+Staff users, `/admin/`, `/manage/` and enrollment POSTs are never shed:
+turning away cheaper traffic is what keeps a worker free for them.
+
+Shed counts are exported as `mooc_load_shed_total` on /metrics (see
+apps/core/metrics.py) and shown to staff at `core:load_status`.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metrics
+
+ANON_BROWSE = "anon_browse"
+PROGRESS_WRITE = "progress_write"
+TRAFFIC_CLASSES = (ANON_BROWSE, PROGRESS_WRITE)
+
+# Lowest pressure level at which each class is shed
+SHED_AT_LEVEL = {ANON_BROWSE: 1, PROGRESS_WRITE: 2}
+
+ANON_BROWSE_VIEWS = {"courses:list", "courses:detail", "api:course_list", "api:course_detail", "api:typeahead"}
+PROGRESS_WRITE_VIEWS = {"progress:heartbeat"}
+PRIORITY_PATH_PREFIXES = ("/admin/", "/manage/")
+
+EWMA_ALPHA = 0.2
+
+
+def parse_request_start(value: str | None) -> float | None:
+    """
+    Epoch seconds from an `X-Request-Start` header. Accepts `t=<value>` or a
+    bare value in seconds (nginx `$msec`), milliseconds or microseconds.
+    """
+    if not value:
+        return None
+    try:
+        stamp = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return None
+    for divisor in (1, 1_000, 1_000_000):
+        if stamp / divisor < 1e10:  # plausible epoch seconds
+            return stamp / divisor
+    return None
+
+
+def shed_counts() -> dict[str, int]:
+    """Shed requests per traffic class, summed over all worker processes."""
+    metrics.registry.flush()
+    counters, _ = metrics.collect()
+    return {
+        traffic_class: int(counters.get(("mooc_load_shed_total", metrics.label_str({"class": traffic_class})), 0))
+        for traffic_class in TRAFFIC_CLASSES
+    }
+
+
+class WorkerLoad:
+    """Overload signals for the current process. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queue_ms = 0.0
+
+    def enter(self, queued_ms: float | None) -> None:
+        with self._lock:
+            self.in_flight += 1
+            if queued_ms is not None:
+                self.queue_ms += EWMA_ALPHA * (max(queued_ms, 0.0) - self.queue_ms)
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def level(self) -> int:
+        level = 0
+        if self.queue_ms >= settings.LOAD_SHED_QUEUE_MS_HIGH:
+            level = 2
+        elif self.queue_ms >= settings.LOAD_SHED_QUEUE_MS_LOW:
+            level = 1
+        max_in_flight = settings.LOAD_SHED_MAX_IN_FLIGHT
+        if max_in_flight:
+            if self.in_flight > max_in_flight:
+                level = max(level, 2)
+            elif self.in_flight > max_in_flight // 2:
+                level = max(level, 1)
+        return level
+
+    def snapshot(self) -> dict:
+        return {"in_flight": self.in_flight, "queue_ms": round(self.queue_ms, 1), "level": self.level()}
+
+
+worker_load = WorkerLoad()
+
+
+def traffic_class(request) -> str | None:
+    """The sheddable class of `request`, or None if it must always be served."""
+    if request.path.startswith(PRIORITY_PATH_PREFIXES):
+        return None
+    view_name = getattr(request.resolver_match, "view_name", None)
+    if view_name in ANON_BROWSE_VIEWS and request.method in ("GET", "HEAD"):
+        # No session cookie means anonymous without touching the session store
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES or not request.user.is_authenticated:
+            return ANON_BROWSE
+        return None
+    if view_name in PROGRESS_WRITE_VIEWS and request.method == "POST":
+        return None if request.user.is_staff else PROGRESS_WRITE
+    return None
+
+
+class LoadSheddingMiddleware:
+    """
+    Must sit after AuthenticationMiddleware (staff/anonymous checks). The
+    decision is made in process_view, once the URL has been resolved.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = parse_request_start(request.headers.get("X-Request-Start"))
+        worker_load.enter((time.time() - started) * 1000 if started else None)
+        try:
+            return self.get_response(request)
+        finally:
+            worker_load.leave()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.LOAD_SHED_ENABLED:
+            return None
+        level = worker_load.level()
+        if level == 0:
+            return None
+        cls = traffic_class(request)
+        if cls is None or level < SHED_AT_LEVEL[cls]:
+            return None
+        metrics.inc("mooc_load_shed_total", {"class": cls})
+        response = HttpResponse("Service is busy, please retry shortly.\n", status=503, content_type="text/plain")
+        response["Retry-After"] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
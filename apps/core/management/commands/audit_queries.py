@@ -0,0 +1,280 @@
+"""
+Audit the query plans of the hot ORM queries behind learner and staff views.
+
+Each query is built exactly as its view builds it, run through `EXPLAIN`
+(`EXPLAIN QUERY PLAN` on SQLite, `EXPLAIN [ANALYZE]` on PostgreSQL) against
+the current database, and flagged for:
+
+- full table scans            (SQLite `SCAN t`, PostgreSQL `Seq Scan on t`)
+- sorts that no index serves  (SQLite `USE TEMP B-TREE`, PostgreSQL `Sort`)
+- nested-loop blowups         (PostgreSQL `Nested Loop` over many rows/loops)
+
+For a flagged query the command derives a candidate index from the
+query's equality filters followed by its ORDER BY, skips it if an existing
+index already starts with those columns, and can write the matching
+`AddIndex` migrations (--write-migrations). Copy the printed
+`models.Index(...)` lines into the model's `Meta.indexes` as well so
+`makemigrations` stays clean.
+
+Plans depend on data volume — run it against a production-sized dataset
+(`manage.py generate_dataset`), not an empty database.
+
+Usage:
+    python manage.py audit_queries
+    python manage.py audit_queries --analyze          # PostgreSQL only
+    python manage.py audit_queries --write-migrations
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.apps import apps as global_apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, migrations, models
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.db.models.lookups import Exact
+
+from apps.courses.models import Course, Lesson
+from apps.courses.services import CatalogService
+from apps.enrollments.models import Enrollment
+from apps.progress.models import LessonProgress
+
+User = get_user_model()
+
+NESTED_LOOP_ROWS = 10_000
+NESTED_LOOP_LOOPS = 1_000
+
+
+@dataclass
+class Sample:
+    """Representative ids to plug into the audited queries."""
+    user_id: int = 1
+    course_id: int = 1
+    lesson_id: int = 1
+
+    @classmethod
+    def pick(cls, using: str) -> "Sample":
+        enrollment = Enrollment.objects.using(using).order_by("pk").values("user_id", "course_id").first()
+        if enrollment is None:
+            return cls()
+        lesson_id = (
+            Lesson.objects.using(using).filter(course_id=enrollment["course_id"])
+            .values_list("pk", flat=True).first()
+        )
+        return cls(enrollment["user_id"], enrollment["course_id"], lesson_id or 1)
+
+
+# (view, description, queryset builder) — keep in step with the views
+AUDITED_QUERIES = [
+    ("courses:list", "catalog cards",
+     lambda s: CatalogService.courses()),
+    ("courses:list", "catalog cards + badges",
+     lambda s: CatalogService.annotated(User(pk=s.user_id))),
+    ("courses:list", "visited counts",
+     lambda s: LessonProgress.objects.filter(user_id=s.user_id, course_id__in=[s.course_id])
+     .order_by().values("course_id").annotate(n=models.Count("pk"))),
+    ("courses:detail", "course lessons",
+     lambda s: Lesson.objects.filter(course_id=s.course_id)),
+    ("courses:detail", "enrollment + resume lessons",
+     lambda s: Enrollment.objects.select_related("last_lesson", "next_lesson")
+     .filter(user_id=s.user_id, course_id=s.course_id)),
+    ("courses:lesson_detail", "lesson + course",
+     # get_object_or_404() → .get() drops the default ordering
+     lambda s: Lesson.objects.select_related("course").filter(pk=s.lesson_id, course_id=s.course_id).order_by()),
+    ("courses:lesson_detail", "progress row",
+     lambda s: LessonProgress.objects.filter(user_id=s.user_id, lesson_id=s.lesson_id)),
+    ("courses:lesson_detail", "visited set",
+     lambda s: LessonProgress.objects.filter(user_id=s.user_id, course_id=s.course_id).values_list("lesson_id")),
+    ("courses:lesson_detail", "resume pointers",
+     lambda s: Enrollment.objects.filter(user_id=s.user_id, course_id=s.course_id).order_by()),
+    ("courses:my_courses", "user's enrollments",
+     lambda s: Enrollment.objects.filter(user_id=s.user_id)
+     .select_related("course", "last_lesson", "next_lesson").order_by("-enrolled_at")),
+    ("courses:manage_dashboard", "all courses",
+     lambda s: Course.objects.order_by("-created_at")),
+    ("api:my_enrollments", "enrollments page",
+     lambda s: Enrollment.objects.filter(user_id=s.user_id).order_by("-enrolled_at", "-id")),
+    ("progress:heartbeat", "enrolled lesson check",
+     lambda s: Lesson.objects.filter(pk=s.lesson_id, course__enrollments__user_id=s.user_id).order_by()),
+]
+
+
+@dataclass
+class Finding:
+    view: str
+    description: str
+    plan: str
+    problems: list[str] = field(default_factory=list)
+    index: models.Index | None = None
+    model: type[models.Model] | None = None
+
+
+# ---------------------------------------------------------------------------
+# Plan analysis
+# ---------------------------------------------------------------------------
+
+def sqlite_problems(plan: str) -> list[str]:
+    problems = []
+    for line in plan.splitlines():
+        detail = re.sub(r"^\d+ \d+ \d+ ", "", line.strip())
+        if re.match(r"SCAN \w+$", detail):
+            problems.append(f"full table scan: {detail}")
+        elif "USE TEMP B-TREE" in detail:
+            problems.append(f"sort without index: {detail}")
+    return problems
+
+
+def postgresql_problems(plan: str) -> list[str]:
+    problems = []
+    for line in plan.splitlines():
+        node = line.strip().lstrip("->").strip()
+        if node.startswith("Seq Scan on"):
+            problems.append(f"sequential scan: {node}")
+        elif node.startswith(("Sort ", "Incremental Sort")):
+            problems.append(f"sort without index: {node}")
+        elif node.startswith("Nested Loop"):
+            rows = re.findall(r"rows=(\d+)", node)
+            loops = re.findall(r"loops=(\d+)", node)
+            if any(int(r) > NESTED_LOOP_ROWS for r in rows) or any(int(n) > NESTED_LOOP_LOOPS for n in loops):
+                problems.append(f"nested-loop blowup: {node}")
+    return problems
+
+
+# ---------------------------------------------------------------------------
+# Index suggestion
+# ---------------------------------------------------------------------------
+
+def candidate_index_fields(queryset) -> list[str]:
+    """Equality-filtered columns of the base table, then its ORDER BY columns."""
+    query = queryset.query
+    base_alias = query.get_initial_alias()
+    opts = queryset.model._meta
+    fields = []
+    for child in query.where.children:
+        lhs = getattr(child, "lhs", None)
+        if isinstance(child, Exact) and getattr(lhs, "alias", None) == base_alias:
+            target = lhs.target
+            if not target.primary_key and target.name not in fields:
+                fields.append(target.name)
+    ordering = query.order_by or (opts.ordering if query.default_ordering else [])
+    for name in ordering:
+        if isinstance(name, str) and "__" not in name.lstrip("-") and name.lstrip("-") not in ("pk", "id"):
+            fields.append(name)
+    return fields
+
+
+def _existing_prefixes(model) -> list[list[str]]:
+    """Column lists of indexes the model already has, as field names."""
+    opts = model._meta
+    existing = [list(index.fields) for index in opts.indexes]
+    existing += [list(c.fields) for c in opts.constraints if isinstance(c, models.UniqueConstraint)]
+    existing += [[f.name] for f in opts.concrete_fields if f.db_index or f.unique]
+    return existing
+
+
+def suggest_index(queryset) -> models.Index | None:
+    fields = candidate_index_fields(queryset)
+    if not fields:
+        return None
+    model = queryset.model
+    bare = [f.lstrip("-") for f in fields]
+    for existing in _existing_prefixes(model):
+        if [f.lstrip("-") for f in existing[: len(bare)]] == bare:
+            return None
+    name = "_".join([model._meta.model_name[:6]] + [f[:8].rstrip("_") for f in bare])[:26] + "_idx"
+    return models.Index(fields=fields, name=name)
+
+
+# ---------------------------------------------------------------------------
+# Command
+# ---------------------------------------------------------------------------
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot view queries, flag scans/sorts/nested loops and suggest indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE (PostgreSQL only).")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every plan, not just flagged ones.")
+        parser.add_argument(
+            "--write-migrations", action="store_true",
+            help="Write AddIndex migrations for the suggested indexes.",
+        )
+
+    def handle(self, *args, database: str, analyze: bool, verbose_plans: bool, write_migrations: bool, **options):
+        connection = connections[database]
+        sample = Sample.pick(database)
+        self.stdout.write(
+            f"Auditing {len(AUDITED_QUERIES)} queries on {connection.vendor} "
+            f"(user={sample.user_id}, course={sample.course_id}, lesson={sample.lesson_id})\n"
+        )
+
+        findings = [self._audit(view, description, build(sample).using(database), connection, analyze)
+                    for view, description, build in AUDITED_QUERIES]
+
+        for finding in findings:
+            status = self.style.WARNING("FLAG") if finding.problems else self.style.SUCCESS(" ok ")
+            self.stdout.write(f"[{status}] {finding.view:28} {finding.description}")
+            for problem in finding.problems:
+                self.stdout.write(f"         - {problem}")
+            if finding.index is not None:
+                self.stdout.write(
+                    f"         suggest on {finding.model.__name__}: "
+                    f"models.Index(fields={finding.index.fields!r}, name={finding.index.name!r})"
+                )
+            if verbose_plans or finding.problems:
+                for line in finding.plan.splitlines():
+                    self.stdout.write(f"           | {line}")
+
+        suggestions = self._unique_suggestions(findings)
+        flagged = sum(1 for f in findings if f.problems)
+        self.stdout.write(f"\n{flagged} of {len(findings)} queries flagged, {len(suggestions)} index suggestion(s).")
+        if write_migrations and suggestions:
+            self._write_migrations(suggestions)
+
+    def _audit(self, view, description, queryset, connection, analyze) -> Finding:
+        if connection.vendor == "postgresql":
+            plan = queryset.explain(analyze=analyze)
+            problems = postgresql_problems(plan)
+        else:
+            plan = queryset.explain()
+            problems = sqlite_problems(plan)
+        finding = Finding(view, description, plan, problems)
+        if problems:
+            finding.index = suggest_index(queryset)
+            finding.model = queryset.model
+        return finding
+
+    @staticmethod
+    def _unique_suggestions(findings) -> dict[type[models.Model], list[models.Index]]:
+        suggestions: dict[type[models.Model], list[models.Index]] = {}
+        for finding in findings:
+            if finding.index is None:
+                continue
+            indexes = suggestions.setdefault(finding.model, [])
+            if all(ix.fields != finding.index.fields for ix in indexes):
+                indexes.append(finding.index)
+        return suggestions
+
+    def _write_migrations(self, suggestions):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        by_app: dict[str, list] = {}
+        for model, indexes in suggestions.items():
+            for index in indexes:
+                by_app.setdefault(model._meta.app_label, []).append(
+                    migrations.AddIndex(model_name=model._meta.model_name, index=index)
+                )
+        for app_label, operations in by_app.items():
+            leaves = loader.graph.leaf_nodes(app_label)
+            number = max((int(name.split("_", 1)[0]) for _, name in leaves), default=0) + 1
+            migration = type("Migration", (migrations.Migration,), {
+                "dependencies": leaves,
+                "operations": operations,
+            })(f"{number:04d}_audit_indexes", app_label)
+            writer = MigrationWriter(migration)
+            with open(writer.path, "w") as fh:
+                fh.write(writer.as_string())
+            self.stdout.write(self.style.SUCCESS(f"Wrote {writer.path}"))
+            config = global_apps.get_app_config(app_label)
+            self.stdout.write(f"  Also add these to Meta.indexes in {config.name}.models so makemigrations stays clean.")
@@ -0,0 +1,307 @@
+"""
+Generate a production-sized synthetic dataset for scale testing.
+
+Rows are streamed straight into the tables — `COPY ... FROM STDIN` on
+PostgreSQL, `executemany` on SQLite — inside a single transaction, so
+millions of rows load in minutes instead of the hours an ORM `save()` loop
+takes. Model `save()` hooks are bypassed; derived columns such as
+`Lesson.video_type` are computed here instead, and the Course counters are
+recounted once everything is loaded.
+
+Distributions:
+- Course popularity follows a Zipf law (exponent --zipf): a few courses
+  take most enrollments, with a long tail.
+- Within a course, learners work through lessons in order and the chance
+  of dropping out grows with lesson position (--dropoff, --dropoff-growth).
+
+The same --seed (on an empty database) always yields the same data.
+
+Usage:
+    python manage.py generate_dataset --users 200000 --courses 400 --seed 7
+"""
+import io
+import itertools
+import json
+import random
+import string
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+
+from apps.courses.models import Course, Lesson
+from apps.courses.services import CourseService
+from apps.enrollments.models import Enrollment
+from apps.progress.models import LessonProgress
+
+User = get_user_model()
+
+WORDS = (
+    "data python django web design systems machine learning intro advanced "
+    "practical modern applied theory cloud security testing algorithms "
+    "networks databases statistics analysis writing history art music"
+).split()
+
+
+class TableLoader:
+    """
+    Bulk-load rows for one model in the fastest way the backend supports.
+
+    Callers supply tuples for `attnames`; every other concrete column is
+    filled with its field default (or NULL), so columns added to a model
+    later do not break the generator as long as they have a default.
+    """
+
+    def __init__(self, connection, model, attnames: list[str], batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.table = model._meta.db_table
+        self.vendor = connection.vendor
+
+        given = {model._meta.get_field(a).attname: a for a in attnames}
+        fields = [model._meta.get_field(a) for a in attnames]
+        extra = []
+        for field in model._meta.concrete_fields:
+            if field.attname in given or field.primary_key:
+                continue
+            if field.has_default():
+                extra.append((field, field.get_default()))
+            elif field.null:
+                extra.append((field, None))
+            elif field.empty_strings_allowed and field.blank:
+                extra.append((field, ""))
+            else:
+                raise CommandError(f"{self.table}.{field.column} needs a value from the generator.")
+        self.fields = fields + [f for f, _ in extra]
+        self.extra_values = tuple(v for _, v in extra)
+        self.converters = [self._converter(f) for f in self.fields]
+        self.rows = 0
+
+    def _converter(self, field):
+        if isinstance(field, models.JSONField):
+            return json.dumps
+        if isinstance(field, models.BooleanField) and self.vendor == "postgresql":
+            return lambda v: "t" if v else "f"
+        if isinstance(field, models.DateTimeField):
+            if self.vendor == "postgresql":
+                return lambda v: v.isoformat()
+            # Same text format Django stores for aware datetimes on SQLite
+            return lambda v: v.astimezone(dt_timezone.utc).replace(tzinfo=None).isoformat(" ")
+        return None
+
+    def _prepare(self, row):
+        row = row + self.extra_values
+        return tuple(
+            value if value is None or convert is None else convert(value)
+            for value, convert in zip(row, self.converters)
+        )
+
+    def load(self, rows) -> int:
+        rows = iter(rows)
+        while batch := [self._prepare(r) for r in itertools.islice(rows, self.batch_size)]:
+            if self.vendor == "postgresql":
+                self._copy(batch)
+            else:
+                self._executemany(batch)
+            self.rows += len(batch)
+        return self.rows
+
+    def _executemany(self, batch):
+        qn = self.connection.ops.quote_name
+        cols = ", ".join(qn(f.column) for f in self.fields)
+        marks = ", ".join(["%s"] * len(self.fields))
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {qn(self.table)} ({cols}) VALUES ({marks})", batch)
+
+    def _copy(self, batch):
+        def escape(value):
+            if value is None:
+                return r"\N"
+            return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+        buf = io.StringIO()
+        for row in batch:
+            buf.write("\t".join(escape(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+        qn = self.connection.ops.quote_name
+        sql = f"COPY {qn(self.table)} ({', '.join(qn(f.column) for f in self.fields)}) FROM STDIN"
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate users, courses, lessons, enrollments and progress for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--courses", type=int, default=200)
+        parser.add_argument("--lessons", type=int, default=20, help="Mean lessons per course.")
+        parser.add_argument("--enrollments", type=float, default=3.0, help="Mean enrollments per user.")
+        parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for course popularity.")
+        parser.add_argument("--dropoff", type=float, default=0.04, help="Drop-out probability at the first lesson.")
+        parser.add_argument(
+            "--dropoff-growth", type=float, default=0.15,
+            help="Relative growth of the drop-out probability per lesson position.",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--anchor", default="2026-01-01",
+            help="Date the generated activity ends at (YYYY-MM-DD). Part of the reproducible input.",
+        )
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **opts):
+        self.rng = random.Random(opts["seed"])
+        self.opts = opts
+        self.anchor = datetime.fromisoformat(opts["anchor"]).replace(tzinfo=dt_timezone.utc)
+        connection = connections[opts["database"]]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            raise CommandError(f"Unsupported database backend: {connection.vendor}")
+
+        started = time.perf_counter()
+        with transaction.atomic(using=opts["database"]):
+            totals = self._generate(connection)
+        if connection.vendor == "postgresql":
+            self._reset_sequences(connection)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        for name, count in totals.items():
+            self.stdout.write(f"  {name:<16} {count:>12,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)."
+        ))
+
+    # ------------------------------------------------------------------
+
+    def _next_id(self, model) -> int:
+        last = model.objects.using(self.opts["database"]).aggregate(m=models.Max("pk"))["m"]
+        return (last or 0) + 1
+
+    def _loader(self, connection, model, attnames):
+        return TableLoader(connection, model, attnames, self.opts["batch_size"])
+
+    def _timestamp(self, days_back: float) -> datetime:
+        return self.anchor - timedelta(days=days_back)
+
+    def _generate(self, connection) -> dict[str, int]:
+        rng, opts = self.rng, self.opts
+        totals = {}
+
+        # -- users ----------------------------------------------------------
+        # One hash for everyone: hashing per user would dominate the run time.
+        password = make_password("learner-pass")
+        first_user = self._next_id(User)
+        user_ids = range(first_user, first_user + opts["users"])
+        loader = self._loader(connection, User, ["id", "username", "email", "password", "date_joined"])
+        totals["users"] = loader.load(
+            (uid, f"learner{uid}", f"learner{uid}@example.com", password,
+             self._timestamp(rng.uniform(30, 730)))
+            for uid in user_ids
+        )
+        self.stdout.write(f"users done ({totals['users']:,})")
+
+        # -- courses & lessons ----------------------------------------------
+        first_course = self._next_id(Course)
+        course_ids = list(range(first_course, first_course + opts["courses"]))
+        course_rows = []
+        for cid in course_ids:
+            title = " ".join(rng.choice(WORDS).title() for _ in range(3))
+            created = self._timestamp(rng.uniform(60, 900))
+            course_rows.append((cid, f"{title} {cid}", f"Learn {title.lower()}.",
+                                f"A course about {title.lower()}. " * 20, created, created))
+        totals["courses"] = self._loader(
+            connection, Course, ["id", "title", "short_description", "description", "created_at", "updated_at"],
+        ).load(course_rows)
+
+        lessons_by_course: dict[int, list[int]] = {}
+        lesson_id = self._next_id(Lesson)
+        lesson_rows = []
+        for cid, *_, created in course_rows:
+            count = max(1, int(rng.gauss(opts["lessons"], opts["lessons"] / 3)))
+            ids = lessons_by_course[cid] = []
+            for position in range(count):
+                url = self._video_url()
+                ts = created + timedelta(hours=position)
+                lesson_rows.append((
+                    lesson_id, cid, f"Lesson {position + 1}", "Reading material.\n\n" * rng.randint(1, 10),
+                    (position + 1) * 10, url, Lesson._classify_video_type(url), position, ts, ts,
+                ))
+                ids.append(lesson_id)
+                lesson_id += 1
+        totals["lessons"] = self._loader(
+            connection, Lesson,
+            ["id", "course", "title", "content", "order", "video_url", "video_type", "slot", "created_at", "updated_at"],
+        ).load(lesson_rows)
+        self.stdout.write(f"catalog done ({totals['courses']:,} courses, {totals['lessons']:,} lessons)")
+
+        # -- enrollments (Zipf popularity) -----------------------------------
+        popularity = course_ids[:]
+        rng.shuffle(popularity)  # popularity rank is independent of id/age
+        cum_weights = list(itertools.accumulate(1 / (rank ** opts["zipf"]) for rank in range(1, len(popularity) + 1)))
+        enrollments = []
+        mean_extra = max(opts["enrollments"] - 1, 0)
+        for uid in user_ids:
+            wanted = min(len(popularity), 1 + int(rng.expovariate(1 / mean_extra)) if mean_extra else 1)
+            chosen = set()
+            for _ in range(wanted * 4):  # bounded retries for duplicates
+                chosen.add(rng.choices(popularity, cum_weights=cum_weights)[0])
+                if len(chosen) == wanted:
+                    break
+            for cid in chosen:
+                enrollments.append((uid, cid, self._timestamp(rng.uniform(1, 365))))
+        first_enrollment = self._next_id(Enrollment)
+        totals["enrollments"] = self._loader(
+            connection, Enrollment, ["id", "user", "course", "enrolled_at"],
+        ).load((first_enrollment + i, *row) for i, row in enumerate(enrollments))
+        self.stdout.write(f"enrollments done ({totals['enrollments']:,})")
+
+        # -- progress (drop-off grows with lesson order) ---------------------
+        totals["lesson progress"] = self._loader(
+            connection, LessonProgress, ["user", "lesson", "course", "first_visited_at", "last_visited_at"],
+        ).load(self._progress_rows(enrollments, lessons_by_course))
+
+        CourseService.reconcile_counters(using=opts["database"])
+        return totals
+
+    def _video_url(self) -> str:
+        roll = self.rng.random()
+        if roll < 0.6:
+            vid = "".join(self.rng.choices(string.ascii_letters + string.digits + "_-", k=11))
+            return f"https://www.youtube.com/watch?v={vid}"
+        if roll < 0.8:
+            return f"https://cdn.example.com/videos/{self.rng.getrandbits(40):x}.mp4"
+        return ""
+
+    def _progress_rows(self, enrollments, lessons_by_course):
+        rng, opts = self.rng, self.opts
+        for uid, cid, enrolled_at in enrollments:
+            visited_at = enrolled_at
+            for position, lid in enumerate(lessons_by_course[cid]):
+                hazard = min(0.95, opts["dropoff"] * (1 + opts["dropoff_growth"] * position))
+                if rng.random() < hazard:
+                    break
+                visited_at += timedelta(minutes=rng.uniform(5, 60 * 48))
+                if visited_at > self.anchor:
+                    break
+                last = min(self.anchor, visited_at + timedelta(days=rng.expovariate(1 / 3)))
+                yield (uid, lid, cid, visited_at, last)
+
+    def _reset_sequences(self, connection):
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Course, Lesson, Enrollment, LessonProgress])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,86 @@
+"""
+Show where the time goes when a worker imports the WSGI application.
+
+Runs `python -X importtime -c "import config.wsgi, config.urls"` in a
+fresh interpreter (so nothing is already cached in sys.modules) and ranks
+the modules by self or cumulative import time. `config.wsgi` calls
+`django.setup()` (settings, every app's models and signals); the URLconf
+pulls in every view module, which Django would otherwise import lazily
+on a worker's first request.
+
+Usage:
+    python manage.py import_profile
+    python manage.py import_profile --sort self --limit 40
+    python manage.py import_profile --budget-ms 1500      # non-zero exit if slower
+"""
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    timings = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return timings
+
+
+def total_us(timings: list[ImportTiming]) -> int:
+    """Wall time of the whole import: the sum of the top-level entries."""
+    return sum(t.cumulative_us for t in timings if t.depth == 0)
+
+
+class Command(BaseCommand):
+    help = "Profile the import of config.wsgi with -X importtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default="config.wsgi")
+        parser.add_argument("--no-urls", action="store_true", help="Do not import ROOT_URLCONF as well.")
+        parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument("--budget-ms", type=float, help="Fail if the total import time exceeds this.")
+
+    def handle(self, *args, module: str, no_urls: bool, sort: str, limit: int, budget_ms: float | None,
+               **options):
+        modules = module if no_urls else f"{module}, {settings.ROOT_URLCONF}"
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {modules}"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        timings = parse_importtime(result.stderr)
+        if result.returncode != 0 or not timings:
+            errors = "\n".join(l for l in result.stderr.splitlines() if not l.startswith("import time:"))
+            raise CommandError(f"Importing {modules} failed:\n{errors}")
+
+        key = (lambda t: t.cumulative_us) if sort == "cumulative" else (lambda t: t.self_us)
+        self.stdout.write(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for timing in sorted(timings, key=key, reverse=True)[:limit]:
+            self.stdout.write(
+                f"{timing.self_us / 1000:9.1f} {timing.cumulative_us / 1000:9.1f}  "
+                f"{'  ' * timing.depth}{timing.module}"
+            )
+
+        total_ms = total_us(timings) / 1000
+        self.stdout.write(f"\nImporting {modules} took {total_ms:.0f} ms across {len(timings)} modules.")
+        if budget_ms is not None and total_ms > budget_ms:
+            raise CommandError(f"Import time {total_ms:.0f} ms exceeds the {budget_ms:.0f} ms budget.")
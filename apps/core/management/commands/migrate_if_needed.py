@@ -0,0 +1,89 @@
+"""
+Apply pending migrations, safely and cheaply, on container start.
+
+- No pending migrations (the common case on a scale-out): one read of
+  `django_migrations`, then exit. Nothing is locked.
+- Pending migrations on PostgreSQL: take a session-level advisory lock so
+  only one replica migrates; the others wait for it, re-check, and find
+  nothing left to do.
+- Other databases (SQLite in development) have a single writer anyway and
+  just run `migrate`.
+
+Every database is checked: "default" and each progress shard in
+PROGRESS_SHARDS (see apps/progress/sharding.py), so a newly added shard is
+migrated before any traffic is routed to it. --database limits the run to
+one alias.
+
+Usage:
+    python manage.py migrate_if_needed
+    python manage.py migrate_if_needed --lock-timeout 300
+    python manage.py migrate_if_needed --database progress_1
+"""
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+# Arbitrary but fixed: every replica must agree on the key.
+MIGRATION_LOCK_KEY = 0x6D6F6F63  # "mooc"
+LOCK_POLL_SECONDS = 0.5
+
+
+def pending_migrations(connection) -> list:
+    executor = MigrationExecutor(connection)
+    targets = executor.loader.graph.leaf_nodes()
+    return [migration for migration, _ in executor.migration_plan(targets)]
+
+
+class Command(BaseCommand):
+    help = "Run migrate only when migrations are pending, under an advisory lock on PostgreSQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=None, help="Only this alias (default: default and every shard).")
+        parser.add_argument(
+            "--lock-timeout", type=float, default=600,
+            help="Seconds to wait for another replica's migration before giving up.",
+        )
+
+    def handle(self, *args, database: str | None, lock_timeout: float, **options):
+        aliases = [database] if database else [DEFAULT_DB_ALIAS, *settings.PROGRESS_SHARDS]
+        for alias in aliases:
+            self._migrate(alias, lock_timeout, options["verbosity"])
+
+    def _migrate(self, database: str, lock_timeout: float, verbosity: int) -> None:
+        start = time.perf_counter()
+        connection = connections[database]
+
+        if not pending_migrations(connection):
+            self.stdout.write(f"{database}: no migrations pending ({time.perf_counter() - start:.2f}s).")
+            return
+
+        if connection.vendor != "postgresql":
+            call_command("migrate", database=database, interactive=False, verbosity=verbosity)
+        else:
+            self._acquire(connection, lock_timeout)
+            try:
+                # Another replica may have finished while we waited
+                if pending_migrations(connection):
+                    call_command("migrate", database=database, interactive=False, verbosity=verbosity)
+                else:
+                    self.stdout.write(f"{database}: migrations were applied by another replica.")
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [MIGRATION_LOCK_KEY])
+
+        self.stdout.write(self.style.SUCCESS(f"{database}: migrations done ({time.perf_counter() - start:.2f}s)."))
+
+    def _acquire(self, connection, lock_timeout: float) -> None:
+        deadline = time.monotonic() + lock_timeout
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", [MIGRATION_LOCK_KEY])
+                if cursor.fetchone()[0]:
+                    return
+                if time.monotonic() >= deadline:
+                    raise CommandError(f"Timed out after {lock_timeout:.0f}s waiting for the migration lock.")
+                time.sleep(LOCK_POLL_SECONDS)
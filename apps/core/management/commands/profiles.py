@@ -0,0 +1,112 @@
+"""
+Inspect request profiles captured by ProfilingMiddleware.
+
+Usage:
+    python manage.py profiles list
+    python manage.py profiles top                       # aggregate every capture
+    python manage.py profiles top 41 42 --sort tottime  # aggregate selected captures
+    python manage.py profiles top --view courses:lesson_detail
+    python manage.py profiles diff 41,42 57,58          # B minus A, per function
+"""
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.profiling import ProfileStore
+
+SORT_KEYS = {"cumulative": 3, "tottime": 2}
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # built-in
+    return f"{filename.rsplit('site-packages/', 1)[-1]}:{line}({name})"
+
+
+class Command(BaseCommand):
+    help = "List, aggregate and diff captured request profiles."
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest="action", required=True)
+
+        sub.add_parser("list", help="Show captured profiles, newest first.")
+
+        top = sub.add_parser("top", help="Top functions across captures.")
+        top.add_argument("ids", nargs="*", type=int, help="Capture IDs (default: all).")
+        top.add_argument("--view", help="Only captures of this URL name, e.g. courses:lesson_detail.")
+        top.add_argument("--sort", choices=SORT_KEYS, default="cumulative")
+        top.add_argument("--limit", type=int, default=25)
+
+        diff = sub.add_parser("diff", help="Per-function time change between two groups of captures.")
+        diff.add_argument("a", help="Comma-separated capture IDs (baseline).")
+        diff.add_argument("b", help="Comma-separated capture IDs (comparison).")
+        diff.add_argument("--sort", choices=SORT_KEYS, default="tottime")
+        diff.add_argument("--limit", type=int, default=25)
+
+    def handle(self, *args, action: str, **options):
+        self.store = ProfileStore()
+        getattr(self, f"handle_{action}")(**options)
+
+    # -- helpers -------------------------------------------------------------
+
+    def _select(self, ids=None, view=None) -> list[dict]:
+        captures = self.store.list()
+        if ids:
+            wanted = set(ids)
+            captures = [m for m in captures if m["id"] in wanted]
+            missing = wanted - {m["id"] for m in captures}
+            if missing:
+                raise CommandError(f"Not in the ring buffer (overwritten?): {sorted(missing)}")
+        if view:
+            captures = [m for m in captures if m.get("view") == view]
+        if not captures:
+            raise CommandError("No matching profiles captured.")
+        return captures
+
+    def _aggregate(self, captures) -> dict:
+        """Merge captures into {func: (tottime, cumtime, calls)}, averaged per request."""
+        stats = pstats.Stats(*(str(self.store.stats_path(m)) for m in captures))
+        n = len(captures)
+        return {
+            func: (tt / n, ct / n, nc / n)
+            for func, (_, nc, tt, ct, _) in stats.stats.items()
+        }
+
+    # -- actions -------------------------------------------------------------
+
+    def handle_list(self, **options):
+        self.stdout.write(f"{'ID':>6}  {'when':19}  {'view':32} {'status':>6} {'total':>9} {'sql':>9} {'#sql':>5} {'tmpl':>9}  reason")
+        for m in self._select():
+            self.stdout.write(
+                f"{m['id']:>6}  {m['created_at'][:19]}  {str(m['view'])[:32]:32} {m['status']:>6} "
+                f"{m['total_ms']:>7.1f}ms {m['sql_ms']:>7.1f}ms {m['sql_count']:>5} {m['template_ms']:>7.1f}ms  {m['reason']}"
+            )
+
+    def handle_top(self, ids, view, sort, limit, **options):
+        captures = self._select(ids, view)
+        rows = self._aggregate(captures)
+        key = SORT_KEYS[sort] - 2
+        self.stdout.write(f"Averaged over {len(captures)} request(s), sorted by {sort}:")
+        self.stdout.write(f"{'tottime':>10} {'cumtime':>10} {'calls':>8}  function")
+        for func, (tt, ct, nc) in sorted(rows.items(), key=lambda kv: kv[1][key], reverse=True)[:limit]:
+            self.stdout.write(f"{tt * 1000:>8.2f}ms {ct * 1000:>8.2f}ms {nc:>8.0f}  {_label(func)}")
+
+    def handle_diff(self, a, b, sort, limit, **options):
+        try:
+            ids_a = [int(x) for x in a.split(",")]
+            ids_b = [int(x) for x in b.split(",")]
+        except ValueError:
+            raise CommandError("Capture IDs must be comma-separated integers.")
+        rows_a = self._aggregate(self._select(ids_a))
+        rows_b = self._aggregate(self._select(ids_b))
+        key = SORT_KEYS[sort] - 2
+        zero = (0.0, 0.0, 0.0)
+        deltas = {
+            func: tuple(y - x for x, y in zip(rows_a.get(func, zero), rows_b.get(func, zero)))
+            for func in rows_a.keys() | rows_b.keys()
+        }
+        self.stdout.write(f"Per-request change B - A, sorted by |Δ {sort}|:")
+        self.stdout.write(f"{'Δtottime':>10} {'Δcumtime':>10} {'Δcalls':>8}  function")
+        for func, (tt, ct, nc) in sorted(deltas.items(), key=lambda kv: abs(kv[1][key]), reverse=True)[:limit]:
+            self.stdout.write(f"{tt * 1000:>+8.2f}ms {ct * 1000:>+8.2f}ms {nc:>+8.0f}  {_label(func)}")
@@ -0,0 +1,170 @@
+"""
+Fill the shared caches with the hottest entries before traffic arrives.
+
+After a deploy or a cache flush the first learners would otherwise pay for
+the catalog, course pages and outlines, rendered lesson bodies and
+enrollment sets (see apps/courses/caching.py) until the caches refill. This
+precomputes:
+
+- the catalog cards
+- course pages and outlines of the courses with the most recent activity:
+  enrollments and lesson visits (Enrollment.enrolled_at / last_visited_at)
+  plus LessonProgress visits over the last --days
+- bodies of the most visited lessons, and of the lessons recently active
+  learners will resume at (Enrollment.next_lesson / last_lesson)
+- enrollment sets of the most recently active learners
+
+Work is split into batches (a few queries and one cache `set_many` each),
+interleaved hottest-first across the five kinds and run on --workers
+threads. Nothing new starts once --budget seconds have passed, so the
+command has a bounded run time, and a failing batch is reported but never
+fails the command: it is safe in the container entrypoint before gunicorn
+starts. Only useful with a cache shared between processes (production's file
+cache) — LocMemCache is per process.
+
+Usage:
+    python manage.py warm_caches [--budget 20] [--workers 4] [--days 7]
+"""
+import itertools
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from apps.courses import caching
+from apps.courses.models import Lesson
+from apps.courses.services import CatalogService
+from apps.enrollments.models import Enrollment
+from apps.enrollments.services import EnrollmentService
+from apps.progress.services import ProgressService
+
+
+def batched(ids: list, size: int) -> list[list]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+class Command(BaseCommand):
+    help = "Precompute the hottest catalog, course page, outline, lesson body and enrollment cache entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=float, default=20, help="Seconds after which no new batch starts.")
+        parser.add_argument("--workers", type=int, default=4, help="Threads warming batches in parallel.")
+        parser.add_argument("--days", type=int, default=7, help="Activity window used to rank entries.")
+        parser.add_argument("--courses", type=int, default=500, help="Course pages and outlines to warm.")
+        parser.add_argument("--lessons", type=int, default=5000, help="Lesson bodies to warm.")
+        parser.add_argument("--users", type=int, default=20000, help="Enrollment sets to warm.")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        deadline = started + opts["budget"]
+        course_ids, lesson_ids, user_ids = self._rank(opts)
+        size = opts["batch_size"]
+        kinds = [
+            [("catalog", CatalogService.warm_cache, None)],
+            [("course pages", caching.warm_course_pages, batch) for batch in batched(course_ids, size)],
+            [("outlines", caching.warm_outlines, batch) for batch in batched(course_ids, size)],
+            [("lesson bodies", caching.warm_lesson_bodies, batch) for batch in batched(lesson_ids, size)],
+            [("enrollment sets", EnrollmentService.warm_enrolled_course_ids, batch)
+             for batch in batched(user_ids, size)],
+        ]
+        tasks = [task for row in itertools.zip_longest(*kinds) for task in row if task]
+        warmed, failed, skipped = self._run(tasks, opts["workers"], deadline)
+
+        for kind, count in warmed.items():
+            self.stdout.write(f"{kind}: {count:,} entries")
+        elapsed = time.monotonic() - started
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Budget of {opts['budget']:g}s reached: {skipped} batches not done.",
+            ))
+        if failed:
+            self.stderr.write(f"{failed} batches failed (see above); continuing.")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {sum(warmed.values()):,} cache entries in {elapsed:.1f}s."))
+
+    def _rank(self, opts) -> tuple[list[int], list[int], list[int]]:
+        """The hottest course, lesson and user ids, hottest first."""
+        since = timezone.now() - timedelta(days=opts["days"])
+        active = Enrollment.objects.filter(
+            Q(last_visited_at__gte=since) | Q(enrolled_at__gte=since), course__deleted_at__isnull=True,
+        ).order_by()
+        lesson_visits = ProgressService.recent_lesson_visits(since, opts["lessons"])
+
+        course_scores = Counter(dict(
+            active.values("course_id").annotate(n=Count("pk")).values_list("course_id", "n")
+        ))
+        lesson_course = dict(Lesson.objects.filter(pk__in=list(lesson_visits)).values_list("pk", "course_id"))
+        for lesson_id, visits in lesson_visits.items():
+            if lesson_id in lesson_course:
+                course_scores[lesson_course[lesson_id]] += visits
+
+        # Where recently active learners will land next counts as much as where they were
+        lesson_scores = Counter({pk: lesson_visits[pk] for pk in lesson_course})
+        for field in ("next_lesson_id", "last_lesson_id"):
+            lesson_scores.update(dict(
+                active.filter(**{f"{field}__isnull": False}).values(field).annotate(n=Count("pk"))
+                .values_list(field, "n")
+            ))
+
+        user_ids = list(
+            active.values("user_id").annotate(last=Max("last_visited_at"), joined=Max("enrolled_at"))
+            .order_by(F("last").desc(nulls_last=True), F("joined").desc())
+            .values_list("user_id", flat=True)[:opts["users"]]
+        )
+        return (
+            [pk for pk, _ in course_scores.most_common(opts["courses"])],
+            [pk for pk, _ in lesson_scores.most_common(opts["lessons"])],
+            user_ids,
+        )
+
+    def _run(self, tasks, workers: int, deadline: float) -> tuple[Counter, int, int]:
+        warmed, failed = Counter(), 0
+
+        def run(task):
+            kind, warm, batch = task
+            try:
+                return kind, (warm() if batch is None else warm(batch))
+            finally:
+                if workers > 1:
+                    connections.close_all()  # this thread's connections
+
+        def record(task, future_or_call):
+            nonlocal failed
+            try:
+                kind, count = future_or_call()
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Warming {task[0]} failed: {exc!r}")
+            else:
+                warmed[kind] += count
+
+        queue = iter(tasks)
+        if workers <= 1:  # in this thread: also sees this thread's open transaction
+            for task in queue:
+                if time.monotonic() >= deadline:
+                    return warmed, failed, 1 + sum(1 for _ in queue)
+                record(task, lambda: run(task))
+            return warmed, failed, 0
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warm-caches")
+        pending = {}
+        try:
+            while True:
+                while len(pending) < workers and time.monotonic() < deadline and (task := next(queue, None)):
+                    pending[pool.submit(run, task)] = task
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(pending.pop(future), future.result)
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            # Running batches finish on their own; queued ones never start
+            pool.shutdown(wait=False, cancel_futures=True)
+        return warmed, failed, len(pending) + sum(1 for _ in queue)
@@ -0,0 +1,219 @@
+"""
+Prometheus-style metrics, aggregated across gunicorn worker processes.
+
+Each process records into plain in-memory dicts (a counter increment or a
+histogram observation is a dict update plus, for histograms, a bisect —
+about a microsecond). At most once per METRICS_FLUSH_INTERVAL the process
+snapshots them into `METRICS_DIR/metrics-<pid>-<start>.json` with an atomic
+rename. The `/metrics` endpoint sums every process's file and renders the
+text exposition format, so any worker can answer for all of them.
+
+Files of exited workers are kept: their counts are part of the running
+totals (counters must never go down); the start time in the name keeps a
+recycled pid from overwriting them. The container entrypoint clears the
+directory, which Prometheus sees as an ordinary counter reset.
+
+Recording from application code:
+
+    from apps.core import metrics
+    metrics.inc("mooc_enrollments_total")
+    metrics.observe("mooc_request_duration_seconds", 0.042, {"view": "courses:list"})
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# name → (type, help, buckets). Only declared names are rendered on /metrics.
+METRICS = {
+    "mooc_requests_total": ("counter", "Requests served, by URL name and status class.", None),
+    "mooc_request_duration_seconds": ("histogram", "Request latency by URL name.", LATENCY_BUCKETS),
+    "mooc_request_db_queries": ("histogram", "Database queries per request by URL name.", QUERY_COUNT_BUCKETS),
+    "mooc_enrollments_total": ("counter", "New enrollments.", None),
+    "mooc_lesson_visits_total": ("counter", "Lesson visits recorded.", None),
+    "mooc_cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss).", None),
+    "mooc_load_shed_total": ("counter", "Requests shed with 503, by traffic class.", None),
+    "mooc_metrics_overhead_seconds_total": ("counter", "Time spent collecting request metrics.", None),
+}
+
+
+def label_str(labels: dict | None) -> str:
+    if not labels:
+        return ""
+    return ",".join(
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in sorted(labels.items())
+    )
+
+
+class Registry:
+    """This process's metric values. Thread-safe; reset in a forked child."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._file = f"metrics-{self._pid}-{time.time_ns() // 1_000_000}.json"
+        self.counters: dict[tuple[str, str], float] = defaultdict(float)
+        # (name, labels) → [bucket counts..., +Inf count, sum]
+        self.histograms: dict[tuple[str, str], list[float]] = {}
+        self._next_flush = 0.0
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:  # values belong to the parent's file
+            self._reset()
+
+    def inc(self, name: str, labels: dict | None = None, value: float = 1) -> None:
+        key = (name, label_str(labels))
+        with self._lock:
+            self._check_fork()
+            self.counters[key] += value
+        self.maybe_flush()
+
+    def observe(self, name: str, value: float, labels: dict | None = None) -> None:
+        buckets = METRICS[name][2]
+        key = (name, label_str(labels))
+        with self._lock:
+            self._check_fork()
+            row = self.histograms.get(key)
+            if row is None:
+                row = self.histograms[key] = [0.0] * (len(buckets) + 2)
+            row[bisect.bisect_left(buckets, value)] += 1
+            row[-1] += value
+        self.maybe_flush()
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._check_fork()
+            self._next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+            snapshot = {
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, labels, row] for (name, labels), row in self.histograms.items()],
+            }
+        if not snapshot["counters"] and not snapshot["histograms"]:
+            return
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / self._file
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, path)
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    try:
+        registry.flush()
+    except Exception:
+        pass
+
+
+def collect(directory=None) -> tuple[dict, dict]:
+    """Sum every process's snapshot. Returns (counters, histograms) keyed by (name, labels)."""
+    counters: dict[tuple[str, str], float] = defaultdict(float)
+    histograms: dict[tuple[str, str], list[float]] = {}
+    for path in Path(directory or settings.METRICS_DIR).glob("metrics-*.json"):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot["counters"]:
+            counters[(name, labels)] += value
+        for name, labels, row in snapshot["histograms"]:
+            if name not in METRICS:
+                continue
+            total = histograms.setdefault((name, labels), [0.0] * len(row))
+            for i, value in enumerate(row):
+                total[i] += value
+    return counters, histograms
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _sample(name: str, labels: str, value: float) -> str:
+    return f"{name}{{{labels}}} {_fmt(value)}" if labels else f"{name} {_fmt(value)}"
+
+
+def render(directory=None) -> str:
+    """The aggregated metrics in Prometheus text exposition format."""
+    counters, histograms = collect(directory)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        if kind == "counter":
+            lines += [_sample(name, labels, value) for (metric, labels), value in sorted(counters.items())
+                      if metric == name]
+            continue
+        for (metric, labels), row in sorted(histograms.items()):
+            if metric != name:
+                continue
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0.0
+            for bound, count in zip((*buckets, "+Inf"), row[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {_fmt(cumulative)}')
+            lines.append(_sample(f"{name}_sum", labels, row[-1]))
+            lines.append(_sample(f"{name}_count", labels, cumulative))
+    return "\n".join(lines) + "\n"
+
+
+class _QueryCounter:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Outermost middleware: latency covers the whole Django stack. Its own
+    cost is measured and exported as mooc_metrics_overhead_seconds_total,
+    so mean overhead per request = that / sum of mooc_requests_total.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connection
+
+        start = time.perf_counter()
+        queries = _QueryCounter()
+        with connection.execute_wrapper(queries):
+            served = time.perf_counter()
+            response = self.get_response(request)
+            done = time.perf_counter()
+
+        view = getattr(request.resolver_match, "view_name", None) or "unmatched"
+        labels = {"view": view}
+        registry.inc("mooc_requests_total", {"view": view, "status": f"{response.status_code // 100}xx"})
+        registry.observe("mooc_request_duration_seconds", done - start, labels)
+        registry.observe("mooc_request_db_queries", queries.count, labels)
+        registry.inc("mooc_metrics_overhead_seconds_total", value=(served - start) + (time.perf_counter() - done))
+        return response
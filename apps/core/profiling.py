@@ -0,0 +1,175 @@
+"""
+On-demand request profiling.
+
+A request is profiled when either:
+- a staff user sends the `X-Profile: 1` header or `?_profile=1`, or
+- it is picked by random sampling (PROFILING_SAMPLE_RATE, default 0 = off)
+
+The view runs under cProfile, with SQL time measured by an execute
+wrapper on every database connection (progress shards included; queries
+that fan_out runs in its own threads are not seen) and template time taken
+from the profile of `Template.render`. Each capture is written to a bounded
+on-disk ring buffer (PROFILING_DIR, PROFILING_MAX_PROFILES slots) shared by
+all workers; a capture that cannot be written is logged and dropped, never
+failing the request.
+
+Inspect captures with `python manage.py profiles`.
+"""
+import cProfile
+import fcntl
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+TRIGGER_HEADER = "X-Profile"
+TRIGGER_PARAM = "_profile"
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileStore:
+    """
+    Fixed-size ring buffer of profiles on disk.
+
+    Capture N is written to slot N % capacity as `<slot>.prof` (pstats
+    format) plus `<slot>.json` (metadata), so disk use never exceeds
+    `capacity` captures. The sequence counter is guarded by flock so
+    concurrent workers never pick the same slot.
+    """
+
+    def __init__(self, directory=None, capacity: int | None = None):
+        self.directory = Path(directory or settings.PROFILING_DIR)
+        self.capacity = capacity or settings.PROFILING_MAX_PROFILES
+
+    def _next_seq(self) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / "seq", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 32)
+            seq = int(raw or 0) + 1
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(seq).encode())
+            return seq
+        finally:
+            os.close(fd)
+
+    def save(self, profiler: cProfile.Profile, meta: dict) -> int:
+        seq = self._next_seq()
+        slot = seq % self.capacity
+        meta = {**meta, "id": seq, "slot": slot}
+        profiler.dump_stats(self.directory / f"{slot}.prof")
+        # Write metadata last: a listing never shows a half-written capture
+        tmp = self.directory / f"{slot}.json.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.directory / f"{slot}.json")
+        return seq
+
+    def list(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda m: m["id"], reverse=True)
+
+    def stats_path(self, meta: dict) -> Path:
+        return self.directory / f"{meta['slot']}.prof"
+
+
+def template_seconds(stats: pstats.Stats) -> float:
+    """Cumulative time spent in top-level Template.render calls."""
+    total = 0.0
+    for (filename, _, func), (_, _, _, cumtime, _) in stats.stats.items():
+        if func == "render" and filename.endswith(os.path.join("django", "template", "backends", "django.py")):
+            total += cumtime
+    return total
+
+
+class _SqlTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class ProfilingMiddleware:
+    """
+    Must sit after AuthenticationMiddleware: the staff check needs request.user.
+    The user is only looked at when the trigger header/param is present.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _reason(self, request) -> str | None:
+        triggered = request.headers.get(TRIGGER_HEADER) == "1" or request.GET.get(TRIGGER_PARAM) == "1"
+        if triggered and request.user.is_staff:
+            return "staff"
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return "sampled"
+        return None
+
+    def __call__(self, request):
+        reason = self._reason(request)
+        if reason is None:
+            return self.get_response(request)
+
+        sql = _SqlTimer()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as wrappers:
+            for alias in connections:
+                wrappers.enter_context(connections[alias].execute_wrapper(sql))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+                # Lazy TemplateResponses render here, so include that in the profile
+                if hasattr(response, "render") and not getattr(response, "is_rendered", True):
+                    response.render()
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - start
+
+        profiler.create_stats()
+        meta = {
+            "created_at": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.path,
+            "view": getattr(request.resolver_match, "view_name", None),
+            "status": response.status_code,
+            "reason": reason,
+            "total_ms": round(total * 1000, 2),
+            "sql_ms": round(sql.seconds * 1000, 2),
+            "sql_count": sql.count,
+            "template_ms": round(template_seconds(pstats.Stats(profiler)) * 1000, 2),
+        }
+        try:
+            profile_id = ProfileStore().save(profiler, meta)
+        except OSError:  # full or read-only PROFILING_DIR: the response is fine, the capture is lost
+            logger.exception("Could not save the profile of %s %s", request.method, request.path)
+            return response
+        if reason == "staff":
+            response["X-Profile-Id"] = str(profile_id)
+        return response
@@ -0,0 +1,79 @@
+"""
+Anonymous pages that a shared cache (reverse proxy or CDN) may store.
+
+A page Django renders for an anonymous visitor normally still varies on
+cookies: reading `request.user` or the messages loads the session, which
+adds `Vary: Cookie`, and a `{% csrf_token %}` sets the CSRF cookie. With
+PUBLIC_CACHE_SECONDS > 0, views wrapped in `public_when_anonymous` serve a
+GET without a session cookie as a shared page:
+
+- `request.user` is an AnonymousUser that never reads the session, and
+  base.html skips the messages block (`request.public_cache`), so the
+  response has no Set-Cookie and no Vary: Cookie
+- the page must not render per-user fragments or a CSRF token for
+  anonymous visitors (course_list and course_detail don't)
+- `Cache-Control: public, max-age=0, s-maxage=PUBLIC_CACHE_SECONDS`: the
+  shared cache keeps it, browsers revalidate
+
+Requests with a session cookie get the normal page marked `private`; the
+proxy must bypass its cache for them (nginx: `proxy_cache_bypass
+$cookie_sessionid; proxy_no_cache $cookie_sessionid;`).
+
+Purging: when a course or lesson changes, `purge_later()` queues a job
+that sends `PURGE <path>` to every proxy in PUBLIC_CACHE_PURGE_URLS
+(Varnish, nginx `proxy_cache_purge`), so learners do not wait out
+s-maxage. A failed purge raises, and the job is retried.
+"""
+import functools
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_cache_control
+
+PURGE_TIMEOUT = 5  # seconds per proxy request
+
+
+def public_when_anonymous(view):
+    """Serve `view` as a shared-cacheable page to visitors without a session cookie."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.PUBLIC_CACHE_SECONDS or request.method not in ("GET", "HEAD"):
+            return view(request, *args, **kwargs)
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            return response
+
+        request.user = AnonymousUser()
+        request.public_cache = True
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            patch_cache_control(response, public=True, max_age=0, s_maxage=settings.PUBLIC_CACHE_SECONDS)
+        return response
+
+    return wrapper
+
+
+def purge_later(paths) -> None:
+    """Queue a purge of `paths` from the shared caches (no-op without PUBLIC_CACHE_PURGE_URLS)."""
+    if not (settings.PUBLIC_CACHE_SECONDS and settings.PUBLIC_CACHE_PURGE_URLS):
+        return
+    from apps.courses.tasks import purge_public_pages
+    purge_public_pages.enqueue(unique=True, paths=sorted(set(paths)))
+
+
+def purge(paths) -> int:
+    """Send `PURGE <path>` to every proxy; returns requests sent. Raises on the first failure."""
+    sent = 0
+    for base in settings.PUBLIC_CACHE_PURGE_URLS:
+        for path in paths:
+            request = urllib.request.Request(base.rstrip("/") + path, method="PURGE")
+            try:
+                urllib.request.urlopen(request, timeout=PURGE_TIMEOUT).close()
+            except urllib.error.HTTPError as exc:
+                if exc.code != 404:  # 404: the proxy had nothing cached
+                    raise
+            sent += 1
+    return sent
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = "core"
+
+urlpatterns = [
+    path("load/", views.load_status, name="load_status"),
+]
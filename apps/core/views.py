@@ -0,0 +1,27 @@
+import hmac
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+
+from . import metrics
+from .loadshed import shed_counts, worker_load
+
+
+@staff_member_required
+def load_status(request):
+    """Load-shedding state: this worker's pressure plus shed counts across workers."""
+    return JsonResponse({"worker": worker_load.snapshot(), "shed": shed_counts()})
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Allowed for `Authorization: Bearer <METRICS_TOKEN>`
+    or a logged-in staff user; everyone else gets a 404.
+    """
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not (token and hmac.compare_digest(supplied, token)) and not request.user.is_staff:
+        return HttpResponse(status=404)
+    metrics.registry.flush()  # include this worker's latest values
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from .models import Course, Lesson
+from .services import CourseService
+from .tasks import purge_deleted
+
+
+class TombstoneDeleteMixin:
+    """
+    Admin deletes tombstone instead of cascading in the request, and the
+    confirmation page skips Django's full dependent-object listing (which
+    would load every enrollment and progress row). Admins set
+    `tombstone_func` to the CourseService function that hides one object.
+    """
+
+    tombstone_func = None
+
+    def delete_model(self, request, obj):
+        self.tombstone_func(obj)
+        purge_deleted.enqueue(unique=True)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.tombstone_func(obj)
+        purge_deleted.enqueue(unique=True)
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        summary = [f"{obj} (dependent rows are purged in the background)" for obj in objs]
+        return summary, {self.model._meta.verbose_name_plural: len(objs)}, set(), []
 
 
 class LessonInline(admin.TabularInline):
@@ -16,16 +43,32 @@ class LessonInline(admin.TabularInline):
 
 
 @admin.register(Course)
-class CourseAdmin(admin.ModelAdmin):
-    list_display = ("title", "short_description", "lesson_count", "manage_link", "created_at")
+class CourseAdmin(TombstoneDeleteMixin, admin.ModelAdmin):
+    list_display = ("title", "short_description", "lesson_count", "enrollment_count", "manage_link", "created_at")
     list_filter = ("created_at",)
     search_fields = ("title", "description")
     readonly_fields = ("created_at", "updated_at")
     inlines = [LessonInline]
+    actions = ["duplicate_courses"]
+    tombstone_func = staticmethod(CourseService.tombstone)
+
+    @admin.action(description="Duplicate selected courses (with lessons)")
+    def duplicate_courses(self, request, queryset):
+        courses = list(queryset)
+        for course in courses:
+            CourseService.duplicate(course)
+        self.message_user(request, f"Duplicated {len(courses)} course(s).", messages.SUCCESS)
 
-    @admin.display(description="Lessons")
-    def lesson_count(self, obj: Course) -> int:
-        return obj.lessons.count()
+    def save_formset(self, request, form, formset, change):
+        # Lessons removed in the inline are tombstoned like any other lesson delete
+        instances = formset.save(commit=False)
+        for lesson in formset.deleted_objects:
+            CourseService.tombstone_lesson(lesson)
+        if formset.deleted_objects:
+            purge_deleted.enqueue(unique=True)
+        for lesson in instances:
+            lesson.save()
+        formset.save_m2m()
 
     @admin.display(description="Staff UI")
     def manage_link(self, obj: Course):
@@ -35,12 +78,13 @@ class CourseAdmin(admin.ModelAdmin):
 
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(TombstoneDeleteMixin, admin.ModelAdmin):
     list_display = ("title", "course", "order", "video_type", "has_content", "created_at")
     list_filter = ("course", "video_type")
     search_fields = ("title", "content", "course__title")
     readonly_fields = ("video_type", "youtube_embed_preview", "created_at", "updated_at")
     autocomplete_fields = ("course",)
+    tombstone_func = staticmethod(CourseService.tombstone_lesson)
     fieldsets = (
         (None, {
             "fields": ("course", "title", "order"),
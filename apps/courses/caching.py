@@ -0,0 +1,143 @@
+"""
+Shared read-through caches for the parts of course pages every learner sees.
+
+- catalog: the anonymous catalog cards (CatalogService.cached_courses)
+- course page: everything course_detail shows that is the same for every
+  visitor — the course, its outline and its recommendations
+- outline: a course's lessons in order, without their text — the course
+  page list and the lesson sidebar
+- lesson body: a lesson's text rendered to HTML, keyed by its updated_at,
+  so an edited lesson simply misses
+Per-user enrollment sets live next to them in EnrollmentService.
+
+Entries expire after CONTENT_CACHE_TIMEOUT and are rebuilt by one request
+at a time (apps/core/caching.py). Course and Lesson writes drop the
+catalog, the course page and the course's outline right away and again after commit
+(signals.py; CourseService for bulk writes that skip signals): the second
+delete catches a request that re-cached the old rows before the commit.
+The same writes purge the catalog and course pages from shared HTTP
+caches when public caching is on. Recommendations are only rebuilt
+offline, so a course page picks up new ones when it expires. Enrollments
+drop nothing here either (a popular course would empty the catalog on
+every signup), so the learner counts on catalog cards are up to
+CONTENT_CACHE_TIMEOUT old, plus PUBLIC_CACHE_SECONDS behind a proxy.
+
+`manage.py warm_caches` fills the hottest entries after a deploy through
+the `warm_*` functions, a few queries and one `set_many` per batch.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils.html import linebreaks
+from django.utils.safestring import SafeString, mark_safe
+
+from apps.core import public_cache
+from apps.core.caching import get_or_build, store_many
+from apps.recommendations.services import RecommendationService
+from .models import Course, Lesson
+
+CATALOG_KEY = "catalog:cards"
+PAGE_KEY = "course:{}:page"
+OUTLINE_KEY = "course:{}:outline"
+BODY_KEY = "lesson:{}:body:{}"
+# Everything the course page list, the lesson sidebar and ProgressService read
+OUTLINE_FIELDS = ("id", "course_id", "title", "slot", "video_type")
+
+
+def page_key(course_id: int) -> str:
+    return PAGE_KEY.format(course_id)
+
+
+def outline_key(course_id: int) -> str:
+    return OUTLINE_KEY.format(course_id)
+
+
+def body_key(lesson: Lesson) -> str:
+    return BODY_KEY.format(lesson.pk, int(lesson.updated_at.timestamp() * 1_000_000))
+
+
+def _outline_query(course_ids):
+    return Lesson.objects.filter(course_id__in=course_ids).only(*OUTLINE_FIELDS)
+
+
+def outline(course_id: int) -> list[Lesson]:
+    """The course's live lessons in outline order, with OUTLINE_FIELDS loaded only."""
+    return get_or_build("outline", outline_key(course_id), lambda: list(_outline_query([course_id])))
+
+
+def _build_page(course_id: int) -> dict | None:
+    course = Course.objects.filter(pk=course_id).first()
+    if course is None:
+        return None  # cached too: creating a course invalidates its pk
+    return {
+        "course": course,
+        "lessons": outline(course_id),
+        "recommendations": RecommendationService.for_course(course),
+    }
+
+
+def course_page(course_id: int) -> dict | None:
+    """`course`, `lessons` and `recommendations` for course_detail, or None for no live course."""
+    return get_or_build("course_page", page_key(course_id), lambda: _build_page(course_id))
+
+
+def _render_body(content: str) -> str:
+    return linebreaks(content, autoescape=True)
+
+
+def lesson_body(lesson: Lesson) -> SafeString:
+    """`lesson.content` as HTML paragraphs, as the `linebreaks` filter renders it."""
+    if not lesson.content:
+        return mark_safe("")
+    return mark_safe(get_or_build("lesson_body", body_key(lesson), lambda: _render_body(lesson.content)))
+
+
+def invalidate_course(course_id: int | None) -> None:
+    """
+    Drop the catalog and `course_id`'s page and outline now and once the current
+    transaction commits, and queue a purge of their public pages from the
+    shared HTTP caches (see apps/core/public_cache.py).
+    """
+    keys = [CATALOG_KEY] + ([page_key(course_id), outline_key(course_id)] if course_id else [])
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    paths = [reverse("courses:list")] + ([reverse("courses:detail", kwargs={"pk": course_id})] if course_id else [])
+    public_cache.purge_later(paths)
+
+
+# -- warming ------------------------------------------------------------------
+
+def _outlines(course_ids: list[int]) -> dict[int, list[Lesson]]:
+    outlines = {course_id: [] for course_id in course_ids}
+    for lesson in _outline_query(course_ids):
+        outlines[lesson.course_id].append(lesson)
+    return outlines
+
+
+def warm_outlines(course_ids: list[int]) -> int:
+    outlines = _outlines(course_ids)
+    store_many({outline_key(course_id): lessons for course_id, lessons in outlines.items()})
+    return len(outlines)
+
+
+def warm_course_pages(course_ids: list[int]) -> int:
+    """Course page entries as `_build_page` makes them, in three queries per batch."""
+    courses = Course.objects.in_bulk(course_ids)
+    outlines = _outlines(course_ids)
+    recommendations = RecommendationService.for_courses(course_ids)
+    store_many({
+        page_key(course_id): {
+            "course": courses[course_id],
+            "lessons": outlines[course_id],
+            "recommendations": recommendations[course_id],
+        } if course_id in courses else None
+        for course_id in course_ids
+    })
+    return len(course_ids)
+
+
+def warm_lesson_bodies(lesson_ids: list[int]) -> int:
+    lessons = Lesson.objects.filter(pk__in=lesson_ids).exclude(content="").only("pk", "content", "updated_at")
+    bodies = {body_key(lesson): _render_body(lesson.content) for lesson in lessons}
+    store_many(bodies)
+    return len(bodies)
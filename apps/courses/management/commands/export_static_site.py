@@ -0,0 +1,209 @@
+"""
+Export the public catalog as plain HTML files any static server can serve.
+
+Renders course_list and every course_detail exactly as an anonymous
+visitor sees them into STATIC_SITE_ROOT (or --output):
+
+    static_site/
+        current -> 3f2a9c1b7d4e      symlink to the latest export
+        3f2a9c1b7d4e/                fingerprint of the pages' contents
+            manifest.json
+            index.html               /
+            12/index.html            /12/
+
+A static server pointed at `current` (nginx `root .../current;
+try_files $uri $uri/index.html`) serves marketing spikes without touching
+Django, and can stand in for the app while the database is down. CSS is
+referenced at STATIC_URL as usual, so serve `collectstatic` output next to
+it.
+
+Exports are incremental: each course page is stamped with the course's
+updated_at plus its lessons' latest updated_at and count (tombstoning
+bumps both), and pages whose stamp matches the previous export's manifest
+are hard-linked from it instead of rendered. The rest render in --workers
+forked processes. Since the directory is named after its contents, an
+unchanged catalog yields the same directory, and `current` switches
+atomically to a finished export only. Recommendations, templates and code
+are not in the stamps: pass --full after rebuilding recommendations or
+deploying template changes.
+
+Usage:
+    python manage.py export_static_site [--workers 4] [--full] [--output DIR]
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max, Q
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from apps.courses.models import Course, Lesson
+
+MANIFEST = "manifest.json"
+CURRENT = "current"
+
+
+def page_file(path: str) -> str:
+    """Where the page for URL `path` lives in an export: `/12/` -> `12/index.html`."""
+    return (path.strip("/") + "/index.html").lstrip("/")
+
+
+def render_page(path: str) -> bytes:
+    """The anonymous response body of GET `path`."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.public_cache = True  # no session: base.html skips the messages
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        raise CommandError(f"GET {path} returned {response.status_code}")
+    return response.content
+
+
+def render_pages(build_dir: str, paths: list[str]) -> dict[str, str]:
+    """Render `paths` into `build_dir`; returns {file: sha256}. Runs in the worker processes."""
+    try:
+        written = {}
+        for path in paths:
+            content = render_page(path)
+            target = Path(build_dir, page_file(path))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            written[page_file(path)] = hashlib.sha256(content).hexdigest()
+        return written
+    finally:
+        if multiprocessing.parent_process() is not None:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Render the anonymous catalog and course pages into a fingerprinted static directory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", type=Path, default=None, help="Defaults to STATIC_SITE_ROOT.")
+        parser.add_argument("--workers", type=int, default=4, help="Rendering processes; 1 renders in-process.")
+        parser.add_argument("--full", action="store_true", help="Re-render every page.")
+        parser.add_argument("--keep", type=int, default=3, help="Exports to keep, including the new one.")
+        parser.add_argument("--chunk-size", type=int, default=50, help="Pages per worker task.")
+
+    def handle(self, *args, output, workers, full, keep, chunk_size, **options):
+        root = Path(output or settings.STATIC_SITE_ROOT)
+        root.mkdir(parents=True, exist_ok=True)
+        previous_dir = root / CURRENT
+        previous = {} if full else self._manifest(previous_dir)
+
+        stamps = self._stamps()
+        list_path = reverse("courses:list")
+        course_paths = {pk: reverse("courses:detail", kwargs={"pk": pk}) for pk in stamps}
+        reuse = {
+            pk for pk, stamp in stamps.items()
+            if previous.get("courses", {}).get(str(pk)) == stamp
+            and page_file(course_paths[pk]) in previous.get("pages", {})
+        }
+
+        build_dir = root / f".build-{os.getpid()}"
+        shutil.rmtree(build_dir, ignore_errors=True)
+        build_dir.mkdir()
+        try:
+            pages = self._link_unchanged(previous_dir.resolve(), build_dir, previous["pages"], [
+                page_file(course_paths[pk]) for pk in reuse
+            ]) if reuse else {}
+            # The catalog lists every course: always rendered
+            render = [list_path] + [path for pk, path in course_paths.items() if pk not in reuse]
+            pages.update(self._render(build_dir, render, workers, chunk_size))
+
+            fingerprint = hashlib.sha256(json.dumps(sorted(pages.items())).encode()).hexdigest()[:12]
+            manifest = {"pages": pages, "courses": {str(pk): stamp for pk, stamp in stamps.items()}}
+            (build_dir / MANIFEST).write_text(json.dumps(manifest, indent=1, sort_keys=True))
+            export_dir = root / fingerprint
+            if export_dir.exists():
+                shutil.rmtree(build_dir)  # same contents as an earlier export
+                os.utime(export_dir)
+            else:
+                build_dir.rename(export_dir)
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+
+        link = root / f".{CURRENT}-{os.getpid()}"
+        link.unlink(missing_ok=True)
+        link.symlink_to(fingerprint)
+        os.replace(link, root / CURRENT)
+        pruned = self._prune(root, fingerprint, keep)
+
+        self.stdout.write(
+            f"{len(render):,} pages rendered, {len(reuse):,} reused; {pruned} old exports removed."
+        )
+        self.stdout.write(self.style.SUCCESS(f"Exported {len(pages):,} pages to {export_dir}."))
+
+    def _stamps(self) -> dict[int, str]:
+        """{course id: stamp} for every live course — two grouped queries."""
+        lessons = {
+            row["course_id"]: row for row in
+            Lesson.all_objects.filter(course__deleted_at__isnull=True).order_by().values("course_id").annotate(
+                changed=Max("updated_at"), live=Count("pk", filter=Q(deleted_at__isnull=True)),
+            )
+        }
+        stamps = {}
+        for pk, updated_at in Course.objects.values_list("pk", "updated_at"):
+            row = lessons.get(pk, {"changed": None, "live": 0})
+            changed = row["changed"].isoformat() if row["changed"] else "-"
+            stamps[pk] = f"{updated_at.isoformat()}|{changed}|{row['live']}"
+        return stamps
+
+    @staticmethod
+    def _manifest(export_dir: Path) -> dict:
+        try:
+            return json.loads((export_dir / MANIFEST).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _link_unchanged(source: Path, build_dir: Path, hashes: dict, files: list[str]) -> dict[str, str]:
+        """Hard-link (or copy) `files` from the previous export; returns their {file: sha256}."""
+        linked = {}
+        for name in files:
+            target = build_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source / name, target)
+            except OSError:
+                shutil.copy2(source / name, target)
+            linked[name] = hashes[name]
+        return linked
+
+    def _render(self, build_dir: Path, paths: list[str], workers: int, chunk_size: int) -> dict[str, str]:
+        chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        if workers <= 1 or len(chunks) <= 1:  # in this process: also sees an open transaction
+            return {name: sha for chunk in chunks for name, sha in render_pages(str(build_dir), chunk).items()}
+
+        # Forked workers inherit the loaded project; they must not share this process's connections
+        connections.close_all()
+        pages = {}
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+            for written in pool.map(render_pages, [str(build_dir)] * len(chunks), chunks):
+                pages.update(written)
+        return pages
+
+    @staticmethod
+    def _prune(root: Path, fingerprint: str, keep: int) -> int:
+        """Delete all but the newest `keep` exports (never the current one)."""
+        exports = sorted(
+            (entry for entry in root.iterdir()
+             if entry.is_dir() and not entry.is_symlink() and not entry.name.startswith(".")),
+            key=lambda entry: entry.stat().st_mtime, reverse=True,
+        )
+        old = [entry for entry in exports if entry.name != fingerprint][max(keep - 1, 0):]
+        for entry in old:
+            shutil.rmtree(entry, ignore_errors=True)
+        return len(old)
@@ -0,0 +1,37 @@
+"""
+Purge deleted courses and lessons in bounded batches.
+
+The staff delete actions only tombstone a course or lesson (it disappears
+from every page at once). This command then removes its enrollments,
+progress rows, recommendation rows and lessons by primary-key batches,
+each in its own short transaction, so no single statement holds locks on
+or loads a million rows. Safe to interrupt and re-run.
+
+Usage:
+    python manage.py purge_deleted
+    python manage.py purge_deleted --batch-size 5000 --sleep 0.1
+"""
+from django.core.management.base import BaseCommand
+
+from apps.courses.services import PURGE_BATCH_SIZE, CourseService
+
+
+class Command(BaseCommand):
+    help = "Delete tombstoned courses/lessons and their dependent rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument(
+            "--sleep", type=float, default=0.0,
+            help="Seconds to pause between batches to reduce lock pressure.",
+        )
+
+    def handle(self, *args, batch_size: int, sleep: float, **options):
+        self._progress = {}
+        total = CourseService.purge_deleted(batch_size=batch_size, sleep=sleep, report=self._report)
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} rows."))
+
+    def _report(self, obj, label: str, deleted: int) -> None:
+        key = (obj._meta.label, obj.pk, label)
+        self._progress[key] = self._progress.get(key, 0) + deleted
+        self.stdout.write(f"{obj._meta.model_name} {obj.pk}: {self._progress[key]} {label} rows deleted so far…")
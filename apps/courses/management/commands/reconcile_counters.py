@@ -0,0 +1,36 @@
+"""
+Repair drift in the denormalized Course.enrollment_count and lesson_count.
+
+The counters are updated in the same transaction as the rows they count,
+but writes that bypass the ORM paths (raw SQL, `generate_dataset`, an
+enrollment moved to another course in the admin, a bulk insert racing a
+single enroll) can leave them off. One grouped query finds the courses
+whose counters disagree with the tables; only those rows are rewritten.
+Cheap enough for a nightly cron.
+
+Usage:
+    python manage.py reconcile_counters [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.courses.services import CourseService
+
+SHOWN_FIXES = 20
+
+
+class Command(BaseCommand):
+    help = "Recount Course.enrollment_count and lesson_count and fix the ones that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, dry_run: bool, database: str, **options):
+        fixes = CourseService.reconcile_counters(dry_run=dry_run, using=database)
+        for pk, field, stored, actual in fixes[:SHOWN_FIXES]:
+            self.stdout.write(f"course {pk} {field}: {stored:,} → {actual:,}")
+        if len(fixes) > SHOWN_FIXES:
+            self.stdout.write(f"… and {len(fixes) - SHOWN_FIXES:,} more")
+        verb = "Would fix" if dry_run else "Fixed"
+        courses = len({pk for pk, *_ in fixes})
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(fixes):,} counters on {courses:,} courses."))
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Indexes suggested by `manage.py audit_queries` for the catalog and lesson outlines."""
+
+    dependencies = [
+        ("courses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["-created_at"], name="course_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(fields=["course", "order", "created_at"], name="lesson_course_order_create_idx"),
+        ),
+    ]
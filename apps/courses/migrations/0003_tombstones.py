@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Soft-delete tombstones for courses and lessons, purged later by `manage.py purge_deleted`."""
+
+    dependencies = [
+        ("courses", "0002_course_lesson_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)), fields=["deleted_at"], name="course_tombstone_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)), fields=["deleted_at"], name="lesson_tombstone_idx",
+            ),
+        ),
+    ]
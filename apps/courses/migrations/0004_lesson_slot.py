@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+def number_slots(apps, schema_editor):
+    """Number each course's lessons 0, 1, 2… in their current outline order."""
+    Lesson = apps.get_model("courses", "Lesson")
+    db = schema_editor.connection.alias
+    lessons = Lesson.objects.using(db).order_by("course_id", "order", "created_at", "id").only("id", "course_id")
+    batch, course_id, slot = [], None, 0
+    for lesson in lessons.iterator(chunk_size=2000):
+        slot = slot + 1 if lesson.course_id == course_id else 0
+        course_id = lesson.course_id
+        lesson.slot = slot
+        batch.append(lesson)
+        if len(batch) >= 2000:
+            Lesson.objects.using(db).bulk_update(batch, ["slot"])
+            batch = []
+    Lesson.objects.using(db).bulk_update(batch, ["slot"])
+
+
+class Migration(migrations.Migration):
+    """Stable per-course lesson slots for bitmap progress storage."""
+
+    dependencies = [
+        ("courses", "0003_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lesson",
+            name="slot",
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="lesson",
+            constraint=models.UniqueConstraint(fields=["course", "slot"], name="unique_lesson_course_slot"),
+        ),
+    ]
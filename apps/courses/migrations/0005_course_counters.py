@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_rows(apps, schema_editor):
+    """Fill both counters from one grouped query per counted table."""
+    Course = apps.get_model("courses", "Course")
+    Lesson = apps.get_model("courses", "Lesson")
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    db = schema_editor.connection.alias
+    lessons = dict(
+        Lesson.objects.using(db).filter(deleted_at__isnull=True).order_by().values("course_id")
+        .annotate(n=Count("pk")).values_list("course_id", "n")
+    )
+    enrollments = dict(
+        Enrollment.objects.using(db).order_by().values("course_id").annotate(n=Count("pk")).values_list("course_id", "n")
+    )
+    courses = list(Course.objects.using(db).only("id"))
+    for course in courses:
+        course.lesson_count = lessons.get(course.pk, 0)
+        course.enrollment_count = enrollments.get(course.pk, 0)
+    Course.objects.using(db).bulk_update(courses, ["lesson_count", "enrollment_count"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    """Denormalized enrollment and live-lesson counts on Course."""
+
+    dependencies = [
+        ("courses", "0004_lesson_slot"),
+        ("enrollments", "0004_backfill_resume_pointers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="enrollment_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="lesson_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
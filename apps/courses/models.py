@@ -1,16 +1,35 @@
 import re
 import urllib.parse
+from contextlib import nullcontext
 
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 
 
+class LiveManager(models.Manager):
+    """
+    Default manager: hides tombstoned rows.
+
+    Deleting a course or lesson only sets `deleted_at`; the rows and
+    everything that depends on them are removed later, in batches, by
+    `manage.py purge_deleted`. Use `all_objects` to see tombstoned rows.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Course(models.Model):
     """
     A course in the catalog.
 
     Separation of `short_description` (for list cards) and `description`
     (for detail page) avoids over-fetching on list queries.
+
+    `enrollment_count` and `lesson_count` (live lessons) are maintained
+    with F() updates by EnrollmentService, the Lesson signal handlers and
+    CourseService, so cards never count rows; `manage.py
+    reconcile_counters` repairs any drift.
     """
 
     title = models.CharField(max_length=255)
@@ -23,9 +42,23 @@ class Course(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    enrollment_count = models.IntegerField(default=0, editable=False)
+    lesson_count = models.IntegerField(default=0, editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Catalog / dashboard listing order — avoids a sort per page view
+            models.Index(fields=["-created_at"], name="course_created_idx"),
+            # Tiny partial index: only tombstones awaiting purge are in it
+            models.Index(
+                fields=["deleted_at"], condition=models.Q(deleted_at__isnull=False), name="course_tombstone_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -46,6 +79,11 @@ class Lesson(models.Model):
     Ordering:
     - `order` field for explicit manual ordering (default 0).
       Falls back to `created_at` when order values are equal.
+
+    `slot` is a small per-course number that never changes while the
+    lesson stays in its course (reordering does not touch it). Bitmap
+    progress storage keys visited lessons by it (see apps.progress.bitmap).
+    Assigned in save(); code that bulk-creates lessons must set it.
     """
 
     class VideoType(models.TextChoices):
@@ -79,9 +117,24 @@ class Lesson(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    slot = models.PositiveIntegerField(editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ["order", "created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["course", "slot"], name="unique_lesson_course_slot"),
+        ]
+        indexes = [
+            # A course's lesson outline comes straight off this index, already sorted
+            models.Index(fields=["course", "order", "created_at"], name="lesson_course_order_create_idx"),
+            models.Index(
+                fields=["deleted_at"], condition=models.Q(deleted_at__isnull=False), name="lesson_tombstone_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.course.title} — {self.title}"
@@ -121,11 +174,12 @@ class Lesson(models.Model):
         - rel=0       : don't show related videos from other channels after playback
         - modestbranding=1 : reduce YouTube logo prominence
         - origin      : security measure, tells YouTube our domain
+        - enablejsapi=1    : lets the lesson page read playback time for watch-time heartbeats
         """
         vid_id = self.youtube_video_id
         if not vid_id:
             return None
-        params = urllib.parse.urlencode({"rel": 0, "modestbranding": 1})
+        params = urllib.parse.urlencode({"rel": 0, "modestbranding": 1, "enablejsapi": 1})
         return f"https://www.youtube-nocookie.com/embed/{vid_id}?{params}"
 
     @staticmethod
@@ -137,7 +191,41 @@ class Lesson(models.Model):
             return Lesson.VideoType.YOUTUBE
         return Lesson.VideoType.DIRECT
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course_id = instance.__dict__.get("course_id")
+        return instance
+
+    @staticmethod
+    def next_slot(course_id: int) -> int:
+        """
+        One past the highest slot in the course, tombstoned lessons included.
+        Locks the course row first, so call it inside a transaction that
+        saves the lesson: concurrent creates and moves into one course then
+        take turns instead of picking the same slot.
+        """
+        list(Course.all_objects.select_for_update().filter(pk=course_id).values_list("pk"))
+        highest = Lesson.all_objects.filter(course_id=course_id).aggregate(m=models.Max("slot"))["m"]
+        return 0 if highest is None else highest + 1
+
     def save(self, *args, **kwargs) -> None:
-        """Auto-classify video_type before saving so it stays consistent."""
+        """
+        Auto-classify video_type before saving so it stays consistent, and
+        give a new or moved lesson the next free slot in its course. A move
+        leaves `moved_from = (old course id, old slot)` for the progress
+        signal handlers.
+        """
         self.video_type = self._classify_video_type(self.video_url)
-        super().save(*args, **kwargs)
+        loaded_course_id = getattr(self, "_loaded_course_id", None)
+        self.moved_from = None  # only the save that moves the lesson reports the move
+        moving = loaded_course_id is not None and loaded_course_id != self.course_id
+        if moving:
+            self.moved_from = (loaded_course_id, self.slot)
+        new_slot = moving or (self._state.adding and self.slot is None)
+        # The slot is picked and written in one transaction, under next_slot's course lock
+        with transaction.atomic() if new_slot else nullcontext():
+            if new_slot:
+                self.slot = self.next_slot(self.course_id)
+            super().save(*args, **kwargs)
+        self._loaded_course_id = self.course_id
@@ -0,0 +1,273 @@
+"""
+Course services.
+
+CatalogService: the course catalog query, with per-user badges.
+
+Anonymous visitors get the plain card columns. For a logged-in learner each
+card also needs "enrolled?" and a progress percentage; computing those per
+card from the template would cost two queries per course, so they are
+fetched for the whole page at once:
+
+1. Courses annotated with `is_enrolled` (EXISTS subquery on the
+   (user, course) unique index). Lesson totals are the maintained
+   `Course.lesson_count` column.
+2. Visited-lesson counts for the enrolled courses only, grouped by course,
+   from the (user, course, lesson) progress index.
+
+Progress is kept in its own query rather than a third subquery so the
+catalog never joins across the progress table.
+
+CourseService:
+- duplicate: copy a course and its lessons for a new term
+- tombstone / tombstone_lesson: the delete actions. They only hide the rows;
+  a cascade delete of a big course would load every enrollment and
+  progress row into memory inside the request.
+- purge_deleted: removes tombstoned rows and their dependents in bounded
+  batches, outside the request (`manage.py purge_deleted`). Progress rows
+  on shard databases (PROGRESS_SHARDS) are not CASCADE dependents and are
+  purged on every shard first.
+- bump_counter / reconcile_counters: the denormalized enrollment_count and
+  lesson_count on Course. Single-row writes are counted by the signal
+  handlers, bulk writes by the service doing them, always as one
+  `UPDATE ... SET n = n + delta`; reconcile_counters repairs drift. A
+  course being purged is not counted down (is_purging).
+"""
+import time
+from contextvars import ContextVar
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.enrollments.models import Enrollment
+from apps.progress.services import ProgressService
+from . import caching, typeahead
+from .models import Course, Lesson
+
+User = get_user_model()
+
+CARD_FIELDS = ("id", "title", "short_description", "created_at", "enrollment_count", "lesson_count")
+
+# Courses purge_deleted is deleting the dependents of right now
+_purging: ContextVar[frozenset] = ContextVar("purging_courses", default=frozenset())
+COPY_SUFFIX = " (copy)"
+PURGE_BATCH_SIZE = 1000
+LESSON_ORDER_STEP = 10  # same spacing the lesson form suggests
+
+
+class CatalogService:
+
+    @staticmethod
+    def courses():
+        """Catalog cards without per-user data — only the columns the cards show."""
+        return Course.objects.only(*CARD_FIELDS)
+
+    @classmethod
+    def cached_courses(cls) -> list[Course]:
+        """`courses()` from the shared cache (see caching.py) — the anonymous catalog."""
+        return caching.get_or_build("catalog", caching.CATALOG_KEY, lambda: list(cls.courses()))
+
+    @classmethod
+    def warm_cache(cls) -> int:
+        """Rebuild the cached catalog (`manage.py warm_caches`). Returns cards cached."""
+        courses = list(cls.courses())
+        caching.store_many({caching.CATALOG_KEY: courses})
+        return len(courses)
+
+    @classmethod
+    def annotated(cls, user: User):
+        """Catalog cards annotated with `is_enrolled`."""
+        return cls.courses().annotate(
+            is_enrolled=Exists(Enrollment.objects.filter(user=user, course=OuterRef("pk"))),
+        )
+
+    @classmethod
+    def courses_for(cls, user: User) -> list[Course]:
+        """
+        Catalog cards for `user`, each with `is_enrolled`, `visited_count`
+        and `progress_percent` set. Two queries in total.
+        """
+        courses = list(cls.annotated(user))
+        enrolled_ids = [course.pk for course in courses if course.is_enrolled]
+        visited = ProgressService.visited_counts(user, enrolled_ids) if enrolled_ids else {}
+        for course in courses:
+            course.visited_count = visited.get(course.pk, 0)
+            # Capped: progress on a deleted lesson counts until it is purged
+            course.progress_percent = (
+                min(100, round(100 * course.visited_count / course.lesson_count)) if course.lesson_count > 0 else 0
+            )
+        return courses
+
+
+class CourseService:
+
+    @staticmethod
+    @transaction.atomic
+    def duplicate(course: Course, title: str | None = None) -> Course:
+        """
+        Copy `course` and all of its lessons in one transaction.
+
+        Lessons are inserted with bulk_create, which skips Lesson.save(), so
+        `video_type` and `slot` are set here for every row up front. Lessons keep
+        their outline order, renumbered 10, 20, 30… — the copies all share
+        one created_at, so ties in `order` could no longer be broken by it.
+        Costs one SELECT and an INSERT per bulk batch, however many lessons.
+        """
+        if title is None:
+            title = course.title[: Course._meta.get_field("title").max_length - len(COPY_SUFFIX)] + COPY_SUFFIX
+        rows = list(course.lessons.values("title", "content", "video_url"))
+        # bulk_create sends no post_save: the lessons are counted and the typeahead bumped here
+        clone = Course.objects.create(
+            title=title,
+            short_description=course.short_description,
+            description=course.description,
+            lesson_count=len(rows),
+        )
+        lessons = [
+            Lesson(
+                course=clone,
+                title=lesson["title"],
+                content=lesson["content"],
+                order=position * LESSON_ORDER_STEP,
+                video_url=lesson["video_url"],
+                video_type=Lesson._classify_video_type(lesson["video_url"]),
+                slot=position - 1,
+            )
+            for position, lesson in enumerate(rows, start=1)
+        ]
+        Lesson.objects.bulk_create(lessons, batch_size=500)
+        transaction.on_commit(typeahead.bump)
+        caching.invalidate_course(clone.pk)
+        return clone
+
+    @staticmethod
+    @transaction.atomic
+    def tombstone(course: Course) -> None:
+        """Hide a course and its lessons at once. Two UPDATEs, however large the course."""
+        now = timezone.now()
+        Course.all_objects.filter(pk=course.pk).update(deleted_at=now, updated_at=now, lesson_count=0)
+        Lesson.all_objects.filter(course=course, deleted_at__isnull=True).update(deleted_at=now, updated_at=now)
+        course.deleted_at = now
+        transaction.on_commit(typeahead.bump)
+        caching.invalidate_course(course.pk)
+
+    @staticmethod
+    def tombstone_lesson(lesson: Lesson) -> None:
+        lesson.deleted_at = timezone.now()
+        with transaction.atomic():
+            hidden = Lesson.all_objects.filter(pk=lesson.pk, deleted_at__isnull=True).update(
+                deleted_at=lesson.deleted_at, updated_at=lesson.deleted_at,
+            )
+            CourseService.bump_counter(lesson.course_id, "lesson_count", -hidden)
+            # Resume links must not lead to a hidden lesson
+            Enrollment.objects.filter(last_lesson=lesson).update(last_lesson=None)
+            Enrollment.objects.filter(next_lesson=lesson).update(next_lesson=None)
+            transaction.on_commit(typeahead.bump)
+            caching.invalidate_course(lesson.course_id)
+
+    @staticmethod
+    def bump_counter(course: Course | int, field: str, delta: int) -> None:
+        """Add `delta` to a counter column of `course` in one UPDATE, without reading it."""
+        if delta:
+            Course.all_objects.filter(pk=getattr(course, "pk", course)).update(**{field: F(field) + delta})
+
+    @staticmethod
+    def reconcile_counters(dry_run: bool = False, using: str = "default") -> list[tuple[int, str, int, int]]:
+        """
+        Recount enrollment_count and lesson_count of every course and fix the
+        ones that drifted. Returns (course id, field, stored, actual) per fix.
+
+        One query finds the drifted courses (a grouped COUNT per table,
+        correlated to Course). Fixes are written as `UPDATE ... SET n =
+        (SELECT COUNT(*) ...)`, so increments committed meanwhile are kept.
+        """
+        def count(rows):
+            grouped = rows.filter(course=OuterRef("pk")).order_by().values("course").annotate(n=Count("pk"))
+            return Coalesce(Subquery(grouped.values("n"), output_field=IntegerField()), 0)
+
+        counts = {
+            "enrollment_count": count(Enrollment.objects.using(using)),
+            "lesson_count": count(Lesson.objects.using(using)),  # live lessons only
+        }
+        drifted = (
+            Course.all_objects.using(using)
+            .annotate(actual_enrollments=counts["enrollment_count"], actual_lessons=counts["lesson_count"])
+            .exclude(enrollment_count=F("actual_enrollments"), lesson_count=F("actual_lessons"))
+            .values_list("pk", "enrollment_count", "actual_enrollments", "lesson_count", "actual_lessons")
+        )
+        fixes = []
+        for pk, enrollments, actual_enrollments, lessons, actual_lessons in drifted:
+            if enrollments != actual_enrollments:
+                fixes.append((pk, "enrollment_count", enrollments, actual_enrollments))
+            if lessons != actual_lessons:
+                fixes.append((pk, "lesson_count", lessons, actual_lessons))
+        if fixes and not dry_run:
+            Course.all_objects.using(using).filter(pk__in={pk for pk, *_ in fixes}).update(**counts)
+        return fixes
+
+    @staticmethod
+    def _purge(obj: models.Model, batch_size: int, sleep: float, report) -> int:
+        """
+        Delete everything that CASCADEs from `obj`, then `obj` itself.
+
+        Each dependent table is emptied by primary-key batches, each batch
+        its own short transaction. Tables other dependents point at go
+        last (LessonProgress before Lesson), so no batch delete ever has
+        to cascade into a large table.
+        """
+        relations = [rel for rel in obj._meta.related_objects if rel.on_delete is models.CASCADE]
+        dependents = {rel.related_model for rel in relations}
+
+        def referenced(rel) -> bool:
+            return any(
+                field.related_model is rel.related_model
+                for other in dependents if other is not rel.related_model
+                for field in other._meta.concrete_fields if field.is_relation
+            )
+
+        total = 0
+        for rel in sorted(relations, key=referenced):
+            manager = rel.related_model._base_manager
+            pending = manager.filter(**{rel.field.name: obj}).values_list("pk", flat=True)
+            while pks := list(pending[:batch_size]):
+                deleted, _ = manager.filter(pk__in=pks).delete()
+                total += deleted
+                if report:
+                    report(obj, rel.related_model._meta.label, deleted)
+                if sleep:
+                    time.sleep(sleep)
+        obj.delete()
+        return total + 1
+
+    @classmethod
+    def purge_deleted(cls, batch_size: int = PURGE_BATCH_SIZE, sleep: float = 0.0, report=None) -> int:
+        """
+        Purge every tombstoned lesson and course. Returns rows deleted.
+        `report(obj, model_label, deleted)` is called after each batch.
+        """
+        total = 0
+        # Lessons of a deleted course go with their course
+        for lesson in Lesson.all_objects.filter(deleted_at__isnull=False, course__deleted_at__isnull=True):
+            ProgressService.forget_lesson(lesson)
+            total += ProgressService.purge_shards(batch_size, report and partial(report, lesson), lesson=lesson)
+            total += cls._purge(lesson, batch_size, sleep, report)
+        for course in Course.all_objects.filter(deleted_at__isnull=False):
+            total += ProgressService.purge_shards(batch_size, report and partial(report, course), course=course)
+            token = _purging.set(_purging.get() | {course.pk})
+            try:
+                total += cls._purge(course, batch_size, sleep, report)
+            finally:
+                _purging.reset(token)
+        return total
+
+    @staticmethod
+    def is_purging(course_id: int) -> bool:
+        """
+        True while purge_deleted deletes this course's dependents. Its
+        counters go with the row, so per-row signal handlers skip them
+        instead of sending one UPDATE per deleted enrollment.
+        """
+        return course_id in _purging.get()
@@ -0,0 +1,63 @@
+"""
+After a Course or Lesson write:
+- bump the typeahead index version (see typeahead.py). The bump waits for
+  the commit, so a worker that reacts to it can already read the new rows.
+- drop the cached catalog and course outline (see caching.py), including
+  the outline of the course a lesson is moved out of.
+- keep Course.lesson_count in step with live lessons created, moved and
+  deleted one at a time. Tombstoned lessons were already uncounted by
+  CourseService.tombstone_lesson; bulk writes count themselves.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, typeahead
+from .models import Course, Lesson
+from .services import CourseService
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def bump_typeahead_version(sender, raw: bool = False, **kwargs):
+    if not raw:
+        transaction.on_commit(typeahead.bump)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def drop_cached_course(sender, instance: Course, **kwargs):
+    caching.invalidate_course(instance.pk)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def drop_cached_outline(sender, instance: Lesson, **kwargs):
+    caching.invalidate_course(instance.course_id)
+
+
+@receiver(pre_save, sender=Lesson)
+def drop_cached_outline_on_move(sender, instance: Lesson, **kwargs):
+    moved_from = getattr(instance, "moved_from", None)  # set by Lesson.save()
+    if moved_from:
+        caching.invalidate_course(moved_from[0])
+
+
+@receiver(post_save, sender=Lesson)
+def count_saved_lesson(sender, instance: Lesson, created: bool, raw: bool = False, **kwargs):
+    if raw or instance.deleted_at is not None:
+        return
+    moved_from = getattr(instance, "moved_from", None)
+    if created:
+        CourseService.bump_counter(instance.course_id, "lesson_count", 1)
+    elif moved_from:
+        CourseService.bump_counter(moved_from[0], "lesson_count", -1)
+        CourseService.bump_counter(instance.course_id, "lesson_count", 1)
+
+
+@receiver(post_delete, sender=Lesson)
+def count_deleted_lesson(sender, instance: Lesson, **kwargs):
+    if instance.deleted_at is None:
+        CourseService.bump_counter(instance.course_id, "lesson_count", -1)
@@ -0,0 +1,16 @@
+from apps.core import public_cache
+from apps.jobs.models import Job
+from apps.jobs.registry import task
+from .services import CourseService
+
+
+@task(priority=Job.Priority.LOW)
+def purge_deleted():
+    """Purge tombstoned courses/lessons — queued by the delete actions."""
+    CourseService.purge_deleted()
+
+
+@task(priority=Job.Priority.HIGH, max_attempts=5)
+def purge_public_pages(paths: list[str]):
+    """Evict changed catalog/course pages from the shared HTTP caches — queued by course and lesson writes."""
+    public_cache.purge(paths)
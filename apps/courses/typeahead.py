@@ -0,0 +1,223 @@
+"""
+Typeahead over course and lesson titles, from an in-process prefix index.
+
+Every word start of every live title becomes a key ("intro to django" is
+indexed as "intro to django", "to django" and "django"), held in one
+sorted list of (key, ref) pairs. A query is a bisect to the first key >=
+the typed prefix and a bounded forward scan: no database query per
+keystroke, a few microseconds per lookup.
+
+Per worker process:
+- Built lazily on the first query, never at import (gunicorn --preload
+  would otherwise build it once in the master and fork a stale copy).
+- Course/Lesson writes bump a version number in the shared cache after
+  commit (signals.py; CourseService calls bump() for bulk writes that skip
+  signals). A worker compares versions at most once per
+  TYPEAHEAD_CHECK_INTERVAL seconds and, when it moved, re-reads only rows
+  whose `updated_at` is newer than its last sync and patches them in.
+  Tombstoning sets `updated_at`, so deletes arrive the same way.
+- Memory is bounded: keys are cut to KEY_LENGTH characters, a title
+  contributes at most MAX_WORDS keys and the index holds at most
+  TYPEAHEAD_MAX_ENTRIES keys. Courses are indexed first; lessons past the
+  cap are left out of suggestions.
+
+Titles are normalised (accents stripped, casefolded, punctuation dropped)
+so "Café Déjà-vu" is found by "cafe deja".
+"""
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Course, Lesson
+
+VERSION_KEY = "typeahead:version"
+KEY_LENGTH = 40
+MAX_WORDS = 8
+SCAN_LIMIT = 200  # index entries looked at per query, whatever the prefix
+# Re-read rows a little older than the last sync: a transaction that was
+# still open when we synced commits rows stamped before the sync started.
+SYNC_OVERLAP = timedelta(seconds=60)
+REBUILD_THRESHOLD = 2000  # changed rows beyond which a full rebuild is cheaper
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_WORD_RE.findall(text.casefold()))
+
+
+def title_keys(title: str) -> tuple[str, ...]:
+    words = normalize(title).split(" ")
+    return tuple(" ".join(words[i:])[:KEY_LENGTH] for i in range(min(len(words), MAX_WORDS)) if words[i])
+
+
+def bump() -> None:
+    """Tell every worker that course or lesson titles changed."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+# refs pack the kind into the low bit: courses are even, lessons odd
+def _course_ref(pk: int) -> int:
+    return pk * 2
+
+
+def _lesson_ref(pk: int) -> int:
+    return pk * 2 + 1
+
+
+class PrefixIndex:
+    """One worker's index. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.entries: list[tuple[str, int]] | None = None  # sorted (key, ref)
+        # ref → (title, course_id, keys); course_id is None for courses
+        self.docs: dict[int, tuple[str, int | None, tuple[str, ...]]] = {}
+        self.version = None
+        self.synced_at = None
+        self._next_check = 0.0
+
+    # -- maintenance --------------------------------------------------------
+
+    def _add(self, ref: int, title: str, course_id: int | None) -> None:
+        keys = title_keys(title)
+        if course_id is not None and len(self.entries) + len(keys) > settings.TYPEAHEAD_MAX_ENTRIES:
+            return
+        self.docs[ref] = (title, course_id, keys)
+        for key in keys:
+            bisect.insort(self.entries, (key, ref))
+
+    def _remove(self, ref: int) -> None:
+        doc = self.docs.pop(ref, None)
+        if doc is None:
+            return
+        for key in doc[2]:
+            i = bisect.bisect_left(self.entries, (key, ref))
+            if i < len(self.entries) and self.entries[i] == (key, ref):
+                del self.entries[i]
+
+    def _rebuild(self) -> None:
+        started = timezone.now()
+        docs, entries = {}, []
+        limit = settings.TYPEAHEAD_MAX_ENTRIES
+        for pk, title in Course.objects.order_by().values_list("pk", "title").iterator():
+            keys = title_keys(title)
+            docs[_course_ref(pk)] = (title, None, keys)
+            entries.extend((key, _course_ref(pk)) for key in keys)
+        lessons = Lesson.objects.filter(course__deleted_at__isnull=True).order_by().values_list(
+            "pk", "course_id", "title",
+        )
+        for pk, course_id, title in lessons.iterator():
+            keys = title_keys(title)
+            if len(entries) + len(keys) > limit:
+                break
+            docs[_lesson_ref(pk)] = (title, course_id, keys)
+            entries.extend((key, _lesson_ref(pk)) for key in keys)
+        entries.sort()
+        self.entries, self.docs, self.synced_at = entries, docs, started
+
+    def _sync(self) -> None:
+        """Patch in rows changed since the last sync; fall back to a rebuild if there are many."""
+        since = self.synced_at - SYNC_OVERLAP
+        started = timezone.now()
+        courses = list(
+            Course.all_objects.filter(updated_at__gte=since).values_list("pk", "title", "deleted_at")[
+                :REBUILD_THRESHOLD
+            ]
+        )
+        lessons = list(
+            Lesson.all_objects.filter(updated_at__gte=since).values_list(
+                "pk", "course_id", "title", "deleted_at", "course__deleted_at",
+            )[:REBUILD_THRESHOLD]
+        )
+        if len(courses) + len(lessons) >= REBUILD_THRESHOLD:
+            self._rebuild()
+            return
+        for pk, title, deleted_at in courses:
+            self._remove(_course_ref(pk))
+            if deleted_at is None:
+                self._add(_course_ref(pk), title, None)
+        for pk, course_id, title, deleted_at, course_deleted_at in lessons:
+            self._remove(_lesson_ref(pk))
+            if deleted_at is None and course_deleted_at is None:
+                self._add(_lesson_ref(pk), title, course_id)
+        self.synced_at = started
+
+    def refresh(self) -> None:
+        """Build on first use; afterwards catch up when the shared version moved."""
+        now = time.monotonic()
+        if self.entries is not None and now < self._next_check:
+            return
+        with self._lock:
+            if self.entries is not None and now < self._next_check:
+                return
+            self._next_check = now + settings.TYPEAHEAD_CHECK_INTERVAL
+            version = cache.get(VERSION_KEY, 0)  # read first: a bump during the sync triggers another
+            if self.entries is None:
+                self._rebuild()
+            elif version != self.version:
+                self._sync()
+            self.version = version
+
+    # -- queries --------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 8) -> list[dict]:
+        """
+        Up to `limit` suggestions for the prefix `query`: courses before
+        lessons, matches at the start of a title first, then shorter
+        titles. Only the first SCAN_LIMIT matching keys are considered.
+        """
+        prefix = normalize(query)[:KEY_LENGTH]
+        if not prefix:
+            return []
+        self.refresh()
+        with self._lock:
+            entries, docs = self.entries, self.docs
+            i = bisect.bisect_left(entries, (prefix,))
+            ranked = {}
+            for key, ref in entries[i:i + SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                title, course_id, keys = docs[ref]
+                rank = (ref & 1, keys.index(key), len(title), title)
+                if ref not in ranked or rank < ranked[ref]:
+                    ranked[ref] = rank
+            best = sorted(ranked, key=ranked.get)[:limit]
+            rows = [(ref, *docs[ref][:2]) for ref in best]
+            course_titles = {
+                course_id: docs.get(_course_ref(course_id), ("",))[0] for _, _, course_id in rows if course_id
+            }
+        results = []
+        for ref, title, course_id in rows:
+            if ref & 1:
+                pk = ref // 2
+                results.append({
+                    "type": "lesson", "id": pk, "title": title, "course_title": course_titles[course_id],
+                    "url": reverse("courses:lesson_detail", kwargs={"course_pk": course_id, "pk": pk}),
+                })
+            else:
+                results.append({
+                    "type": "course", "id": ref // 2, "title": title,
+                    "url": reverse("courses:detail", kwargs={"pk": ref // 2}),
+                })
+        return results
+
+
+index = PrefixIndex()
+search = index.search
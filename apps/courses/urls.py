@@ -18,6 +18,8 @@ urlpatterns = [
     path("manage/courses/<int:pk>/", views.manage_course_detail, name="manage_course_detail"),
     path("manage/courses/<int:pk>/edit/", views.manage_course_edit, name="manage_course_edit"),
     path("manage/courses/<int:pk>/delete/", views.manage_course_delete, name="manage_course_delete"),
+    path("manage/courses/<int:pk>/duplicate/", views.manage_course_duplicate, name="manage_course_duplicate"),
+    path("manage/courses/<int:pk>/progress.csv", views.manage_course_progress_export, name="manage_course_progress_export"),
 
     # Lesson CRUD  (nested under course for clean URLs)
     path("manage/courses/<int:course_pk>/lessons/create/", views.manage_lesson_create, name="manage_lesson_create"),
@@ -1,43 +1,61 @@
+import csv
+
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from apps.core.public_cache import public_when_anonymous
 from apps.enrollments.services import EnrollmentService
 from apps.progress.services import ProgressService
+from apps.recommendations.services import RecommendationService
+from . import caching
 from .forms import CourseForm, LessonForm
+from .services import CatalogService, CourseService
+from .tasks import purge_deleted
 from .models import Course, Lesson
 
+User = get_user_model()
+
 
 # ---------------------------------------------------------------------------
 # Public / student views
 # ---------------------------------------------------------------------------
 
+@public_when_anonymous
 def course_list(request):
-    """Public course catalog — only fetch columns needed for cards."""
-    courses = Course.objects.only("id", "title", "short_description", "created_at")
+    """
+    Public course catalog. Logged-in users also get enrollment/progress
+    badges, fetched for the whole page in two queries (see CatalogService);
+    anonymous visitors get the cached cards.
+    """
+    if request.user.is_authenticated:
+        courses = CatalogService.courses_for(request.user)
+    else:
+        courses = CatalogService.cached_courses()
     return render(request, "courses/course_list.html", {"courses": courses})
 
 
+@public_when_anonymous
 def course_detail(request, pk: int):
-    """Course detail with enrollment-status awareness. Prefetches lessons."""
-    course = get_object_or_404(
-        Course.objects.prefetch_related("lessons"),
-        pk=pk,
-    )
+    """
+    Course detail with enrollment-status awareness. The course, its lessons
+    and recommendations come from the course page cache; only the
+    enrollment is per request.
+    """
+    page = caching.course_page(pk)
+    if page is None:
+        raise Http404("No course matches the given query.")
 
-    is_enrolled = False
-    if request.user.is_authenticated:
-        is_enrolled = EnrollmentService.is_enrolled(user=request.user, course=course)
+    # The enrollment row carries the resume pointers — one query for both
+    enrollment = EnrollmentService.get_enrollment(user=request.user, course=page["course"])
 
     return render(
         request,
         "courses/course_detail.html",
-        {
-            "course": course,
-            "lessons": course.lessons.all(),
-            "is_enrolled": is_enrolled,
-        },
+        {**page, "is_enrolled": enrollment is not None, "enrollment": enrollment},
     )
 
 
@@ -56,10 +74,10 @@ def lesson_detail(request, course_pk: int, pk: int):
     if not EnrollmentService.is_enrolled(user=request.user, course=lesson.course):
         return redirect("courses:detail", pk=course_pk)
 
-    ProgressService.mark_visited(user=request.user, lesson=lesson)
-
-    all_lessons = lesson.course.lessons.all()
-    visited_ids = ProgressService.get_visited_ids(user=request.user, course=lesson.course)
+    all_lessons = caching.outline(lesson.course_id)
+    visited_ids = ProgressService.get_visited_ids(user=request.user, course=lesson.course, lessons=all_lessons)
+    ProgressService.mark_visited(user=request.user, lesson=lesson, lessons=all_lessons, visited_ids=visited_ids)
+    visited_ids.add(lesson.pk)
     return render(
         request,
         "courses/lesson_detail.html",
@@ -68,21 +86,23 @@ def lesson_detail(request, course_pk: int, pk: int):
             "course": lesson.course,
             "all_lessons": all_lessons,
             "visited_ids": visited_ids,
+            "lesson_body": caching.lesson_body(lesson),
         },
     )
 
 
 @login_required
 def my_courses(request):
-    """Courses the current user is enrolled in."""
-    from apps.enrollments.models import Enrollment
-
-    enrollments = (
-        Enrollment.objects.filter(user=request.user)
-        .select_related("course")
-        .order_by("-enrolled_at")
+    """Courses the current user is enrolled in, each with its resume link."""
+    enrollments = list(
+        EnrollmentService.user_enrollments(request.user).select_related("course", "last_lesson", "next_lesson")
+    )
+    recommendations = RecommendationService.for_user(e.course_id for e in enrollments)
+    return render(
+        request,
+        "courses/my_courses.html",
+        {"enrollments": enrollments, "recommendations": recommendations},
     )
-    return render(request, "courses/my_courses.html", {"enrollments": enrollments})
 
 
 # ---------------------------------------------------------------------------
@@ -94,7 +114,7 @@ def my_courses(request):
 @staff_member_required
 def manage_dashboard(request):
     """Staff landing page — list all courses with quick links."""
-    courses = Course.objects.prefetch_related("lessons").order_by("-created_at")
+    courses = Course.objects.order_by("-created_at")
     return render(request, "courses/manage/dashboard.html", {"courses": courses})
 
 
@@ -115,9 +135,10 @@ def manage_course_create(request):
 
 @staff_member_required
 def manage_course_detail(request, pk: int):
-    """Staff course view: shows lessons and links to edit/add."""
+    """Staff course view: shows lessons, links to edit/add, and how far learners get (one row read)."""
     course = get_object_or_404(Course.objects.prefetch_related("lessons"), pk=pk)
-    return render(request, "courses/manage/course_detail.html", {"course": course})
+    distribution = ProgressService.distribution(course, list(course.lessons.all()))
+    return render(request, "courses/manage/course_detail.html", {"course": course, "distribution": distribution})
 
 
 @staff_member_required
@@ -142,13 +163,46 @@ def manage_course_edit(request, pk: int):
 def manage_course_delete(request, pk: int):
     course = get_object_or_404(Course, pk=pk)
     if request.method == "POST":
-        title = course.title
-        course.delete()
-        messages.success(request, f'Course "{title}" deleted.')
+        # Hidden now; lessons, enrollments and progress are purged in batches
+        # by a background job, never inside this request.
+        CourseService.tombstone(course)
+        purge_deleted.enqueue(unique=True)
+        messages.success(request, f'Course "{course.title}" deleted.')
         return redirect("courses:manage_dashboard")
     return render(request, "courses/manage/course_confirm_delete.html", {"course": course})
 
 
+@staff_member_required
+def manage_course_duplicate(request, pk: int):
+    """POST-only: copy the course and all its lessons, then open the copy."""
+    course = get_object_or_404(Course, pk=pk)
+    if request.method != "POST":
+        return redirect("courses:manage_course_detail", pk=course.pk)
+    clone = CourseService.duplicate(course)
+    messages.success(request, f'Course duplicated as "{clone.title}".')
+    return redirect("courses:manage_course_detail", pk=clone.pk)
+
+
+
+@staff_member_required
+def manage_course_progress_export(request, pk: int):
+    """CSV of every learner's progress in the course (read from all progress shards)."""
+    course = get_object_or_404(Course, pk=pk)
+    rows = ProgressService.course_export(course)
+    usernames = dict(User.objects.filter(pk__in={row[0] for row in rows}).values_list("pk", "username"))
+    titles = dict(Lesson.objects.filter(course=course).values_list("pk", "title"))
+    response = HttpResponse(content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="course-{course.pk}-progress.csv"'
+    writer = csv.writer(response)
+    writer.writerow(["user_id", "username", "lesson_id", "lesson", "last_visited_at", "watch_time_seconds", "completed"])
+    for user_id, lesson_id, visited_at, watched, completed in rows:
+        writer.writerow([
+            user_id, usernames.get(user_id, ""), lesson_id, titles[lesson_id],
+            visited_at.isoformat() if visited_at else "", watched, int(completed),
+        ])
+    return response
+
+
 # --- Lesson CRUD ---
 
 @staff_member_required
@@ -198,9 +252,9 @@ def manage_lesson_delete(request, course_pk: int, pk: int):
     lesson = get_object_or_404(Lesson, pk=pk, course_id=course_pk)
     course = lesson.course
     if request.method == "POST":
-        title = lesson.title
-        lesson.delete()
-        messages.success(request, f'Lesson "{title}" deleted.')
+        CourseService.tombstone_lesson(lesson)
+        purge_deleted.enqueue(unique=True)
+        messages.success(request, f'Lesson "{lesson.title}" deleted.')
         return redirect("courses:manage_course_detail", pk=course.pk)
     return render(
         request,
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Index suggested by `manage.py audit_queries` for the My Courses list."""
+
+    dependencies = [
+        ("enrollments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(fields=["user", "-enrolled_at"], name="enroll_user_enrolled_idx"),
+        ),
+    ]
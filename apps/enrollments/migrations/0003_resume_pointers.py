@@ -0,0 +1,28 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0003_tombstones"),
+        ("enrollments", "0002_enrollment_user_enrolled_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_lesson",
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="courses.lesson"),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_visited_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="next_lesson",
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="courses.lesson"),
+        ),
+    ]
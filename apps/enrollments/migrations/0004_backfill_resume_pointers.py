@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from django.db import migrations, transaction
+from django.db.models import Max
+
+BATCH_SIZE = 2_000
+
+
+def next_unvisited(lesson_ids, visited_ids, after):
+    # Frozen copy of apps.progress.services.next_unvisited
+    start = lesson_ids.index(after) + 1 if after in lesson_ids else 0
+    for lesson_id in lesson_ids[start:] + lesson_ids[:start]:
+        if lesson_id not in visited_ids:
+            return lesson_id
+    return None
+
+
+def backfill_pointers(apps, schema_editor):
+    """
+    Set the resume pointers from existing progress rows, one enrollment
+    primary-key range at a time, each batch in its own transaction.
+    """
+    Enrollment = apps.get_model("enrollments", "Enrollment")
+    LessonProgress = apps.get_model("progress", "LessonProgress")
+    Lesson = apps.get_model("courses", "Lesson")
+    db = schema_editor.connection.alias
+
+    last_pk = Enrollment.objects.using(db).aggregate(m=Max("pk"))["m"] or 0
+    for start in range(0, last_pk + 1, BATCH_SIZE):
+        with transaction.atomic(using=db):
+            enrollments = list(Enrollment.objects.using(db).filter(pk__gte=start, pk__lt=start + BATCH_SIZE))
+            if not enrollments:
+                continue
+            user_ids = {e.user_id for e in enrollments}
+            course_ids = {e.course_id for e in enrollments}
+
+            outline = defaultdict(list)
+            for course_id, lesson_id in (
+                Lesson.objects.using(db).filter(course_id__in=course_ids, deleted_at__isnull=True)
+                .order_by("course_id", "order", "created_at").values_list("course_id", "id")
+            ):
+                outline[course_id].append(lesson_id)
+
+            visited = defaultdict(set)
+            latest = {}
+            for user_id, course_id, lesson_id, visited_at in (
+                LessonProgress.objects.using(db).filter(user_id__in=user_ids, course_id__in=course_ids)
+                .values_list("user_id", "course_id", "lesson_id", "last_visited_at")
+            ):
+                key = (user_id, course_id)
+                visited[key].add(lesson_id)
+                if key not in latest or visited_at > latest[key][1]:
+                    latest[key] = (lesson_id, visited_at)
+
+            changed = []
+            for enrollment in enrollments:
+                key = (enrollment.user_id, enrollment.course_id)
+                if key not in latest:
+                    continue
+                enrollment.last_lesson_id, enrollment.last_visited_at = latest[key]
+                enrollment.next_lesson_id = next_unvisited(
+                    outline[enrollment.course_id], visited[key], enrollment.last_lesson_id,
+                )
+                changed.append(enrollment)
+            Enrollment.objects.using(db).bulk_update(
+                changed, ["last_lesson", "next_lesson", "last_visited_at"], batch_size=500,
+            )
+
+
+class Migration(migrations.Migration):
+    """Batched backfill of the resume pointers added in 0003."""
+
+    atomic = False
+
+    dependencies = [
+        ("enrollments", "0003_resume_pointers"),
+        ("progress", "0005_lessonprogress_course_not_null"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_pointers, migrations.RunPython.noop),
+    ]
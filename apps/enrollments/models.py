@@ -1,7 +1,7 @@
 from django.conf import settings
 from django.db import models
 
-from apps.courses.models import Course
+from apps.courses.models import Course, Lesson
 
 
 class Enrollment(models.Model):
@@ -9,6 +9,13 @@ class Enrollment(models.Model):
     Records that a user has enrolled in a course.
 
     The unique_together constraint makes enrollments idempotent at the DB level.
+
+    `last_lesson` / `next_lesson` are the "continue where you left off"
+    pointers: the lesson visited most recently and the first unvisited
+    lesson after it (wrapping to the start; null once every lesson has been
+    visited). ProgressService.mark_visited keeps them current in the same
+    transaction as the visit, so My Courses and the course page read them
+    with the enrollment row instead of sorting LessonProgress.
     """
 
     user = models.ForeignKey(
@@ -22,6 +29,23 @@ class Enrollment(models.Model):
         related_name="enrollments",
     )
     enrolled_at = models.DateTimeField(auto_now_add=True)
+    last_lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
+    next_lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
+    last_visited_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         constraints = [
@@ -30,6 +54,10 @@ class Enrollment(models.Model):
                 name="unique_user_course_enrollment",
             )
         ]
+        indexes = [
+            # My Courses: WHERE user_id=? ORDER BY enrolled_at DESC
+            models.Index(fields=["user", "-enrolled_at"], name="enroll_user_enrolled_idx"),
+        ]
         ordering = ["-enrolled_at"]
 
     def __str__(self) -> str:
@@ -5,14 +5,39 @@ Keeping logic out of views and models means:
 - Easy to unit test without HTTP request/response cycle
 - Can be reused by REST API views, management commands, Celery tasks
 - Single place to add future rules (e.g. prerequisites, capacity limits)
+
+The set of course ids a user is enrolled in is cached (enrolled_course_ids)
+for the per-lesson access check; signals.py drops it on every enrollment
+change, and bulk enrollment drops it explicitly. Course.enrollment_count
+is kept the same way: signals.py counts single rows, enroll_users its
+bulk insert.
 """
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
 
+from apps.core import metrics
+from apps.core.caching import get_or_build, store_many
 from apps.courses.models import Course
+from apps.courses.services import CourseService
 from .models import Enrollment
 
 User = get_user_model()
 
+ENROLLED_KEY = "enrollments:{}"
+
+
+def enrolled_key(user_id: int) -> str:
+    return ENROLLED_KEY.format(user_id)
+
+
+def invalidate_enrolled(user_ids) -> None:
+    """Drop the cached enrollment sets now and once the current transaction commits."""
+    keys = [enrolled_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
 
 class EnrollmentService:
 
@@ -26,11 +51,91 @@ class EnrollmentService:
             user=user,
             course=course,
         )
+        if created:
+            metrics.inc("mooc_enrollments_total")
         return enrollment, created
 
     @staticmethod
-    def is_enrolled(user: User, course: Course) -> bool:
+    def enroll_users(course: Course, user_ids) -> int:
+        """
+        Enroll many users at once; existing enrollments are left alone.
+
+        Returns the number of enrollments this call inserted, which is also
+        what mooc_enrollments_total and Course.enrollment_count are bumped
+        by. The insert is all-or-nothing in a savepoint: if a concurrent
+        enroll() took one of the users first, it is rolled back, the
+        course's enrollments of `user_ids` are re-selected and the rest
+        inserted again, so a row counted by enroll() is never counted here.
+        """
+        user_ids = set(user_ids)
+
+        def enrolled() -> set[int]:
+            return set(Enrollment.objects.filter(course=course, user_id__in=user_ids).values_list("user_id", flat=True))
+
+        with transaction.atomic():
+            existing = enrolled()
+            while True:
+                try:
+                    with transaction.atomic():
+                        created = Enrollment.objects.bulk_create(
+                            [Enrollment(user_id=user_id, course=course) for user_id in sorted(user_ids - existing)],
+                            batch_size=1000,
+                        )
+                    break
+                except IntegrityError:
+                    taken = enrolled()
+                    if taken == existing:  # not a concurrent enrollment
+                        raise
+                    existing = taken
+            invalidate_enrolled(enrollment.user_id for enrollment in created)
+            # bulk_create sends no post_save, so the counter is bumped here
+            CourseService.bump_counter(course, "enrollment_count", len(created))
+        metrics.inc("mooc_enrollments_total", value=len(created))
+        return len(created)
+
+    @staticmethod
+    def enroll_users_later(course: Course, user_ids) -> None:
+        """Queue enroll_users as a background job — for imports too big for a request."""
+        from .tasks import enroll_users
+        enroll_users.enqueue(course_id=course.pk, user_ids=sorted(set(user_ids)))
+
+    @staticmethod
+    def is_enrolled(user: User, course: Course | int) -> bool:
         """Check enrollment status — used in templates and guards."""
         if not user.is_authenticated:
             return False
-        return Enrollment.objects.filter(user=user, course=course).exists()
+        return getattr(course, "pk", course) in EnrollmentService.enrolled_course_ids(user)
+
+    @staticmethod
+    def enrolled_course_ids(user: User) -> frozenset[int]:
+        """Ids of every course `user` is enrolled in, from the shared cache."""
+        return get_or_build("enrollments", enrolled_key(user.pk), lambda: frozenset(
+            Enrollment.objects.filter(user=user).values_list("course_id", flat=True)
+        ))
+
+    @staticmethod
+    def warm_enrolled_course_ids(user_ids: list[int]) -> int:
+        """Cache the enrollment sets of `user_ids` in one query (see `manage.py warm_caches`)."""
+        sets = {user_id: set() for user_id in user_ids}
+        for user_id, course_id in Enrollment.objects.filter(user_id__in=user_ids).values_list("user_id", "course_id"):
+            sets[user_id].add(course_id)
+        store_many({enrolled_key(user_id): frozenset(ids) for user_id, ids in sets.items()})
+        return len(sets)
+
+    @staticmethod
+    def get_enrollment(user: User, course: Course) -> Enrollment | None:
+        """The user's enrollment in `course` with its resume lessons, or None."""
+        if not user.is_authenticated:
+            return None
+        return (
+            Enrollment.objects.select_related("last_lesson", "next_lesson")
+            .filter(user=user, course=course).first()
+        )
+
+    @staticmethod
+    def user_enrollments(user: User) -> QuerySet[Enrollment]:
+        """
+        A user's enrollments in live (not deleted) courses, newest first.
+        Callers add select_related/values as needed.
+        """
+        return Enrollment.objects.filter(user=user, course__deleted_at__isnull=True).order_by("-enrolled_at")
@@ -0,0 +1,44 @@
+"""
+Drop a user's cached enrollment set (see EnrollmentService) when one of
+their enrollments changes, and when a user is created: a reused primary
+key must not inherit a deleted user's set.
+
+Course.enrollment_count follows enrollments saved and deleted one at a
+time, including those a deleted user takes with them; enroll_users counts
+its bulk insert itself, and a purged course's enrollments are not counted
+down at all (the course row is deleted right after them). Enrollment
+changes do not drop the cached catalog or purge public pages, so the
+learner counts on catalog cards lag by up to CONTENT_CACHE_TIMEOUT (plus
+PUBLIC_CACHE_SECONDS behind a shared HTTP cache).
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.courses.services import CourseService
+from .models import Enrollment
+from .services import invalidate_enrolled
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def drop_cached_enrollments(sender, instance: Enrollment, **kwargs):
+    invalidate_enrolled([instance.user_id])
+
+
+@receiver(post_save, sender=Enrollment)
+def count_new_enrollment(sender, instance: Enrollment, created: bool, raw: bool = False, **kwargs):
+    if created and not raw:
+        CourseService.bump_counter(instance.course_id, "enrollment_count", 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance: Enrollment, **kwargs):
+    if not CourseService.is_purging(instance.course_id):
+        CourseService.bump_counter(instance.course_id, "enrollment_count", -1)
+
+
+@receiver(post_save, sender=get_user_model())
+def drop_cached_enrollments_of_new_user(sender, instance, created: bool, **kwargs):
+    if created:
+        invalidate_enrolled([instance.pk])
@@ -0,0 +1,10 @@
+from apps.courses.models import Course
+from apps.jobs.registry import task
+from .services import EnrollmentService
+
+
+@task
+def enroll_users(course_id: int, user_ids: list[int]):
+    """Bulk enrollment (e.g. a cohort import), run by EnrollmentService.enroll_users_later."""
+    course = Course.objects.get(pk=course_id)
+    EnrollmentService.enroll_users(course, user_ids)
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "status", "priority", "attempts", "run_at", "created_at", "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("task",)
+    readonly_fields = ("attempts", "locked_by", "locked_at", "last_error", "created_at", "finished_at")
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    """Database-backed background jobs: the queue, the worker and task registry."""
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.jobs"
+    label = "jobs"
+
+    def ready(self):
+        # Register every app's tasks.py so workers and enqueuers agree on names
+        autodiscover_modules("tasks")
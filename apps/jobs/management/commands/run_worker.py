@@ -0,0 +1,70 @@
+"""
+Run background jobs from the database queue.
+
+Start as many workers as you like (one per container/process); they
+coordinate through the jobs table only. SIGTERM/SIGINT finish the current
+job, then exit.
+
+Usage:
+    python manage.py run_worker
+    python manage.py run_worker --burst          # exit once the queue is empty
+    python manage.py run_worker --max-jobs 500   # recycle the process periodically
+"""
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.jobs.services import JobService
+
+HOUSEKEEPING_INTERVAL = 60  # seconds between stale-job/prune sweeps
+
+
+class Command(BaseCommand):
+    help = "Process background jobs from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--burst", action="store_true", help="Exit when no job is ready.")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs (0 = no limit).")
+
+    def handle(self, *args, burst: bool, max_jobs: int, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Worker {worker} started.")
+
+        processed = 0
+        next_housekeeping = 0.0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() >= next_housekeeping:
+                requeued, pruned = JobService.requeue_stale(), JobService.prune()
+                if requeued or pruned:
+                    self.stdout.write(f"Re-queued {requeued} stale job(s), pruned {pruned} old job(s).")
+                next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+
+            job = JobService.claim(worker)
+            if job is None:
+                if burst:
+                    break
+                time.sleep(settings.JOBS_POLL_INTERVAL)
+                continue
+
+            start = time.perf_counter()
+            ok = JobService.run(job)
+            elapsed = time.perf_counter() - start
+            outcome = self.style.SUCCESS("done") if ok else self.style.ERROR(f"{job.status} (attempt {job.attempts})")
+            self.stdout.write(f"#{job.pk} {job.task} {outcome} in {elapsed:.2f}s")
+
+            processed += 1
+            if max_jobs and processed >= max_jobs:
+                break
+        self.stdout.write(f"Worker {worker} stopped after {processed} job(s).")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
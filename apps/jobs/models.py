@@ -0,0 +1,59 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    One unit of background work: a registered task name plus JSON kwargs.
+
+    Lifecycle: queued → running → done, or back to queued with a later
+    `run_at` after a failure (exponential backoff) until `max_attempts`
+    is reached, then failed. A running job's worker renews `locked_at`
+    while it works; a worker that dies mid-job leaves it running with a
+    stale `locked_at`, and the next worker re-queues it.
+
+    `unique_key` is set for jobs enqueued with `unique=True`, and at most
+    one queued job may hold a given key (a partial unique index).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    class Priority(models.IntegerChoices):
+        LOW = -10, "Low"
+        NORMAL = 0, "Normal"
+        HIGH = 10, "High"
+
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=Priority.NORMAL, help_text="Higher runs first.")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time.")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    unique_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unique_key"], condition=models.Q(status="queued"), name="job_unique_queued",
+            ),
+        ]
+        indexes = [
+            # The claim query walks this in order; only queued jobs are in it
+            models.Index(
+                fields=["-priority", "run_at", "id"], condition=models.Q(status="queued"), name="job_claim_idx",
+            ),
+            models.Index(fields=["status", "-created_at"], name="job_status_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.task} [{self.status}]"
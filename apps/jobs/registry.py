@@ -0,0 +1,56 @@
+"""
+Task registry.
+
+Apps declare background tasks in their own `tasks.py` (auto-imported at
+startup) with the `task` decorator, which adds an `.enqueue(**kwargs)`
+helper to the function:
+
+    # apps/courses/tasks.py
+    from apps.jobs.registry import task
+
+    @task(priority=Job.Priority.LOW)
+    def purge_deleted():
+        ...
+
+    purge_deleted.enqueue()
+
+kwargs must be JSON-serialisable — pass ids, not model instances.
+"""
+from apps.jobs.models import Job
+
+_tasks: dict[str, "Task"] = {}
+
+
+class Task:
+    def __init__(self, func, name: str, priority: int, max_attempts: int):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, priority: int | None = None, delay: float = 0, unique: bool = False, **kwargs) -> Job | None:
+        from .services import JobService
+        return JobService.enqueue(
+            self.name, kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts, delay=delay, unique=unique,
+        )
+
+
+def task(func=None, *, name: str | None = None, priority: int = Job.Priority.NORMAL, max_attempts: int = 3):
+    def register(func):
+        task_name = name or f"{func.__module__.removeprefix('apps.')}.{func.__name__}"
+        _tasks[task_name] = Task(func, task_name, priority, max_attempts)
+        return _tasks[task_name]
+    return register(func) if func is not None else register
+
+
+def get_task(name: str) -> Task:
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f"No task registered as {name!r}") from None
@@ -0,0 +1,213 @@
+"""
+JobService: enqueueing, claiming and finishing background jobs.
+
+Claiming:
+- PostgreSQL: `SELECT ... FOR UPDATE SKIP LOCKED LIMIT 1` on the queued
+  partial index, so concurrent workers never wait on each other and never
+  get the same job.
+- Databases without SKIP LOCKED (SQLite): pick the next candidate, then
+  claim it with a compare-and-set `UPDATE ... WHERE status = 'queued'`;
+  a worker that loses the race simply tries the next candidate. SQLite
+  serialises writers, so this is race-free.
+
+Failures are retried with exponential backoff (JOBS_RETRY_BACKOFF *
+2**(attempt-1) seconds, plus jitter) until `max_attempts`.
+
+Leases: while `run` executes a job, a background thread renews its
+`locked_at` every JOBS_LEASE_SECONDS / 3, so `requeue_stale` only puts back
+jobs whose worker stopped renewing (it died or hung). A job can still run
+twice if a worker is stalled for longer than the lease, so tasks should
+stay idempotent.
+
+Unique jobs (`enqueue(unique=True)`) carry a hash of their task and kwargs
+in `unique_key`; a partial unique index allows one queued job per key, so
+concurrent enqueues cannot both add one.
+"""
+import hashlib
+import json
+import logging
+import random
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_task
+
+CLAIM_CANDIDATES = 5
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_key(task: str, kwargs: dict) -> str:
+    return hashlib.sha256(json.dumps([task, kwargs], sort_keys=True).encode()).hexdigest()
+
+
+@contextmanager
+def _lease_renewed(job: Job):
+    """Renew `job`'s lease from a background thread until the block exits."""
+    stop = threading.Event()
+
+    def renew():
+        try:
+            while not stop.wait(settings.JOBS_LEASE_SECONDS / 3):
+                try:
+                    if not JobService.renew_lease(job):
+                        return  # no longer ours (re-queued or finished elsewhere)
+                except DatabaseError:
+                    logger.exception("Could not renew the lease of job %s; retrying", job.pk)
+        finally:
+            connection.close()  # this thread's connection
+
+    thread = threading.Thread(target=renew, name=f"job-{job.pk}-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+class JobService:
+
+    @staticmethod
+    def enqueue(task: str, kwargs: dict | None = None, priority: int = Job.Priority.NORMAL,
+                max_attempts: int = 3, delay: float = 0, unique: bool = False) -> Job | None:
+        """
+        Queue `task` to run with `kwargs`. With `unique=True` nothing is added
+        (and None is returned) if an identical job is already queued.
+        """
+        get_task(task)  # fail fast on typos, in the caller rather than the worker
+        kwargs = kwargs or {}
+        job = Job(
+            task=task, kwargs=kwargs, priority=priority, max_attempts=max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            unique_key=_unique_key(task, kwargs) if unique else None,
+        )
+        try:
+            with transaction.atomic():  # a savepoint, so a duplicate leaves the caller's transaction usable
+                job.save(force_insert=True)
+        except IntegrityError:
+            if not unique:
+                raise
+            return None
+        return job
+
+    @staticmethod
+    def _ready():
+        return Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=timezone.now()).order_by(
+            "-priority", "run_at", "id",
+        )
+
+    @classmethod
+    def claim(cls, worker: str) -> Job | None:
+        """Atomically take the highest-priority ready job, or return None."""
+        now = timezone.now()
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job = cls._ready().select_for_update(skip_locked=True).first()
+                if job is None:
+                    return None
+                job.status = Job.Status.RUNNING
+                job.locked_by, job.locked_at = worker, now
+                job.attempts += 1
+                job.save(update_fields=["status", "locked_by", "locked_at", "attempts"])
+                return job
+
+        while candidates := list(cls._ready().values_list("pk", flat=True)[:CLAIM_CANDIDATES]):
+            for pk in candidates:
+                claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+                    status=Job.Status.RUNNING, locked_by=worker, locked_at=now, attempts=F("attempts") + 1,
+                )
+                if claimed:
+                    return Job.objects.get(pk=pk)
+        return None
+
+    @staticmethod
+    def run(job: Job) -> bool:
+        """Execute a claimed job and record the outcome. Returns True on success."""
+        try:
+            with _lease_renewed(job):
+                get_task(job.task)(**job.kwargs)
+        except Exception:
+            JobService.fail(job, traceback.format_exc())
+            return False
+        job.status = Job.Status.DONE
+        job.finished_at = timezone.now()
+        job.last_error = ""
+        job.save(update_fields=["status", "finished_at", "last_error"])
+        return True
+
+    @staticmethod
+    def renew_lease(job: Job) -> bool:
+        """Push back the lease of a job this worker is running. False if the job is no longer its."""
+        return bool(Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by).update(
+            locked_at=timezone.now(),
+        ))
+
+    @staticmethod
+    def fail(job: Job, error: str) -> None:
+        job.last_error = error[-5000:]
+        job.locked_by, job.locked_at = "", None
+        fields = ["status", "run_at", "last_error", "locked_by", "locked_at", "finished_at"]
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            job.status = Job.Status.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=delay * random.uniform(1, 1.25))
+            try:
+                with transaction.atomic():
+                    job.save(update_fields=fields)
+                return
+            except IntegrityError:  # an identical unique job was queued meanwhile: that one will run
+                job.last_error = f"Superseded by an identical queued job.\n{job.last_error}"[:5000]
+        job.status = Job.Status.FAILED
+        job.finished_at = timezone.now()
+        job.save(update_fields=fields)
+
+    @staticmethod
+    def retry(job: Job) -> None:
+        """Staff retry of a failed job: one more attempt, right away (unless an identical unique job is queued)."""
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk, status=Job.Status.FAILED).update(
+                    status=Job.Status.QUEUED, run_at=timezone.now(), max_attempts=job.attempts + 1, finished_at=None,
+                )
+        except IntegrityError:
+            pass
+
+    @staticmethod
+    def requeue_stale() -> int:
+        """
+        Put back jobs whose worker died mid-run: their lease was not renewed
+        for JOBS_LEASE_SECONDS. They count as an attempt.
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LEASE_SECONDS)
+        stale = list(Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff))
+        for job in stale:
+            JobService.fail(
+                job, f"Worker {job.locked_by} stopped renewing its lease for {settings.JOBS_LEASE_SECONDS}s.",
+            )
+        return len(stale)
+
+    @staticmethod
+    def prune(batch_size: int = 1000) -> int:
+        """Delete finished jobs older than JOBS_KEEP_DAYS, in batches."""
+        cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_DAYS)
+        finished = Job.objects.filter(
+            status__in=[Job.Status.DONE, Job.Status.FAILED], finished_at__lt=cutoff,
+        ).values_list("pk", flat=True)
+        total = 0
+        while pks := list(finished[:batch_size]):
+            total += Job.objects.filter(pk__in=pks).delete()[0]
+        return total
+
+    @staticmethod
+    def status_counts() -> dict[str, int]:
+        counts = dict(Job.objects.order_by().values("status").annotate(n=Count("pk")).values_list("status", "n"))
+        return {status: counts.get(status, 0) for status in Job.Status.values}
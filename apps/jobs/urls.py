@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = "jobs"
+
+urlpatterns = [
+    path("", views.job_status, name="status"),
+    path("<int:pk>/retry/", views.job_retry, name="retry"),
+]
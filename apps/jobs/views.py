@@ -0,0 +1,32 @@
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+
+from .models import Job
+from .services import JobService
+
+RECENT_JOBS = 50
+
+
+@staff_member_required
+def job_status(request):
+    """Queue overview: counts per status, plus the most recent jobs (optionally one status)."""
+    status = request.GET.get("status")
+    jobs = Job.objects.order_by("-created_at")
+    if status in Job.Status.values:
+        jobs = jobs.filter(status=status)
+    return render(
+        request,
+        "jobs/status.html",
+        {"counts": JobService.status_counts(), "jobs": jobs[:RECENT_JOBS], "status": status},
+    )
+
+
+@staff_member_required
+@require_POST
+def job_retry(request, pk: int):
+    job = get_object_or_404(Job, pk=pk, status=Job.Status.FAILED)
+    JobService.retry(job)
+    messages.success(request, f"Job #{job.pk} re-queued.")
+    return redirect("jobs:status")
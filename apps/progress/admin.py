@@ -4,8 +4,11 @@ from .models import LessonProgress
 
 @admin.register(LessonProgress)
 class LessonProgressAdmin(admin.ModelAdmin):
-    list_display = ("user", "lesson", "first_visited_at", "last_visited_at")
-    list_filter = ("lesson__course",)
+    list_display = ("user", "lesson", "watch_time_seconds", "completed", "first_visited_at", "last_visited_at")
+    list_filter = ("course", "completed")
     search_fields = ("user__username", "lesson__title")
     raw_id_fields = ("user", "lesson")
-    readonly_fields = ("first_visited_at", "last_visited_at")
+    readonly_fields = (
+        "first_visited_at", "last_visited_at",
+        "watched_intervals", "watch_time_seconds", "video_duration_seconds", "completed",
+    )
@@ -5,3 +5,6 @@ class ProgressConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.progress"
     label = "progress"
+
+    def ready(self):
+        from . import signals  # noqa: F401
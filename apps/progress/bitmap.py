@@ -0,0 +1,56 @@
+"""
+Bitmap encoding of visited lessons (PROGRESS_STORAGE="bitmap").
+
+A learner's visits in a course are a set of `Lesson.slot` numbers, stored
+as bits of signed 64-bit words in CourseProgress: bit `slot % 63` of word
+`slot // 63`. Bit 63 is left unused so every word stays a non-negative
+bigint and `bits | mask` never overflows. Courses up to 63 lessons —
+nearly all of them — need one row per (user, course).
+
+In Python the words are joined into one int, so "visited?" is a shift and
+an AND and the visited count is `int.bit_count()`.
+"""
+from collections.abc import Iterable
+
+WORD_BITS = 63
+
+
+def locate(slot: int) -> tuple[int, int]:
+    """(word, mask) of the bit for `slot`."""
+    word, bit = divmod(slot, WORD_BITS)
+    return word, 1 << bit
+
+
+def join(words: Iterable[tuple[int, int]]) -> int:
+    """One int from (word, bits) pairs."""
+    bitmap = 0
+    for word, bits in words:
+        bitmap |= bits << (word * WORD_BITS)
+    return bitmap
+
+
+def split(bitmap: int) -> dict[int, int]:
+    """The non-empty words of `bitmap`, as {word: bits}."""
+    words, word = {}, 0
+    while bitmap:
+        bits = bitmap & ((1 << WORD_BITS) - 1)
+        if bits:
+            words[word] = bits
+        bitmap >>= WORD_BITS
+        word += 1
+    return words
+
+
+def has(bitmap: int, slot: int) -> bool:
+    return bool(bitmap >> slot & 1)
+
+
+def slots(bitmap: int) -> list[int]:
+    """The set bits of `bitmap`, lowest first."""
+    found, slot = [], 0
+    while bitmap:
+        if bitmap & 1:
+            found.append(slot)
+        bitmap >>= 1
+        slot += 1
+    return found
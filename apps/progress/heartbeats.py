@@ -0,0 +1,116 @@
+"""
+Server-side coalescing of video watch-time heartbeats.
+
+The lesson player POSTs batches of watched `[start, end]` intervals every
+few seconds. Writing each batch straight to `LessonProgress` would multiply
+write load, so each worker process keeps a small in-memory buffer keyed by
+(user_id, lesson_id), merges overlapping intervals as they arrive, and
+flushes the compact result in one bulk write when it is due.
+
+There is no timer: a buffer is only checked when a heartbeat reaches the
+same worker (and flushed at a graceful exit). HEARTBEAT_FLUSH_INTERVAL is
+the minimum age of a buffer before that check flushes it, not a period, so
+a worker that stops receiving heartbeats holds its last intervals until the
+next one arrives or it exits. A worker that is killed (not gracefully
+stopped) loses whatever it holds. Visits themselves are still recorded
+synchronously by `ProgressService.mark_visited`.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+
+# Gaps shorter than this (seconds) are treated as continuous playback, which
+# absorbs timer jitter between player time updates.
+MERGE_TOLERANCE = 1.0
+
+
+def merge_intervals(intervals, tolerance: float = MERGE_TOLERANCE) -> list[list[float]]:
+    """Sort and merge overlapping/adjacent `[start, end]` pairs."""
+    merged: list[list[float]] = []
+    for start, end in sorted((float(s), float(e)) for s, e in intervals if e > s):
+        if merged and start <= merged[-1][1] + tolerance:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def coverage_seconds(intervals) -> float:
+    """Total seconds covered by already-merged intervals."""
+    return sum(end - start for start, end in intervals)
+
+
+def is_completed(intervals, duration: int | None) -> bool:
+    """A lesson video counts as completed once enough of it has been watched."""
+    if not duration:
+        return False
+    return coverage_seconds(intervals) >= duration * settings.LESSON_COMPLETION_RATIO
+
+
+class HeartbeatBuffer:
+    """
+    Per-process buffer of pending watch intervals.
+
+    Thread-safe so it also works under threaded gunicorn workers. The flush
+    itself is delegated to `ProgressService.record_watch_batch`, which keeps
+    all persistence rules in the service layer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[int, int], dict] = {}
+        self._last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: int, lesson_id: int, course_id: int, intervals,
+            duration: int | None = None) -> None:
+        key = (user_id, lesson_id)
+        with self._lock:
+            entry = self._pending.setdefault(
+                key, {"course_id": course_id, "intervals": [], "duration": None},
+            )
+            entry["intervals"] = merge_intervals(entry["intervals"] + list(intervals))
+            if duration:
+                entry["duration"] = duration
+
+    def due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            len(self._pending) >= settings.HEARTBEAT_MAX_PENDING_KEYS
+            or time.monotonic() - self._last_flush >= settings.HEARTBEAT_FLUSH_INTERVAL
+        )
+
+    def flush(self) -> int:
+        """Write all pending intervals. Returns the number of (user, lesson) pairs written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        from .services import ProgressService
+
+        try:
+            ProgressService.record_watch_batch(pending)
+        except Exception:
+            # Put the data back so the next flush retries it
+            for (user_id, lesson_id), entry in pending.items():
+                self.add(user_id, lesson_id, entry["course_id"], entry["intervals"], entry["duration"])
+            raise
+        return len(pending)
+
+
+heartbeat_buffer = HeartbeatBuffer()
+
+
+@atexit.register
+def _flush_on_exit() -> None:
+    try:
+        heartbeat_buffer.flush()
+    except Exception:
+        pass
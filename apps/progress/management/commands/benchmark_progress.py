@@ -0,0 +1,124 @@
+"""
+Compare the two progress storage formats on synthetic data.
+
+Builds one course with --lessons lessons and --users learners who each
+visit a random --visit-ratio share of it, writes every visit in both
+formats, then reads each learner's visited set back. Reports rows and
+bytes per format, table plus indexes (PostgreSQL: pg_total_relation_size,
+so whole 8 kB pages; SQLite: used bytes from the dbstat table, when
+compiled in) and per-call write/read latency.
+
+Everything runs in one transaction on "default" that is rolled back at
+the end, so it is safe on a real database — but run it off-peak: the
+writes take the same locks real visits do. Progress sharding is switched
+off for the run, so the rows never reach a shard.
+
+Usage:
+    python manage.py benchmark_progress --users 500 --lessons 60
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import override_settings
+
+from apps.courses.models import Course, Lesson
+from apps.progress.models import CourseProgress, LessonProgress
+from apps.progress.services import ProgressService
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def table_bytes(model) -> int | None:
+    """Size of the model's table plus its indexes, or None if the database can't tell."""
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SELECT pg_total_relation_size(%s)", [table])
+            elif connection.vendor == "sqlite":
+                cursor.execute(
+                    "SELECT SUM(pgsize - unused) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name = %s)", [table],
+                )
+            else:
+                return None
+            return cursor.fetchone()[0] or 0
+    except DatabaseError:
+        return None
+
+
+def summary(samples: list[float]) -> str:
+    micros = sorted(s * 1e6 for s in samples)
+    p95 = micros[min(len(micros) - 1, int(len(micros) * 0.95))]
+    return f"{statistics.fmean(micros):8.0f} µs mean {p95:8.0f} µs p95"
+
+
+class Command(BaseCommand):
+    help = "Benchmark row-per-lesson vs bitmap progress storage (rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--lessons", type=int, default=60)
+        parser.add_argument("--visit-ratio", type=float, default=0.7, help="Share of lessons each learner visits.")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, users: int, lessons: int, visit_ratio: float, seed: int, **options):
+        rng = random.Random(seed)
+        try:
+            with override_settings(PROGRESS_SHARDS=[]), transaction.atomic():
+                self._run(rng, users, lessons, visit_ratio)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, rng, user_count, lesson_count, visit_ratio):
+        course = Course.objects.create(title="Benchmark", short_description="-", description="-")
+        outline = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f"L{i}", order=i, slot=i) for i in range(lesson_count)
+        )
+        tag = f"{rng.getrandbits(32):08x}"
+        users = User.objects.bulk_create(
+            User(username=f"progress-bench-{tag}-{i}", password="!") for i in range(user_count)
+        )
+        visits = [(user, lesson) for user in users for lesson in rng.sample(outline, round(lesson_count * visit_ratio))]
+        rng.shuffle(visits)
+        self.stdout.write(f"{user_count:,} learners × {lesson_count} lessons, {len(visits):,} visits\n")
+
+        before = {model: table_bytes(model) for model in (LessonProgress, CourseProgress)}
+        results = {}
+        for name, model, write, read in (
+            ("rows", LessonProgress,
+             lambda user, lesson: ProgressService._mark_row(user, lesson),
+             lambda user: set(LessonProgress.objects.filter(user=user, course=course).values_list("lesson_id", flat=True))),
+            ("bitmap", CourseProgress,
+             lambda user, lesson: ProgressService._set_visited_bit(user.pk, course.pk, lesson.slot),
+             lambda user: ProgressService._visited_from_bitmap(user, course, outline)),
+        ):
+            writes = []
+            for user, lesson in visits:
+                start = time.perf_counter()
+                write(user, lesson)
+                writes.append(time.perf_counter() - start)
+            reads = []
+            for user in users:
+                start = time.perf_counter()
+                read(user)
+                reads.append(time.perf_counter() - start)
+            rows = model.objects.filter(course=course).count()
+            size = table_bytes(model)
+            grown = size - before[model] if size is not None and before[model] is not None else None
+            results[name] = (rows, grown, writes, reads)
+
+        for name, (rows, grown, writes, reads) in results.items():
+            size = f"{grown:,} bytes ({grown / len(visits):.1f}/visit)" if grown is not None else "size n/a"
+            self.stdout.write(f"{name:7} {rows:>9,} rows  {size}")
+            self.stdout.write(f"        write {summary(writes)}   read {summary(reads)}")
+        self.stdout.write("(rolled back)")
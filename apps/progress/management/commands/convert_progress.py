@@ -0,0 +1,49 @@
+"""
+Move lesson visits between the two progress storage formats.
+
+    rows    one LessonProgress row per (user, lesson)
+    bitmap  one CourseProgress row per (user, course), a bit per lesson slot
+
+Both directions only ever add visits (bits are OR-ed in, rows inserted
+with ignore-conflicts), by primary-key batches in short transactions, so
+the command is safe to interrupt and re-run, and to run while the site
+is up. Convert first, then switch PROGRESS_STORAGE and restart; a second
+run afterwards picks up visits recorded in between.
+
+`--prune` (rows → bitmap only) deletes the converted rows that hold no
+watch-time data; rows with heartbeat data stay, since watch time is only
+ever stored in LessonProgress.
+
+Usage:
+    python manage.py convert_progress --to bitmap [--prune]
+    python manage.py convert_progress --to rows
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.progress.services import ProgressService
+
+
+class Command(BaseCommand):
+    help = "Convert lesson visits between row-per-lesson and bitmap storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", choices=["bitmap", "rows"], required=True)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prune", action="store_true",
+            help="After converting to bitmap, delete LessonProgress rows without watch-time data.",
+        )
+
+    def handle(self, *args, to: str, batch_size: int, prune: bool, **options):
+        if prune and to != "bitmap":
+            raise CommandError("--prune only applies to --to bitmap.")
+        if to == "bitmap":
+            total = ProgressService.rows_to_bitmap(batch_size=batch_size, prune=prune, report=self._report)
+            self.stdout.write(self.style.SUCCESS(f"Merged {total:,} LessonProgress rows into bitmaps."))
+        else:
+            total = ProgressService.bitmap_to_rows(batch_size=batch_size, report=self._report)
+            self.stdout.write(self.style.SUCCESS(f"Inserted {total:,} LessonProgress rows."))
+        self.stdout.write(f"Set PROGRESS_STORAGE={to} and restart to read and write the new format.")
+
+    def _report(self, total: int) -> None:
+        self.stdout.write(f"{total:,} rows so far…")
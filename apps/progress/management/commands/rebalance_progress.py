@@ -0,0 +1,46 @@
+"""
+Move progress rows to the shard their user hashes to.
+
+Run after changing PROGRESS_SHARDS:
+- turning sharding on: moves every row out of "default"
+- adding a shard: moves the ~1/N of users jump hashing reassigns
+- removing a shard: keep its DATABASES entry and pass it with --drain
+
+Rows are copied and then deleted by primary-key batches, so the command is
+safe to interrupt, re-run and run while the site is up (with the new
+PROGRESS_SHARDS already deployed, so new writes land on the right shard).
+
+Usage:
+    python manage.py rebalance_progress [--dry-run] [--drain progress_3]
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.progress.services import ProgressService
+
+
+class Command(BaseCommand):
+    help = "Move progress rows onto the shard their user belongs to."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Count the rows that would move.")
+        parser.add_argument(
+            "--drain", action="append", default=[], metavar="ALIAS",
+            help="Also empty this database (a shard being retired). Repeatable.",
+        )
+
+    def handle(self, *args, batch_size: int, dry_run: bool, drain: list[str], **options):
+        unknown = [alias for alias in drain if alias not in settings.DATABASES]
+        if unknown:
+            raise CommandError(f"Unknown database alias: {', '.join(unknown)}")
+        sources = list(dict.fromkeys([DEFAULT_DB_ALIAS, *settings.PROGRESS_SHARDS, *drain]))
+        moved = ProgressService.rebalance(sources, batch_size=batch_size, dry_run=dry_run, report=self._report)
+        verb = "Would move" if dry_run else "Moved"
+        for (source, target), count in sorted(moved.items()):
+            self.stdout.write(f"{source} → {target}: {count:,} rows")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(moved.values()):,} rows."))
+
+    def _report(self, source: str, label: str, moved: dict) -> None:
+        self.stdout.write(f"{source} {label}: {sum(moved.values()):,} rows so far…")
@@ -0,0 +1,29 @@
+"""
+Rebuild every course's progress distribution exactly.
+
+ProgressService.mark_visited keeps ProgressDistribution current one first
+visit at a time; deleted users, purged lessons and moved lessons are not
+subtracted there. This recount corrects that drift — run it nightly from
+cron, and once after `generate_dataset` or `convert_progress`.
+
+Usage:
+    python manage.py recompute_progress_distribution [--course 12 ...]
+"""
+from django.core.management.base import BaseCommand
+
+from apps.courses.models import Course
+from apps.progress.services import ProgressService
+
+
+class Command(BaseCommand):
+    help = "Recount the per-course progress distributions shown on the staff course page."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, action="append", default=[], help="Only this course. Repeatable.")
+
+    def handle(self, *args, course: list[int], **options):
+        courses = Course.objects.filter(pk__in=course) if course else Course.objects.all()
+        courses = list(courses.only("pk"))
+        for item in courses:
+            ProgressService.recompute_distribution(item)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed the progress distribution of {len(courses):,} courses."))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("progress", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="watched_intervals",
+            field=models.JSONField(blank=True, default=list, help_text="Merged [start, end] second ranges of the video the user has watched."),
+        ),
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="watch_time_seconds",
+            field=models.PositiveIntegerField(default=0, help_text="Seconds of the video covered by watched_intervals (rewatches count once)."),
+        ),
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="video_duration_seconds",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="completed",
+            field=models.BooleanField(default=False),
+        ),
+    ]
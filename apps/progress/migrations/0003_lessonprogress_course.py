@@ -0,0 +1,25 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Step 1 of 3: add the denormalized column as nullable (no table rewrite)."""
+
+    dependencies = [
+        ("courses", "0001_initial"),
+        ("progress", "0002_lessonprogress_watch_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lessonprogress",
+            name="course",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="progress_records",
+                to="courses.course",
+            ),
+        ),
+    ]
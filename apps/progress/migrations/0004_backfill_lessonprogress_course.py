@@ -0,0 +1,40 @@
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 10_000
+
+
+def backfill_course(apps, schema_editor):
+    """
+    Copy lesson.course_id onto each progress row, one primary-key range at a
+    time. Each batch commits on its own, so locks are short-lived and an
+    interrupted run can simply be restarted.
+    """
+    LessonProgress = apps.get_model("progress", "LessonProgress")
+    Lesson = apps.get_model("courses", "Lesson")
+    db = schema_editor.connection.alias
+
+    last_pk = LessonProgress.objects.using(db).aggregate(m=Max("pk"))["m"] or 0
+    course_of_lesson = Subquery(
+        Lesson.objects.using(db).filter(pk=OuterRef("lesson_id")).values("course_id")[:1]
+    )
+    for start in range(0, last_pk + 1, BATCH_SIZE):
+        with transaction.atomic(using=db):
+            LessonProgress.objects.using(db).filter(
+                pk__gte=start, pk__lt=start + BATCH_SIZE, course__isnull=True,
+            ).update(course_id=course_of_lesson)
+
+
+class Migration(migrations.Migration):
+    """Step 2 of 3: batched backfill, outside a single long transaction."""
+
+    atomic = False
+
+    dependencies = [
+        ("courses", "0001_initial"),
+        ("progress", "0003_lessonprogress_course"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_course, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Step 3 of 3: enforce NOT NULL and add the covering index."""
+
+    dependencies = [
+        ("courses", "0001_initial"),
+        ("progress", "0004_backfill_lessonprogress_course"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="course",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="progress_records",
+                to="courses.course",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lessonprogress",
+            index=models.Index(fields=["user", "course", "lesson"], name="progress_user_course_lesson"),
+        ),
+    ]
@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Bitmap progress storage (PROGRESS_STORAGE="bitmap")."""
+
+    dependencies = [
+        ("courses", "0004_lesson_slot"),
+        ("progress", "0005_lessonprogress_course_not_null"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseProgress",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("word", models.PositiveSmallIntegerField(default=0)),
+                ("bits", models.BigIntegerField(default=0)),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="course_progress", to="courses.course")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="course_progress", to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="courseprogress",
+            constraint=models.UniqueConstraint(fields=("user", "course", "word"), name="unique_user_course_word"),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Drop the progress tables' foreign-key constraints so they can live on shard databases."""
+
+    dependencies = [
+        ("courses", "0004_lesson_slot"),
+        ("progress", "0006_courseprogress"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="courseprogress",
+            name="course",
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name="course_progress", to="courses.course"),
+        ),
+        migrations.AlterField(
+            model_name="courseprogress",
+            name="user",
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name="course_progress", to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="course",
+            field=models.ForeignKey(db_constraint=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name="progress_records", to="courses.course"),
+        ),
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="lesson",
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name="progress_records", to="courses.lesson"),
+        ),
+        migrations.AlterField(
+            model_name="lessonprogress",
+            name="user",
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name="lesson_progress", to=settings.AUTH_USER_MODEL),
+        ),
+    ]
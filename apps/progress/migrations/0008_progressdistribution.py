@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Incrementally maintained per-course progress distribution."""
+
+    dependencies = [
+        ("courses", "0005_course_counters"),
+        ("progress", "0007_progress_shardable"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgressDistribution",
+            fields=[
+                ("course", models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="+",
+                    serialize=False, to="courses.course",
+                )),
+                ("reached", models.JSONField(default=dict)),
+                ("histogram", models.JSONField(default=list)),
+                ("recomputed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
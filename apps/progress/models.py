@@ -1,29 +1,60 @@
 from django.conf import settings
 from django.db import models
 
-from apps.courses.models import Lesson
+from apps.courses.models import Course, Lesson
 
 
 class LessonProgress(models.Model):
     """
     Tracks that a user has visited/watched a lesson.
 
-    Deliberately simple: a row means "visited". Future extension:
-    add `watch_time_seconds`, `completed` flag without breaking callers.
+    A row means "visited". `course` is denormalized from `lesson.course` so
+    the per-course visited set is a single index-only range scan on
+    (user, course, lesson) instead of a join through `Lesson`. It is set by
+    ProgressService and kept in sync when a lesson moves (see signals.py).
+
+    Video watch time is recorded as a compact list of merged `[start, end]`
+    second intervals, written in batches by the heartbeat buffer
+    (see heartbeats.py) — never once per heartbeat.
+    `completed` is derived from how much of the video the intervals cover.
+
+    Rows may live on a shard database, away from the users, courses and
+    lessons they point at (see sharding.py), so the foreign keys have no
+    database constraint.
     """
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name="lesson_progress",
     )
     lesson = models.ForeignKey(
         Lesson,
         on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="progress_records",
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        db_constraint=False,
         related_name="progress_records",
+        editable=False,  # always derived from lesson.course
     )
     first_visited_at = models.DateTimeField(auto_now_add=True)
     last_visited_at = models.DateTimeField(auto_now=True)
+    watched_intervals = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Merged [start, end] second ranges of the video the user has watched.",
+    )
+    watch_time_seconds = models.PositiveIntegerField(
+        default=0,
+        help_text="Seconds of the video covered by watched_intervals (rewatches count once).",
+    )
+    video_duration_seconds = models.PositiveIntegerField(null=True, blank=True)
+    completed = models.BooleanField(default=False)
 
     class Meta:
         constraints = [
@@ -32,6 +63,75 @@ class LessonProgress(models.Model):
                 name="unique_user_lesson_progress",
             )
         ]
+        indexes = [
+            # Covers get_visited_ids(): WHERE user_id=? AND course_id=? → lesson_id
+            models.Index(fields=["user", "course", "lesson"], name="progress_user_course_lesson"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} visited {self.lesson}"
+
+
+class CourseProgress(models.Model):
+    """
+    Visited lessons of one user in one course, as a bitmap over
+    `Lesson.slot` (see bitmap.py). Used instead of LessonProgress rows for
+    visits when PROGRESS_STORAGE="bitmap"; watch time stays in
+    LessonProgress either way.
+
+    `word` is 0 unless the course has more than 63 lessons. A visit is a
+    single `UPDATE ... SET bits = bits | mask`, so concurrent visits to
+    different lessons never overwrite each other. Sharded like
+    LessonProgress.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="course_progress",
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="course_progress",
+    )
+    word = models.PositiveSmallIntegerField(default=0)
+    bits = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the lookup index: WHERE user_id=? AND course_id=?
+            models.UniqueConstraint(fields=["user", "course", "word"], name="unique_user_course_word"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} in {self.course} (word {self.word})"
+
+
+class ProgressDistribution(models.Model):
+    """
+    How far a course's learners get, kept up to date as they go, so the
+    staff course page reads one small row instead of grouping every
+    progress row of the course.
+
+    - `reached`: {lesson id: learners who have visited it}
+    - `histogram`: learners by number of lessons visited — index k holds
+      the learners with exactly k visited lessons (index 0 is unused: the
+      enrolled learners with no visit are Course.enrollment_count minus
+      the rest)
+
+    ProgressService.mark_visited moves one learner one bucket up per first
+    visit, under a row lock taken after the visit commits. `manage.py recompute_progress_distribution`
+    rebuilds it exactly from the progress rows, correcting drift (deleted
+    users and lessons, purges). Lives in "default", never on a shard.
+    """
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    reached = models.JSONField(default=dict)
+    histogram = models.JSONField(default=list)
+    recomputed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Progress distribution of {self.course}"
@@ -1,41 +1,643 @@
 """
 ProgressService: lesson progress tracking business logic.
+
+A visit also moves the enrollment's resume pointers (last lesson visited,
+next unvisited lesson) in the same transaction; see Enrollment.
+
+Visits are stored one of two ways, chosen by PROGRESS_STORAGE:
+- "rows" (default): one LessonProgress row per (user, lesson)
+- "bitmap": one CourseProgress row per (user, course) with a bit per
+  lesson slot (see bitmap.py)
+Watch time (heartbeats) always lives in LessonProgress. `manage.py
+convert_progress` moves visits between the two, `benchmark_progress`
+compares their size and latency.
+
+Either way the rows may be spread over several databases by user id
+(PROGRESS_SHARDS, see sharding.py): every query here for one user goes to
+that user's shard, per-course queries fan out to all of them.
+
+A first visit also moves the learner up one bucket of the course's
+ProgressDistribution (the staff "how far do learners get" view);
+recompute_distribution rebuilds it exactly.
 """
+from collections import Counter, defaultdict
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.lookups import Exact
+from django.utils import timezone
 
+from apps.core import metrics
 from apps.courses.models import Course, Lesson
-from .models import LessonProgress
+from apps.enrollments.models import Enrollment
+from . import bitmap
+from .heartbeats import coverage_seconds, is_completed, merge_intervals
+from .models import CourseProgress, LessonProgress, ProgressDistribution
+from .sharding import fan_out, shard_for, shards
 
 User = get_user_model()
 
 
+def next_unvisited(lesson_ids: list[int], visited_ids: set[int], after: int | None) -> int | None:
+    """
+    The first lesson in `lesson_ids` (course order) not in `visited_ids`,
+    looking after `after` first and then wrapping to the start. None when
+    every lesson has been visited.
+    """
+    start = lesson_ids.index(after) + 1 if after in lesson_ids else 0
+    for lesson_id in lesson_ids[start:] + lesson_ids[:start]:
+        if lesson_id not in visited_ids:
+            return lesson_id
+    return None
+
+
+def use_bitmap() -> bool:
+    return settings.PROGRESS_STORAGE == "bitmap"
+
+
 class ProgressService:
 
     @staticmethod
-    def mark_visited(user: User, lesson: Lesson) -> LessonProgress:
+    def mark_visited(user: User, lesson: Lesson, lessons: list[Lesson] | None = None,
+                     visited_ids: set[int] | None = None) -> LessonProgress | None:
         """
-        Record or update a lesson visit.
-        Idempotent — safe to call on every page load.
+        Record or update a lesson visit and move the enrollment's resume
+        pointers to it. Idempotent — safe to call on every page load.
         `last_visited_at` is auto-updated via auto_now=True.
+
+        With bitmap storage the visit is one bit set in CourseProgress and
+        None is returned; otherwise the LessonProgress row is.
+
+        `lessons` (the course outline, in order) and `visited_ids` (before
+        this visit) are fetched if not given; lesson_detail passes the ones
+        it already has for the page.
+        """
+        if lessons is None:
+            lessons = list(Lesson.objects.filter(course_id=lesson.course_id).only("pk", "slot"))
+        if visited_ids is None:
+            visited_ids = ProgressService.get_visited_ids(user, lesson.course_id, lessons)
+        lesson_ids = [item.pk for item in lessons]
+
+        # Not atomic across databases: with sharding a crash in between can
+        # leave the visit recorded and the resume pointers one visit behind.
+        # Whether this is the first visit is decided by the write itself, not
+        # by `visited_ids`: two concurrent requests for the same lesson (two
+        # tabs, a retry) both read it as unvisited, but only one inserts the
+        # row or flips the bit. The enrollment update comes first: its row
+        # lock makes one learner's visits to one course take turns (the
+        # shard commits before "default" releases it), so the recount after
+        # a first visit sees every earlier one.
+        with transaction.atomic(), transaction.atomic(using=shard_for(user.pk), savepoint=False):
+            Enrollment.objects.filter(user=user, course_id=lesson.course_id).update(
+                last_lesson=lesson,
+                next_lesson_id=next_unvisited(lesson_ids, visited_ids | {lesson.pk}, lesson.pk),
+                last_visited_at=timezone.now(),
+            )
+            if use_bitmap():
+                progress = None
+                # A bit in `visited_ids` is already set; only unset ones need the write
+                first = lesson.pk not in visited_ids and ProgressService._set_visited_bit(
+                    user.pk, lesson.course_id, lesson.slot,
+                )
+            else:
+                progress, first = ProgressService._mark_row(user, lesson)
+            if first:
+                visited = ProgressService.get_visited_ids(user, lesson.course_id, lessons) & set(lesson_ids)
+                visited_before = len(visited - {lesson.pk})
+                transaction.on_commit(
+                    lambda: ProgressService._count_first_visit(lesson.course_id, lesson.pk, visited_before),
+                )
+        metrics.inc("mooc_lesson_visits_total")
+        return progress
+
+    @staticmethod
+    def _count_first_visit(course_id: int, lesson_id: int, visited_before: int) -> None:
         """
-        progress, _ = LessonProgress.objects.get_or_create(
+        Count `lesson_id` as reached by one more learner, who moves up from
+        `visited_before` lessons.
+
+        Runs once the visit has committed, in its own short transaction:
+        every first visit in a course locks and rewrites that course's one
+        ProgressDistribution row, and holding that lock no longer than this
+        read and write keeps a launch-day rush on one course from queueing
+        behind whole visit transactions. `visited_before` is recounted by
+        mark_visited after its write, not taken from the page's earlier
+        read. A crash between the visit's commit and this update loses one
+        count, which the nightly recompute_distribution restores.
+        """
+        with transaction.atomic():
+            stats, _ = ProgressDistribution.objects.select_for_update().get_or_create(course_id=course_id)
+            stats.reached[str(lesson_id)] = stats.reached.get(str(lesson_id), 0) + 1
+            histogram = stats.histogram + [0] * (visited_before + 2 - len(stats.histogram))
+            if visited_before:
+                histogram[visited_before] = max(0, histogram[visited_before] - 1)
+            histogram[visited_before + 1] += 1
+            stats.histogram = histogram
+            stats.save(update_fields=["reached", "histogram"])
+
+    @staticmethod
+    def _mark_row(user: User, lesson: Lesson) -> tuple[LessonProgress, bool]:
+        """The user's row for `lesson`, and whether this call created it."""
+        progress, created = LessonProgress.objects.using(shard_for(user.pk)).get_or_create(
             user=user,
             lesson=lesson,
+            defaults={"course_id": lesson.course_id},
         )
         # Touch last_visited_at on revisit
-        if not _:
+        if not created:
             progress.save(update_fields=["last_visited_at"])
-        return progress
+        return progress, created
+
+    @staticmethod
+    def _set_visited_bit(user_id: int, course_id: int, slot: int) -> bool:
+        """
+        `bits |= mask` on the user's word for `slot`, creating the row on a
+        first visit. True if this call set the bit, False if it was set.
+        """
+        word, mask = bitmap.locate(slot)
+        db = shard_for(user_id)
+        unset = CourseProgress.objects.using(db).filter(
+            Exact(F("bits").bitand(mask), 0), user_id=user_id, course_id=course_id, word=word,
+        )
+        if unset.update(bits=F("bits").bitor(mask)):
+            return True
+        try:
+            with transaction.atomic(using=db):
+                CourseProgress.objects.using(db).create(user_id=user_id, course_id=course_id, word=word, bits=mask)
+            return True
+        except IntegrityError:  # the row exists: created concurrently, or the bit was already set
+            return bool(unset.update(bits=F("bits").bitor(mask)))
 
     @staticmethod
-    def get_visited_ids(user: User, course: Course) -> set[int]:
+    def get_visited_ids(user: User, course: Course | int, lessons: list[Lesson] | None = None) -> set[int]:
         """
         Return a set of visited lesson IDs for a course.
         A set allows O(1) lookup in templates.
+
+        Rows: answered from the (user, course, lesson) index alone — no join.
+        Bitmap: one row read, then a bit test per lesson of the outline;
+        pass `lessons` if the caller already has them, else their
+        (pk, slot) pairs cost a second query.
         """
+        if use_bitmap():
+            return ProgressService._visited_from_bitmap(user, course, lessons)
         return set(
-            LessonProgress.objects.filter(
+            LessonProgress.objects.using(shard_for(user.pk)).filter(
                 user=user,
-                lesson__course=course,
+                course=course,
             ).values_list("lesson_id", flat=True)
         )
+
+    @staticmethod
+    def _visited_from_bitmap(user: User, course: Course | int, lessons: list[Lesson] | None) -> set[int]:
+        visited = bitmap.join(
+            CourseProgress.objects.using(shard_for(user.pk)).filter(user=user, course=course)
+            .values_list("word", "bits")
+        )
+        if not visited:
+            return set()
+        if lessons is None:
+            slots = Lesson.objects.filter(course=course).values_list("pk", "slot")
+        else:
+            slots = ((item.pk, item.slot) for item in lessons)
+        return {pk for pk, slot in slots if bitmap.has(visited, slot)}
+
+    @staticmethod
+    def visited_counts(user: User, course_ids) -> dict[int, int]:
+        """Visited-lesson count per course for `user`, in one grouped query."""
+        db = shard_for(user.pk)
+        if not use_bitmap():
+            return dict(
+                LessonProgress.objects.using(db).filter(user=user, course_id__in=course_ids)
+                .order_by().values("course_id").annotate(n=Count("pk")).values_list("course_id", "n")
+            )
+        counts = defaultdict(int)
+        for course_id, bits in CourseProgress.objects.using(db).filter(user=user, course_id__in=course_ids).values_list(
+            "course_id", "bits",
+        ):
+            counts[course_id] += bits.bit_count()
+        return dict(counts)
+
+    @staticmethod
+    def sync_lesson_course(lesson: Lesson) -> None:
+        """Point the lesson's LessonProgress rows at its current course."""
+        fan_out(lambda db: LessonProgress.objects.using(db).filter(lesson=lesson).exclude(
+            course_id=lesson.course_id,
+        ).update(course_id=lesson.course_id))
+
+    @staticmethod
+    def move_lesson_bits(lesson: Lesson, old_course_id: int, old_slot: int) -> None:
+        """A lesson moved courses: carry its visited bit over to its new slot."""
+        word, mask = bitmap.locate(old_slot)
+
+        def move(db):
+            old_rows = CourseProgress.objects.using(db).filter(course_id=old_course_id, word=word)
+            user_ids = [user_id for user_id, bits in old_rows.values_list("user_id", "bits") if bits & mask]
+            for user_id in user_ids:
+                ProgressService._set_visited_bit(user_id, lesson.course_id, lesson.slot)
+            old_rows.filter(user_id__in=user_ids).update(bits=F("bits").bitand(~mask))
+
+        fan_out(move)
+
+    @staticmethod
+    def forget_lesson(lesson: Lesson) -> None:
+        """
+        Clear a purged lesson's bit, so a lesson that later takes the same
+        slot does not start out visited. One UPDATE over the course's rows
+        per shard.
+        """
+        word, mask = bitmap.locate(lesson.slot)
+        fan_out(lambda db: CourseProgress.objects.using(db).filter(
+            course_id=lesson.course_id, word=word,
+        ).update(bits=F("bits").bitand(~mask)))
+
+    @staticmethod
+    def purge_shards(batch_size: int, report=None, **filters) -> int:
+        """
+        Delete the progress rows matching `filters` (course= or lesson=)
+        from every shard, by primary-key batches. Only needed when sharded:
+        otherwise they are ordinary CASCADE dependents of the course/lesson.
+        `report(model_label, deleted)` is called after each batch.
+        """
+        models = [LessonProgress] if "lesson" in filters else [LessonProgress, CourseProgress]
+
+        def purge(db):
+            total = 0
+            for model in models:
+                pending = model.objects.using(db).filter(**filters).values_list("pk", flat=True)
+                while pks := list(pending[:batch_size]):
+                    deleted, _ = model.objects.using(db).filter(pk__in=pks).delete()
+                    total += deleted
+                    if report:
+                        report(model._meta.label, deleted)
+            return total
+
+        return sum(fan_out(purge, settings.PROGRESS_SHARDS).values())
+
+    @staticmethod
+    def forget_user(user_id: int) -> None:
+        """Delete a deleted user's rows from their shard."""
+        db = shard_for(user_id)
+        LessonProgress.objects.using(db).filter(user_id=user_id).delete()
+        CourseProgress.objects.using(db).filter(user_id=user_id).delete()
+
+    @staticmethod
+    def course_export(course: Course) -> list[tuple]:
+        """
+        Every user's progress in `course`, from all shards in parallel:
+        (user_id, lesson_id, last_visited_at, watch_time_seconds, completed)
+        sorted by user and lesson. With bitmap storage, visits that have no
+        LessonProgress row come with no visit time.
+        """
+        lesson_at = dict(Lesson.objects.filter(course=course).values_list("slot", "pk"))
+
+        def read(db):
+            rows = {
+                (row[0], row[1]): row
+                for row in LessonProgress.objects.using(db).filter(course=course, lesson_id__in=lesson_at.values())
+                .values_list("user_id", "lesson_id", "last_visited_at", "watch_time_seconds", "completed")
+            }
+            if use_bitmap():
+                for user_id, word, bits in CourseProgress.objects.using(db).filter(course=course).values_list(
+                    "user_id", "word", "bits",
+                ):
+                    for slot in bitmap.slots(bitmap.join([(word, bits)])):
+                        if slot in lesson_at:
+                            rows.setdefault((user_id, lesson_at[slot]), (user_id, lesson_at[slot], None, 0, False))
+            return list(rows.values())
+
+        return sorted(row for rows in fan_out(read).values() for row in rows)
+
+    @staticmethod
+    def distribution(course: Course, lessons: list[Lesson]) -> dict:
+        """
+        How far the learners of `course` get, for the staff course page, from
+        one ProgressDistribution row. Percentages are of enrolled learners.
+
+        - `reached`: (lesson, learners, percent) for `lessons`, in order
+        - `histogram`: (lessons visited, learners, percent) from 0 up
+        - `recomputed_at`: the last exact recount, or None
+        """
+        stats = ProgressDistribution.objects.filter(course=course).first() or ProgressDistribution(course=course)
+        enrolled = course.enrollment_count
+
+        def percent(learners: int) -> int:
+            return min(100, round(100 * learners / enrolled)) if enrolled > 0 else 0
+
+        counts = stats.histogram[1:]
+        buckets = [max(0, enrolled - sum(counts)), *counts]
+        buckets += [0] * (len(lessons) + 1 - len(buckets))
+        return {
+            "reached": [
+                (lesson, stats.reached.get(str(lesson.pk), 0), percent(stats.reached.get(str(lesson.pk), 0)))
+                for lesson in lessons
+            ],
+            "histogram": [(visited, learners, percent(learners)) for visited, learners in enumerate(buckets)],
+            "recomputed_at": stats.recomputed_at,
+        }
+
+    @staticmethod
+    def recompute_distribution(course: Course) -> ProgressDistribution:
+        """
+        Rebuild the course's ProgressDistribution from its progress rows on
+        every shard (in parallel), counting live lessons only. First visits
+        recorded while the shards are read may be missed until the next run.
+        """
+        slots = dict(Lesson.objects.filter(course=course).values_list("pk", "slot"))
+
+        def read(db) -> tuple[Counter, Counter]:
+            if not use_bitmap():
+                rows = LessonProgress.objects.using(db).filter(course=course, lesson_id__in=list(slots)).order_by()
+                return (
+                    Counter(dict(rows.values("user_id").annotate(n=Count("pk")).values_list("user_id", "n"))),
+                    Counter(dict(rows.values("lesson_id").annotate(n=Count("pk")).values_list("lesson_id", "n"))),
+                )
+            live = sum(1 << slot for slot in slots.values())  # the live lessons' bits
+            lesson_at = {slot: pk for pk, slot in slots.items()}
+            words = defaultdict(list)
+            for user_id, word, bits in CourseProgress.objects.using(db).filter(course=course).values_list(
+                "user_id", "word", "bits",
+            ):
+                words[user_id].append((word, bits))
+            per_user, reached = Counter(), Counter()
+            for user_id, pairs in words.items():
+                visited = bitmap.join(pairs) & live
+                per_user[user_id] = visited.bit_count()
+                reached.update(lesson_at[slot] for slot in bitmap.slots(visited))
+            return per_user, reached
+
+        per_user, reached = Counter(), Counter()
+        for shard_users, shard_reached in fan_out(read).values():
+            per_user.update(shard_users)
+            reached.update(shard_reached)
+        buckets = Counter(n for n in per_user.values() if n)
+
+        with transaction.atomic():
+            stats, _ = ProgressDistribution.objects.select_for_update().get_or_create(course=course)
+            stats.reached = {str(pk): n for pk, n in reached.items()}
+            stats.histogram = [0] + [buckets[k] for k in range(1, max(buckets, default=0) + 1)]
+            stats.recomputed_at = timezone.now()
+            stats.save()
+        return stats
+
+    @staticmethod
+    def recent_lesson_visits(since, limit: int) -> Counter:
+        """
+        Users who visited each lesson since `since`, for the `limit` most
+        visited lessons of every shard (read in parallel). Row storage only
+        — bitmap visits carry no time.
+        """
+        def read(db):
+            return list(
+                LessonProgress.objects.using(db).filter(last_visited_at__gte=since)
+                .order_by().values("lesson_id").annotate(n=Count("pk")).order_by("-n")
+                .values_list("lesson_id", "n")[:limit]
+            )
+
+        visits = Counter()
+        for rows in fan_out(read).values():
+            for lesson_id, n in rows:
+                visits[lesson_id] += n
+        return visits
+
+    @staticmethod
+    def rows_to_bitmap(batch_size: int = 5000, prune: bool = False, report=None) -> int:
+        """
+        OR every LessonProgress visit into CourseProgress, by primary-key
+        batches, each in its own transaction. Safe to re-run (bits only
+        get set). With `prune`, converted rows that hold no watch-time data
+        are deleted. Shards are converted one after another. Returns rows
+        converted.
+        """
+        total = 0
+        for db in shards():
+            last_pk = 0
+            while batch := list(
+                LessonProgress.objects.using(db).filter(pk__gt=last_pk).order_by("pk")
+                .values_list("pk", "user_id", "course_id", "lesson_id", "watch_time_seconds")[:batch_size]
+            ):
+                # Slots come from "default": lessons are not on the shards
+                slot_of = dict(Lesson.all_objects.filter(pk__in={row[3] for row in batch}).values_list("pk", "slot"))
+                masks = defaultdict(int)
+                for _, user_id, course_id, lesson_id, _ in batch:
+                    if lesson_id in slot_of:
+                        word, mask = bitmap.locate(slot_of[lesson_id])
+                        masks[(user_id, course_id, word)] |= mask
+                with transaction.atomic(using=db):
+                    ProgressService._merge_words(masks, db)
+                    if prune:
+                        LessonProgress.objects.using(db).filter(
+                            pk__in=[pk for pk, *_, watched in batch if not watched],
+                            completed=False, video_duration_seconds__isnull=True,
+                        ).delete()
+                total += len(batch)
+                last_pk = batch[-1][0]
+                if report:
+                    report(total)
+        return total
+
+    @staticmethod
+    def _merge_words(masks: dict[tuple[int, int, int], int], db: str) -> None:
+        existing = {
+            (row.user_id, row.course_id, row.word): row
+            for row in CourseProgress.objects.using(db).select_for_update().filter(
+                user_id__in={key[0] for key in masks}, course_id__in={key[1] for key in masks},
+            )
+        }
+        to_update, to_create = [], []
+        for (user_id, course_id, word), mask in masks.items():
+            row = existing.get((user_id, course_id, word))
+            if row is None:
+                to_create.append(CourseProgress(user_id=user_id, course_id=course_id, word=word, bits=mask))
+            elif row.bits | mask != row.bits:
+                row.bits |= mask
+                to_update.append(row)
+        CourseProgress.objects.using(db).bulk_update(to_update, ["bits"], batch_size=1000)
+        CourseProgress.objects.using(db).bulk_create(to_create, batch_size=1000)
+
+    @staticmethod
+    def bitmap_to_rows(batch_size: int = 1000, report=None) -> int:
+        """
+        Expand every CourseProgress bitmap into LessonProgress rows (visit
+        times are unknown and set to now). Safe to re-run. Returns rows
+        inserted.
+        """
+        total = 0
+        lesson_at: dict[int, dict[int, int]] = {}
+        for db in shards():
+            last_pk = 0
+            while batch := list(CourseProgress.objects.using(db).filter(pk__gt=last_pk).order_by("pk")[:batch_size]):
+                missing = {row.course_id for row in batch} - lesson_at.keys()
+                for course_id in missing:
+                    lesson_at[course_id] = {}
+                for course_id, slot, pk in Lesson.all_objects.filter(course_id__in=missing).values_list(
+                    "course_id", "slot", "pk",
+                ):
+                    lesson_at[course_id][slot] = pk
+                rows = [
+                    LessonProgress(
+                        user_id=row.user_id, course_id=row.course_id, lesson_id=lesson_at[row.course_id][slot],
+                    )
+                    for row in batch
+                    for slot in bitmap.slots(bitmap.join([(row.word, row.bits)]))
+                    if slot in lesson_at[row.course_id]
+                ]
+                total += len(LessonProgress.objects.using(db).bulk_create(rows, batch_size=1000, ignore_conflicts=True))
+                last_pk = batch[-1].pk
+                if report:
+                    report(total)
+        return total
+
+    @staticmethod
+    def rebalance(sources: list[str], batch_size: int = 1000, dry_run: bool = False, report=None) -> dict:
+        """
+        Move every progress row in `sources` that is not on its user's
+        shard (after PROGRESS_SHARDS changed) to that shard. Returns
+        {(source, target): rows}.
+
+        Each batch is copied in one transaction on the target, merged into
+        any rows the user created there meanwhile, then deleted from the
+        source: interrupted runs leave at worst rows present twice, which
+        the next run merges. Users being moved may briefly miss progress
+        on reads until their batch lands.
+        """
+        moved = defaultdict(int)
+        for source in sources:
+            for model in (LessonProgress, CourseProgress):
+                last_pk = 0
+                while batch := list(model.objects.using(source).filter(pk__gt=last_pk).order_by("pk")[:batch_size]):
+                    last_pk = batch[-1].pk
+                    by_target = defaultdict(list)
+                    for row in batch:
+                        if shard_for(row.user_id) != source:
+                            by_target[shard_for(row.user_id)].append(row)
+                    for target, rows in by_target.items():
+                        moved[(source, target)] += len(rows)
+                        if dry_run:
+                            continue
+                        pks = [row.pk for row in rows]
+                        with transaction.atomic(using=target):
+                            if model is LessonProgress:
+                                ProgressService._merge_rows(rows, target)
+                            else:
+                                masks = defaultdict(int)
+                                for row in rows:
+                                    masks[(row.user_id, row.course_id, row.word)] |= row.bits
+                                ProgressService._merge_words(masks, target)
+                        model.objects.using(source).filter(pk__in=pks).delete()
+                    if report and by_target:
+                        report(source, model._meta.label, dict(moved))
+        return dict(moved)
+
+    @staticmethod
+    def _merge_rows(rows: list[LessonProgress], db: str) -> None:
+        """Copy LessonProgress rows into `db`, merging watch data into rows already there."""
+        existing = {
+            (row.user_id, row.lesson_id): row
+            for row in LessonProgress.objects.using(db).select_for_update().filter(
+                user_id__in={row.user_id for row in rows}, lesson_id__in={row.lesson_id for row in rows},
+            )
+        }
+        fields = [
+            "first_visited_at", "last_visited_at", "watched_intervals", "watch_time_seconds",
+            "video_duration_seconds", "completed",
+        ]
+        to_create, to_update = [], []
+        for row in rows:
+            current = existing.get((row.user_id, row.lesson_id))
+            if current is None:
+                row.pk = None
+                to_create.append(row)
+                continue
+            current.first_visited_at = min(current.first_visited_at, row.first_visited_at)
+            current.last_visited_at = max(current.last_visited_at, row.last_visited_at)
+            current.watched_intervals = merge_intervals(current.watched_intervals + row.watched_intervals)
+            current.watch_time_seconds = int(coverage_seconds(current.watched_intervals))
+            current.video_duration_seconds = current.video_duration_seconds or row.video_duration_seconds
+            current.completed = current.completed or row.completed
+            to_update.append(current)
+        # bulk_create stamps auto_now(_add) fields; put the original visit times back
+        visited = [(row.first_visited_at, row.last_visited_at) for row in to_create]
+        LessonProgress.objects.using(db).bulk_create(to_create, batch_size=1000)
+        for row, (first, last) in zip(to_create, visited):
+            row.first_visited_at, row.last_visited_at = first, last
+        LessonProgress.objects.using(db).bulk_update(to_create + to_update, fields, batch_size=1000)
+
+    @staticmethod
+    def record_watch_batch(pending: dict[tuple[int, int], dict]) -> None:
+        """
+        Merge buffered watch intervals into stored progress rows.
+
+        `pending` maps (user_id, lesson_id) to
+        {"course_id": int, "intervals": [...], "duration": int|None},
+        as produced by HeartbeatBuffer. Costs one SELECT, one bulk UPDATE and
+        one bulk INSERT per shard regardless of how many heartbeats were
+        coalesced, plus a re-SELECT of the inserted keys to catch rows a
+        concurrent visit created first.
+        """
+        by_shard = defaultdict(dict)
+        for key, entry in pending.items():
+            by_shard[shard_for(key[0])][key] = entry
+        for db, entries in by_shard.items():
+            ProgressService._record_watch_shard(db, entries)
+
+    @staticmethod
+    def _record_watch_shard(db: str, pending: dict[tuple[int, int], dict]) -> None:
+        user_ids = {user_id for user_id, _ in pending}
+        lesson_ids = {lesson_id for _, lesson_id in pending}
+        update_fields = ["watched_intervals", "watch_time_seconds", "video_duration_seconds", "completed"]
+
+        with transaction.atomic(using=db):
+            existing = {
+                (p.user_id, p.lesson_id): p
+                for p in LessonProgress.objects.using(db).select_for_update().filter(
+                    user_id__in=user_ids, lesson_id__in=lesson_ids,
+                )
+            }
+            to_update, to_create = [], []
+            for (user_id, lesson_id), entry in pending.items():
+                progress = existing.get((user_id, lesson_id))
+                if progress is None:
+                    progress = LessonProgress(
+                        user_id=user_id, lesson_id=lesson_id, course_id=entry["course_id"],
+                    )
+                    to_create.append(progress)
+                else:
+                    to_update.append(progress)
+                ProgressService._merge_watch(progress, entry)
+
+            if to_update:
+                LessonProgress.objects.using(db).bulk_update(to_update, update_fields)
+            if to_create:
+                LessonProgress.objects.using(db).bulk_create(to_create, ignore_conflicts=True)
+                # A concurrent mark_visited may have inserted some of these rows
+                # after our SELECT, in which case ours were skipped: merge into
+                # what is there. Merging is idempotent, so rows we did insert
+                # come back unchanged and are not written again.
+                created = {(p.user_id, p.lesson_id) for p in to_create}
+                conflicting = [
+                    progress for progress in LessonProgress.objects.using(db).select_for_update().filter(
+                        user_id__in={user_id for user_id, _ in created},
+                        lesson_id__in={lesson_id for _, lesson_id in created},
+                    )
+                    if (progress.user_id, progress.lesson_id) in created
+                    and ProgressService._merge_watch(progress, pending[(progress.user_id, progress.lesson_id)])
+                ]
+                if conflicting:
+                    LessonProgress.objects.using(db).bulk_update(conflicting, update_fields)
+
+    @staticmethod
+    def _merge_watch(progress: LessonProgress, entry: dict) -> bool:
+        """Merge one buffered entry into `progress` in memory; True if anything changed."""
+        before = (progress.watched_intervals, progress.video_duration_seconds, progress.completed)
+        duration = entry["duration"] or progress.video_duration_seconds
+        intervals = merge_intervals(progress.watched_intervals + entry["intervals"])
+        if duration:
+            intervals = [[s, min(e, duration)] for s, e in intervals if s < duration]
+        progress.watched_intervals = intervals
+        progress.watch_time_seconds = int(coverage_seconds(intervals))
+        progress.video_duration_seconds = duration
+        progress.completed = progress.completed or is_completed(intervals, duration)
+        return before != (progress.watched_intervals, progress.video_duration_seconds, progress.completed)
@@ -0,0 +1,127 @@
+"""
+Optional horizontal sharding of progress data by user.
+
+With PROGRESS_SHARDS set to a list of database aliases, every
+LessonProgress and CourseProgress row lives in exactly one of them, picked
+from its user id by `shard_for()`. Left empty (the default) everything
+stays in the "default" database and nothing here changes behaviour.
+
+- Routing: ProgressService passes `.using(shard_for(user_id))` on every
+  query it makes for a user, and ProgressShardRouter routes saves and
+  related-object lookups of a loaded row to the row's shard. A progress
+  query outside ProgressService that names no user (the admin, ad-hoc
+  shell code) reads "default", which holds no progress rows once sharded.
+- Placement uses jump consistent hashing: growing from N to N+1 shards
+  moves only ~1/(N+1) of the users, and `manage.py rebalance_progress`
+  moves exactly those rows (also used to move an unsharded install's
+  rows out of "default").
+- Shards are migrated with the full schema (`migrate_if_needed`, run by
+  the container entrypoint, migrates every alias in PROGRESS_SHARDS) but
+  only the progress tables get rows. Their user/course/
+  lesson columns carry no foreign-key constraints, so deletes are cleaned
+  up explicitly: purge_deleted fans the course/lesson deletes out to every
+  shard, and deleting a user clears that user's shard (signals.py).
+- Per-course staff queries have to visit every shard; `fan_out()` runs
+  them in parallel threads, one connection per shard.
+
+The order of PROGRESS_SHARDS is the placement: append new shards, never
+reorder them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SHARDED_MODELS = {"lessonprogress", "courseprogress"}
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping & Veach's jump consistent hash: a bucket in [0, buckets)."""
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def is_sharded() -> bool:
+    return bool(settings.PROGRESS_SHARDS)
+
+
+def shards() -> list[str]:
+    """Every alias that holds progress rows."""
+    return list(settings.PROGRESS_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def shard_for(user_id: int) -> str:
+    """The alias holding `user_id`'s progress."""
+    aliases = settings.PROGRESS_SHARDS
+    if not aliases:
+        return DEFAULT_DB_ALIAS
+    return aliases[jump_hash(user_id, len(aliases))]
+
+
+def fan_out(func, aliases: list[str] | None = None) -> dict:
+    """
+    `func(alias)` on every shard, in parallel; returns {alias: result}.
+
+    Each thread opens (and then closes) its own connection. A shard on
+    which the calling thread has a transaction open is queried from the
+    calling thread instead, so the results include its uncommitted writes.
+    """
+    aliases = shards() if aliases is None else aliases
+    local = [alias for alias in aliases if connections[alias].in_atomic_block]
+    remote = [alias for alias in aliases if alias not in local]
+    results = {alias: func(alias) for alias in local}
+    if len(remote) == 1:
+        results[remote[0]] = func(remote[0])
+    elif remote:
+        def run(alias):
+            try:
+                return func(alias)
+            finally:
+                connections[alias].close()
+
+        with ThreadPoolExecutor(max_workers=len(remote), thread_name_prefix="progress-shard") as pool:
+            results.update(zip(remote, pool.map(run, remote)))
+    return results
+
+
+def _is_sharded_model(model) -> bool:
+    """`model` is a model class or instance (possibly a lazy request.user)."""
+    return model._meta.app_label == "progress" and model._meta.model_name in SHARDED_MODELS
+
+
+class ProgressShardRouter:
+    """
+    Keeps a progress row's saves, deletes and `user.lesson_progress`-style
+    lookups on its user's shard, and sends lookups from a progress row to
+    users, courses and lessons back to "default". Everything else is left
+    to Django's defaults.
+    """
+
+    def _instance_shard(self, model, hints) -> str | None:
+        instance = hints.get("instance")
+        if not is_sharded() or instance is None:
+            return None
+        if not _is_sharded_model(model):
+            # e.g. `progress.lesson`: Django would otherwise follow the row to its shard
+            return DEFAULT_DB_ALIAS if _is_sharded_model(instance) else None
+        if isinstance(instance, get_user_model()):  # user.lesson_progress
+            return shard_for(instance.pk)
+        if _is_sharded_model(instance):
+            return instance._state.db or shard_for(instance.user_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._instance_shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._instance_shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if _is_sharded_model(obj1) or _is_sharded_model(obj2):
+            return True
+        return None
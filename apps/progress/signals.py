@@ -0,0 +1,37 @@
+"""
+Keeps the denormalized LessonProgress.course in sync with Lesson.course,
+carries a moved lesson's visited bits to its slot in the new course, and
+clears a deleted user's progress from their shard.
+
+Only a lesson that actually moved has rows to rewrite; the UPDATE is a
+no-op index probe otherwise (skipped when sharded, where it would be one
+probe per shard on every lesson edit). `Lesson.objects.update(course=...)`
+bypasses signals — move lessons through `save()`.
+
+Unsharded, a user's progress rows go with the user through CASCADE; a
+shard is another database, so they are deleted explicitly.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.courses.models import Lesson
+from .services import ProgressService
+from .sharding import is_sharded
+
+
+@receiver(post_save, sender=Lesson)
+def sync_progress_course(sender, instance: Lesson, created: bool, raw: bool = False, **kwargs):
+    if created or raw:
+        return
+    moved_from = instance.__dict__.pop("moved_from", None)
+    if moved_from or not is_sharded():
+        ProgressService.sync_lesson_course(instance)
+    if moved_from:
+        ProgressService.move_lesson_bits(instance, *moved_from)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_user_progress(sender, instance, **kwargs):
+    if is_sharded():
+        ProgressService.forget_user(instance.pk)
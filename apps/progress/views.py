@@ -0,0 +1,71 @@
+import json
+import logging
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from apps.courses.models import Lesson
+from .heartbeats import heartbeat_buffer
+
+# Upper bounds that keep a single (possibly forged) batch cheap to merge
+MAX_INTERVALS_PER_BATCH = 200
+MAX_VIDEO_SECONDS = 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_heartbeat(body: bytes) -> tuple[int, list[list[float]], int | None]:
+    data = json.loads(body)
+    lesson_id = int(data["lesson"])
+    intervals = data.get("intervals") or []
+    if not isinstance(intervals, list) or len(intervals) > MAX_INTERVALS_PER_BATCH:
+        raise ValueError("intervals must be a list of at most %d pairs" % MAX_INTERVALS_PER_BATCH)
+    parsed = []
+    for start, end in intervals:
+        start, end = float(start), float(end)
+        if not (0 <= start < end <= MAX_VIDEO_SECONDS):
+            raise ValueError("invalid interval")
+        parsed.append([start, end])
+    duration = data.get("duration")
+    duration = int(duration) if duration else None
+    if duration is not None and not (0 < duration <= MAX_VIDEO_SECONDS):
+        raise ValueError("invalid duration")
+    return lesson_id, parsed, duration
+
+
+@login_required
+@require_POST
+def heartbeat(request):
+    """
+    Accept a client-batched list of watched intervals for one lesson.
+
+    Body: {"lesson": <id>, "intervals": [[start, end], ...], "duration": <seconds>}
+
+    Intervals are coalesced in the per-worker HeartbeatBuffer and written
+    in bulk when the buffer is due, so this view normally performs a single
+    read (the enrollment check) and no writes. The batch is accepted once
+    buffered: a failed flush keeps it in the buffer for the next one and is
+    logged, never turned into an error the client would retry.
+    """
+    try:
+        lesson_id, intervals, duration = _parse_heartbeat(request.body)
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Malformed heartbeat."}, status=400)
+
+    # Lesson exists and the user is enrolled in its course — one query
+    course_id = next(iter(
+        Lesson.objects.filter(pk=lesson_id, course__enrollments__user=request.user)
+        .order_by()  # skip the model's default (order, created_at) sort
+        .values_list("course_id", flat=True)[:1]
+    ), None)
+    if course_id is None:
+        return JsonResponse({"error": "Not enrolled in this lesson's course."}, status=403)
+
+    heartbeat_buffer.add(request.user.pk, lesson_id, course_id, intervals, duration)
+    if heartbeat_buffer.due():
+        try:
+            heartbeat_buffer.flush()
+        except Exception:
+            logger.exception("Heartbeat flush failed; %d pairs kept for the next flush", len(heartbeat_buffer))
+    return JsonResponse({"accepted": len(intervals)}, status=202)
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import CourseRecommendation, RecommendationBuild
+
+
+@admin.register(CourseRecommendation)
+class CourseRecommendationAdmin(admin.ModelAdmin):
+    list_display = ("course", "rank", "recommended", "score")
+    list_filter = ("course",)
+    raw_id_fields = ("course", "recommended")
+
+
+@admin.register(RecommendationBuild)
+class RecommendationBuildAdmin(admin.ModelAdmin):
+    list_display = ("last_enrollment_id", "built_at")
+    readonly_fields = ("last_enrollment_id", "built_at")
@@ -0,0 +1,33 @@
+"""
+Build "learners also took" recommendations from enrollments.
+
+Incremental by default: only enrollments created since the last run are
+read. Schedule it from cron (e.g. hourly) and run with --full nightly or
+weekly to recompute every score exactly.
+
+Usage:
+    python manage.py build_recommendations
+    python manage.py build_recommendations --full --top-k 12
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.services import DEFAULT_TOP_K, RecommendationService
+
+
+class Command(BaseCommand):
+    help = "Update the course co-occurrence matrix and top-K recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild from scratch instead of incrementally.")
+        parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+
+    def handle(self, *args, full: bool, top_k: int, **options):
+        started = time.perf_counter()
+        result = RecommendationService.build(full=full, top_k=top_k)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if full else 'Incremental'} build: {result['pairs']} matrix cells changed, "
+            f"{result['courses']} courses re-ranked, {result['recommendations']} recommendations written "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("courses", "0002_course_lesson_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecommendationBuild",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("last_enrollment_id", models.BigIntegerField(default=0)),
+                ("built_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CourseCooccurrence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("course_a", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="courses.course")),
+                ("course_b", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="courses.course")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="CourseRecommendation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField()),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="recommendations", to="courses.course")),
+                ("recommended", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="courses.course")),
+            ],
+            options={
+                "ordering": ["course", "rank"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="coursecooccurrence",
+            constraint=models.UniqueConstraint(fields=("course_a", "course_b"), name="unique_course_pair"),
+        ),
+        migrations.AddConstraint(
+            model_name="courserecommendation",
+            constraint=models.UniqueConstraint(fields=("course", "rank"), name="unique_course_recommendation_rank"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Track enrollment ids skipped by the watermark until they commit."""
+
+    dependencies = [
+        ("recommendations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recommendationbuild",
+            name="pending_ids",
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import models
+
+from apps.courses.models import Course
+
+
+class CourseCooccurrence(models.Model):
+    """
+    One non-zero cell of the sparse course×course co-enrollment matrix:
+    `count` learners are enrolled in both courses.
+
+    Stored in both directions (a→b and b→a) so a course's neighbours are a
+    single range scan on the unique (course_a, course_b) index. Maintained
+    offline by RecommendationService.build(); never touched on request.
+    """
+
+    course_a = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    course_b = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course_a", "course_b"], name="unique_course_pair"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.course_a_id}↔{self.course_b_id}: {self.count}"
+
+
+class CourseRecommendation(models.Model):
+    """
+    Top-K "learners also took" neighbours of a course, ranked 1..K.
+
+    Serving is one lookup on the unique (course, rank) index.
+    """
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="recommendations")
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["course", "rank"], name="unique_course_recommendation_rank"),
+        ]
+        ordering = ["course", "rank"]
+
+    def __str__(self) -> str:
+        return f"{self.course_id} #{self.rank}: {self.recommended_id}"
+
+
+class RecommendationBuild(models.Model):
+    """
+    Singleton watermark: enrollments with id <= last_enrollment_id are
+    already folded into CourseCooccurrence, except `pending_ids` — ids
+    below it that were not visible when it was set (an insert not yet
+    committed, or rolled back). Those are folded in by the build that first
+    sees them.
+    """
+
+    last_enrollment_id = models.BigIntegerField(default=0)
+    pending_ids = models.JSONField(default=list)
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f"Recommendations built up to enrollment {self.last_enrollment_id}"
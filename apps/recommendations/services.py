@@ -0,0 +1,212 @@
+"""
+RecommendationService: offline "learners also took" builder and cheap serving.
+
+Build (offline, `manage.py build_recommendations`):
+1. Stream enrollments newer than the watermark, grouped by user. Ids are
+   handed out before their insert commits, so an id below the new
+   watermark may not be visible yet: the missing ids within GAP_WINDOW of
+   it are kept as pending and treated as new by the build that sees them.
+2. For each of those users, every pair of their courses where at least one
+   enrollment is new adds 1 to a sparse co-occurrence delta (a Counter
+   keyed by (course_a, course_b) — the non-zero cells of the course×course
+   matrix). Only users with new enrollments are read, so the work is
+   proportional to what changed, not to the whole table.
+3. Merge the delta into CourseCooccurrence with bulk writes.
+4. Re-rank the top-K neighbours of every course whose row changed, scored
+   by cosine similarity count(a,b) / sqrt(n_a * n_b).
+
+Serving is one indexed lookup on CourseRecommendation — no aggregation on
+request. Scores of untouched courses drift slightly as neighbour sizes
+grow; run with --full periodically to recompute everything exactly.
+"""
+import heapq
+import itertools
+import math
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.courses.models import Course
+from apps.enrollments.models import Enrollment
+from .models import CourseCooccurrence, CourseRecommendation, RecommendationBuild
+
+User = get_user_model()
+
+DEFAULT_TOP_K = 10
+USER_CHUNK = 2000
+# Missing enrollment ids further than this below the watermark are taken
+# as rolled back or deleted, not as inserts still to commit
+GAP_WINDOW = 10_000
+
+
+class RecommendationService:
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def for_course(course: Course, limit: int = 5) -> list[Course]:
+        """Precomputed neighbours of one course — a single indexed query."""
+        recs = (
+            CourseRecommendation.objects.filter(course=course, rank__lte=limit, recommended__deleted_at__isnull=True)
+            .select_related("recommended")
+            .only("rank", "recommended__id", "recommended__title", "recommended__short_description")
+        )
+        return [rec.recommended for rec in recs]
+
+    @staticmethod
+    def for_courses(course_ids, limit: int = 5) -> dict[int, list[Course]]:
+        """`for_course` of many courses in one query, as {course_id: recommended courses}."""
+        recs = (
+            CourseRecommendation.objects.filter(
+                course_id__in=course_ids, rank__lte=limit, recommended__deleted_at__isnull=True,
+            )
+            .select_related("recommended")
+            .only("course_id", "rank", "recommended__id", "recommended__title", "recommended__short_description")
+        )
+        by_course = {course_id: [] for course_id in course_ids}
+        for rec in recs:
+            by_course[rec.course_id].append(rec.recommended)
+        return by_course
+
+    @staticmethod
+    def for_user(course_ids, limit: int = 5) -> list[Course]:
+        """
+        Neighbours of all of a user's courses, excluding ones they already take.
+        One query; candidates recommended by several courses keep their best score.
+        """
+        course_ids = set(course_ids)
+        if not course_ids:
+            return []
+        recs = (
+            CourseRecommendation.objects.filter(course_id__in=course_ids, recommended__deleted_at__isnull=True)
+            .exclude(recommended_id__in=course_ids)
+            .select_related("recommended")
+            .only("score", "recommended__id", "recommended__title", "recommended__short_description")
+        )
+        best: dict[int, tuple[float, Course]] = {}
+        for rec in recs:
+            if rec.recommended_id not in best or rec.score > best[rec.recommended_id][0]:
+                best[rec.recommended_id] = (rec.score, rec.recommended)
+        return [course for _, course in heapq.nlargest(limit, best.values(), key=lambda item: item[0])]
+
+    # ------------------------------------------------------------------
+    # Offline build
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def cooccurrence_delta(since_id: int, until_id: int, late_ids=(), missing_ids=()) -> Counter:
+        """
+        Sparse co-occurrence increments contributed by the new enrollments:
+        those in (since_id, until_id] plus `late_ids` (below since_id, but
+        committed after an earlier build passed them). A pair is counted
+        when at least one of its enrollments is new, so each pair is counted
+        exactly once across incremental runs. `missing_ids` (not visible to
+        this build) are left out of every basket, even if they commit while
+        it runs: they are new to a later build.
+        """
+        late_ids, missing_ids = set(late_ids), set(missing_ids)
+        delta: Counter = Counter()
+        new_users = (
+            Enrollment.objects.filter(Q(pk__gt=since_id, pk__lte=until_id) | Q(pk__in=late_ids))
+            .order_by("user_id").values_list("user_id", flat=True).distinct()
+        )
+        user_iter = new_users.iterator(chunk_size=USER_CHUNK)
+        while chunk := list(itertools.islice(user_iter, USER_CHUNK)):
+            baskets = defaultdict(list)
+            for user_id, enrollment_id, course_id in (
+                Enrollment.objects.filter(user_id__in=chunk, pk__lte=until_id)
+                .values_list("user_id", "pk", "course_id")
+            ):
+                if enrollment_id not in missing_ids:
+                    baskets[user_id].append((enrollment_id > since_id or enrollment_id in late_ids, course_id))
+            for basket in baskets.values():
+                for (new1, c1), (new2, c2) in itertools.combinations(basket, 2):
+                    if new1 or new2:
+                        delta[(c1, c2)] += 1
+                        delta[(c2, c1)] += 1
+        return delta
+
+    @staticmethod
+    def _missing_ids(since_id: int, until_id: int) -> set[int]:
+        """Ids in (since_id, until_id], within GAP_WINDOW of until_id, that no visible enrollment has."""
+        start = max(since_id, until_id - GAP_WINDOW)
+        present = Enrollment.objects.filter(pk__gt=start, pk__lte=until_id).values_list("pk", flat=True)
+        return set(range(start + 1, until_id + 1)) - set(present)
+
+    @staticmethod
+    def _apply_delta(delta: Counter) -> None:
+        sources = {a for a, _ in delta}
+        existing = {
+            (row.course_a_id, row.course_b_id): row
+            for row in CourseCooccurrence.objects.filter(course_a_id__in=sources)
+        }
+        to_update, to_create = [], []
+        for (a, b), increment in delta.items():
+            row = existing.get((a, b))
+            if row is None:
+                to_create.append(CourseCooccurrence(course_a_id=a, course_b_id=b, count=increment))
+            else:
+                row.count += increment
+                to_update.append(row)
+        CourseCooccurrence.objects.bulk_update(to_update, ["count"], batch_size=1000)
+        CourseCooccurrence.objects.bulk_create(to_create, batch_size=1000)
+
+    @staticmethod
+    def rerank(course_ids, top_k: int = DEFAULT_TOP_K) -> int:
+        """Recompute the stored top-K list for `course_ids`. Returns rows written."""
+        course_ids = set(course_ids)
+        neighbours = defaultdict(list)
+        for a, b, count in CourseCooccurrence.objects.filter(course_a_id__in=course_ids).values_list(
+            "course_a_id", "course_b_id", "count",
+        ):
+            neighbours[a].append((b, count))
+
+        involved = course_ids | {b for rows in neighbours.values() for b, _ in rows}
+        sizes = dict(
+            Enrollment.objects.filter(course_id__in=involved)
+            .values("course_id").annotate(n=Count("id")).values_list("course_id", "n")
+        )
+
+        recs = []
+        for a, rows in neighbours.items():
+            scored = (
+                (count / math.sqrt(sizes.get(a, 1) * sizes.get(b, 1)), b)
+                for b, count in rows
+            )
+            for rank, (score, b) in enumerate(heapq.nlargest(top_k, scored), start=1):
+                recs.append(CourseRecommendation(course_id=a, recommended_id=b, rank=rank, score=score))
+
+        CourseRecommendation.objects.filter(course_id__in=course_ids).delete()
+        CourseRecommendation.objects.bulk_create(recs, batch_size=1000)
+        return len(recs)
+
+    @classmethod
+    def build(cls, full: bool = False, top_k: int = DEFAULT_TOP_K) -> dict:
+        """Fold new enrollments into the matrix and re-rank affected courses."""
+        with transaction.atomic():
+            state, _ = RecommendationBuild.objects.select_for_update().get_or_create(pk=1)
+            if full:
+                CourseCooccurrence.objects.all().delete()
+                CourseRecommendation.objects.all().delete()
+                state.last_enrollment_id, state.pending_ids = 0, []
+
+            since_id = state.last_enrollment_id
+            until_id = max(Enrollment.objects.aggregate(m=Max("pk"))["m"] or 0, since_id)
+            pending = set(state.pending_ids)
+            late = set(Enrollment.objects.filter(pk__in=pending).values_list("pk", flat=True)) if pending else set()
+            missing = {pk for pk in pending - late if pk > until_id - GAP_WINDOW} | cls._missing_ids(since_id, until_id)
+            delta = cls.cooccurrence_delta(since_id, until_id, late_ids=late, missing_ids=missing)
+            cls._apply_delta(delta)
+            affected = {a for a, _ in delta}
+            written = cls.rerank(affected, top_k=top_k) if affected else 0
+
+            state.last_enrollment_id = until_id
+            state.pending_ids = sorted(missing)
+            state.built_at = timezone.now()
+            state.save()
+        return {"pairs": len(delta), "courses": len(affected), "recommendations": written}
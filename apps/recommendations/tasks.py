@@ -0,0 +1,8 @@
+from apps.jobs.models import Job
+from apps.jobs.registry import task
+from .services import RecommendationService
+
+
+@task(priority=Job.Priority.LOW)
+def build_recommendations(full: bool = False):
+    RecommendationService.build(full=full)
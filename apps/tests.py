@@ -6,15 +6,51 @@ Strategy:
 - View tests: integration via Django test client
 - Focus on critical paths: enrollment, progress tracking, access control
 """
+import json
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 
+from apps.accounts.backends import user_cache_key
+from apps.core import metrics
+from apps.core.caching import get_or_build
+from apps.core.filecache import LockingFileBasedCache
+from apps.core.loadshed import parse_request_start, worker_load
+from apps.core.profiling import ProfileStore, ProfilingMiddleware
 from apps.courses.models import Course, Lesson
+from apps.courses import caching, typeahead, views as course_views
+from apps.courses.services import CatalogService, CourseService
 from apps.enrollments.models import Enrollment
 from apps.enrollments.services import EnrollmentService
-from apps.progress.models import LessonProgress
+from apps.progress.heartbeats import heartbeat_buffer, merge_intervals
+from apps.progress.models import CourseProgress, LessonProgress, ProgressDistribution
 from apps.progress.services import ProgressService
+from apps.progress.sharding import jump_hash, shard_for
+from apps.jobs.models import Job
+from apps.jobs.registry import task
+from apps.jobs.services import JobService
+from apps.recommendations.models import CourseCooccurrence, RecommendationBuild
+from apps.recommendations.services import RecommendationService
 
 User = get_user_model()
 
@@ -129,6 +165,445 @@ class ProgressServiceTests(TestCase):
         self.assertIsInstance(ids, set)
         self.assertIn(self.lesson.id, ids)
 
+    def test_mark_visited_denormalizes_course(self):
+        progress = ProgressService.mark_visited(self.user, self.lesson)
+        self.assertEqual(progress.course_id, self.course.id)
+
+    def test_visited_ids_query_is_index_only(self):
+        qs = LessonProgress.objects.filter(user=self.user, course=self.course).values_list("lesson_id", flat=True)
+        plan = qs.explain()
+        self.assertIn("COVERING INDEX progress_user_course_lesson", plan)
+        self.assertNotIn("courses_lesson", str(qs.query))
+
+    def test_moving_lesson_moves_progress(self):
+        ProgressService.mark_visited(self.user, self.lesson)
+        other = Course.objects.create(title="O", short_description="S", description="D")
+        self.lesson.course = other
+        self.lesson.save()
+        self.assertEqual(ProgressService.get_visited_ids(self.user, other), {self.lesson.id})
+        self.assertEqual(ProgressService.get_visited_ids(self.user, self.course), set())
+
+
+class ProgressDistributionTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Funnel", short_description="S", description="D")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", order=i) for i in range(3)]
+        self.users = [User.objects.create_user(username=f"f{i}", password="pass123") for i in range(3)]
+        for user in self.users:
+            EnrollmentService.enroll(user, self.course)
+
+    def visit(self):
+        with self.captureOnCommitCallbacks(execute=True):  # the distribution is updated after commit
+            ProgressService.mark_visited(self.users[0], self.lessons[0])
+            ProgressService.mark_visited(self.users[0], self.lessons[1])
+            ProgressService.mark_visited(self.users[1], self.lessons[0])
+            ProgressService.mark_visited(self.users[1], self.lessons[0])  # revisit: no change
+
+    def summary(self) -> tuple[list, list]:
+        self.course.refresh_from_db()
+        with self.assertNumQueries(1):
+            distribution = ProgressService.distribution(self.course, self.lessons)
+        return (
+            [(lesson.title, n, percent) for lesson, n, percent in distribution["reached"]],
+            [(visited, n) for visited, n, _ in distribution["histogram"]],
+        )
+
+    def test_first_visits_update_one_bucket_each(self):
+        self.visit()
+        reached, histogram = self.summary()
+        self.assertEqual(reached, [("L0", 2, 67), ("L1", 1, 33), ("L2", 0, 0)])
+        self.assertEqual(histogram, [(0, 1), (1, 1), (2, 1), (3, 0)])
+
+        self.client.login(username="f0", password="pass123")
+        self.users[0].is_staff = True
+        self.users[0].save()
+        response = self.client.get(reverse("courses:manage_course_detail", kwargs={"pk": self.course.pk}))
+        self.assertContains(response, "How far learners get")
+        self.assertContains(response, "2 <span class=\"muted\">(67%)</span>")
+
+    def test_recompute_corrects_drift(self):
+        self.visit()
+        incremental = self.summary()
+        LessonProgress.objects.filter(user=self.users[0], lesson=self.lessons[1]).delete()
+        call_command("recompute_progress_distribution", stdout=StringIO())
+        reached, histogram = self.summary()
+        self.assertEqual(reached[:2], [("L0", 2, 67), ("L1", 0, 0)])
+        self.assertEqual(histogram[:3], [(0, 1), (1, 2), (2, 0)])
+        self.assertNotEqual((reached, histogram), incremental)
+
+    @override_settings(PROGRESS_STORAGE="bitmap")
+    def test_recompute_from_bitmaps_matches_incremental(self):
+        self.visit()
+        incremental = self.summary()
+        ProgressService.recompute_distribution(self.course)
+        self.assertEqual(self.summary(), incremental)
+
+    def test_concurrent_first_visits_count_once(self):
+        # Two tabs both read the lesson as unvisited before either records it
+        for storage in ("rows", "bitmap"):
+            with self.subTest(storage), self.settings(PROGRESS_STORAGE=storage):
+                user = self.users[0 if storage == "rows" else 1]
+                for _ in range(2):
+                    with self.captureOnCommitCallbacks(execute=True):
+                        ProgressService.mark_visited(user, self.lessons[2], visited_ids=set())
+        reached, histogram = self.summary()
+        self.assertEqual(reached[2], ("L2", 2, 67))
+        self.assertEqual(histogram[:3], [(0, 1), (1, 2), (2, 0)])
+
+    def test_bucket_comes_from_the_write_not_the_pages_read(self):
+        for storage in ("rows", "bitmap"):
+            with self.subTest(storage), self.settings(PROGRESS_STORAGE=storage):
+                user = self.users[0 if storage == "rows" else 1]
+                before = list(ProgressDistribution.objects.values_list("histogram", flat=True))
+                with self.captureOnCommitCallbacks(execute=True):
+                    ProgressService.mark_visited(user, self.lessons[0])
+                    # Another tab read the course before the first visit committed
+                    ProgressService.mark_visited(user, self.lessons[1], visited_ids=set())
+                    # Not counted until commit
+                    self.assertEqual(list(ProgressDistribution.objects.values_list("histogram", flat=True)), before)
+        reached, histogram = self.summary()
+        self.assertEqual(reached[:2], [("L0", 2, 67), ("L1", 2, 67)])
+        self.assertEqual(histogram[:3], [(0, 1), (1, 0), (2, 2)])
+
+
+@override_settings(PROGRESS_STORAGE="bitmap")
+class BitmapProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bea", password="pass123")
+        self.course = Course.objects.create(title="T", short_description="S", description="D")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", order=i) for i in range(70)]
+
+    def test_slots_are_stable_and_per_course(self):
+        self.assertEqual([lesson.slot for lesson in self.lessons], list(range(70)))
+        self.lessons[0].order = 99
+        self.lessons[0].save()
+        self.assertEqual(self.lessons[0].slot, 0)
+        other = Course.objects.create(title="O", short_description="S", description="D")
+        self.assertEqual(Lesson.objects.create(course=other, title="X").slot, 0)
+
+    def test_slot_is_picked_under_the_course_lock(self):
+        select_for_update, locks = QuerySet.select_for_update, []
+
+        def record(queryset, *args, **kwargs):
+            locks.append((queryset.model, connection.in_atomic_block))
+            return select_for_update(queryset, *args, **kwargs)
+
+        other = Course.objects.create(title="O", short_description="S", description="D")
+        with mock.patch.object(QuerySet, "select_for_update", autospec=True, side_effect=record):
+            self.lessons[0].save()  # no new slot, no lock
+            Lesson.objects.create(course=self.course, title="New")
+            self.lessons[1].course = other
+            self.lessons[1].save()
+        self.assertEqual(locks, [(Course, True), (Course, True)])
+        self.assertEqual(self.lessons[1].slot, 0)
+
+    def test_visits_are_bits(self):
+        for lesson in (self.lessons[1], self.lessons[64], self.lessons[1]):
+            self.assertIsNone(ProgressService.mark_visited(self.user, lesson))
+        self.assertFalse(LessonProgress.objects.exists())
+        self.assertEqual(
+            sorted(CourseProgress.objects.values_list("word", "bits")), [(0, 1 << 1), (1, 1 << 1)],
+        )
+        self.assertEqual(
+            ProgressService.get_visited_ids(self.user, self.course), {self.lessons[1].pk, self.lessons[64].pk},
+        )
+        self.assertEqual(ProgressService.visited_counts(self.user, [self.course.pk]), {self.course.pk: 2})
+
+    def test_sidebar_reads_bitmap(self):
+        EnrollmentService.enroll(self.user, self.course)
+        ProgressService.mark_visited(self.user, self.lessons[2])
+        self.client.login(username="bea", password="pass123")
+        response = self.client.get(self.lessons[5].get_absolute_url())
+        self.assertEqual(response.context["visited_ids"], {self.lessons[2].pk, self.lessons[5].pk})
+
+    def test_moved_lesson_keeps_its_visits(self):
+        ProgressService.mark_visited(self.user, self.lessons[3])
+        other = Course.objects.create(title="O", short_description="S", description="D")
+        Lesson.objects.create(course=other, title="X")
+        lesson = Lesson.objects.get(pk=self.lessons[3].pk)
+        lesson.course = other
+        lesson.save()
+        self.assertEqual(lesson.slot, 1)
+        self.assertEqual(ProgressService.get_visited_ids(self.user, other), {lesson.pk})
+        self.assertEqual(ProgressService.get_visited_ids(self.user, self.course), set())
+
+    def test_purged_slot_is_not_inherited(self):
+        last = self.lessons[-1]
+        ProgressService.mark_visited(self.user, last)
+        CourseService.tombstone_lesson(last)
+        CourseService.purge_deleted()
+        newcomer = Lesson.objects.create(course=self.course, title="New")
+        self.assertEqual(newcomer.slot, last.slot)
+        self.assertEqual(ProgressService.get_visited_ids(self.user, self.course), set())
+
+    def test_conversion_round_trip(self):
+        visited = {self.lessons[i].pk for i in (0, 5, 63, 69)}
+        with self.settings(PROGRESS_STORAGE="rows"):
+            for pk in visited:
+                ProgressService.mark_visited(self.user, Lesson.objects.get(pk=pk))
+        self.assertEqual(ProgressService.rows_to_bitmap(batch_size=3, prune=True), 4)
+        self.assertFalse(LessonProgress.objects.exists())
+        self.assertEqual(ProgressService.get_visited_ids(self.user, self.course), visited)
+
+        self.assertEqual(ProgressService.bitmap_to_rows(), 4)
+        with self.settings(PROGRESS_STORAGE="rows"):
+            self.assertEqual(ProgressService.get_visited_ids(self.user, self.course), visited)
+
+
+# Development and production settings both define two shard databases for
+# test runs; a settings module that does not is skipped below
+SHARDS = [alias for alias in ("progress_0", "progress_1") if alias in settings.DATABASES]
+
+
+class JumpHashTests(SimpleTestCase):
+    def test_jump_hash_only_moves_keys_to_the_new_shard(self):
+        before = [jump_hash(key, 4) for key in range(2000)]
+        after = [jump_hash(key, 5) for key in range(2000)]
+        moved = [key for key in range(2000) if before[key] != after[key]]
+        self.assertEqual(set(before), {0, 1, 2, 3})
+        self.assertTrue(all(after[key] == 4 for key in moved))
+        self.assertLess(len(moved), 2000 * 0.3)
+
+
+@skipUnless(len(SHARDS) == 2, "needs the progress_0 and progress_1 databases")
+@override_settings(PROGRESS_SHARDS=SHARDS)
+class ShardingTests(TestCase):
+    databases = {"default", *SHARDS}
+
+    def setUp(self):
+        self.course = Course.objects.create(title="T", short_description="S", description="D")
+        self.lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", order=i) for i in range(3)]
+        # Fixed ids, so both shards get users whatever ran before
+        self.users = [User.objects.create_user(id=100 + i, username=f"u{i}", password="pass123") for i in range(6)]
+        self.assertEqual({shard_for(user.pk) for user in self.users}, set(SHARDS))
+
+    def rows_on(self, db, model=LessonProgress):
+        return set(model.objects.using(db).values_list("user_id", flat=True))
+
+    def test_visits_land_on_the_users_shard(self):
+        for user in self.users:
+            EnrollmentService.enroll(user, self.course)
+            ProgressService.mark_visited(user, self.lessons[0])
+        for db in SHARDS:
+            self.assertEqual(self.rows_on(db), {user.pk for user in self.users if shard_for(user.pk) == db})
+        self.assertFalse(LessonProgress.objects.exists())  # "default" holds none
+        user = self.users[0]
+        self.assertEqual(ProgressService.get_visited_ids(user, self.course), {self.lessons[0].pk})
+        self.assertEqual(ProgressService.visited_counts(user, [self.course.pk]), {self.course.pk: 1})
+        self.assertEqual(Enrollment.objects.get(user=user).next_lesson_id, self.lessons[1].pk)
+
+    def test_watch_batch_is_split_by_shard(self):
+        ProgressService.record_watch_batch({
+            (user.pk, self.lessons[0].pk): {"course_id": self.course.pk, "intervals": [[0, 10]], "duration": 100}
+            for user in self.users
+        })
+        for user in self.users:
+            progress = LessonProgress.objects.using(shard_for(user.pk)).get(user=user)
+            self.assertEqual(progress.watch_time_seconds, 10)
+
+    def test_course_export_reads_every_shard(self):
+        staff = User.objects.create_user(username="staff", password="pass123", is_staff=True)
+        for user in self.users:
+            ProgressService.mark_visited(user, self.lessons[1])
+        self.assertEqual([row[0] for row in ProgressService.course_export(self.course)], [u.pk for u in self.users])
+        self.client.force_login(staff)
+        response = self.client.get(reverse("courses:manage_course_progress_export", args=[self.course.pk]))
+        lines = response.content.decode().splitlines()
+        self.assertEqual(len(lines), 1 + len(self.users))
+        self.assertIn(",u0,", lines[1])
+
+    def test_purge_and_user_delete_clear_shards(self):
+        for user in self.users:
+            ProgressService.mark_visited(user, self.lessons[0])
+            ProgressService.mark_visited(user, self.lessons[1])
+        CourseService.tombstone_lesson(self.lessons[0])
+        CourseService.purge_deleted()
+        self.assertEqual(sum(LessonProgress.objects.using(db).count() for db in SHARDS), len(self.users))
+        user_id = self.users[0].pk
+        self.users[0].delete()
+        self.assertNotIn(user_id, self.rows_on(shard_for(user_id)))
+
+    def test_profiles_count_shard_queries(self):
+        def view(request):
+            list(User.objects.all()[:1])
+            list(LessonProgress.objects.using(SHARDS[1]).all()[:1])
+            return HttpResponse("ok")
+
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        request = RequestFactory().get("/", HTTP_X_PROFILE="1")
+        request.user = User.objects.create_user(username="prof", password="pass123", is_staff=True)
+        with self.settings(PROFILING_DIR=profile_dir):
+            ProfilingMiddleware(view)(request)
+            [meta] = ProfileStore().list()
+        self.assertEqual(meta["sql_count"], 2)
+
+    def test_rebalance_moves_rows_and_keeps_visit_times(self):
+        with self.settings(PROGRESS_SHARDS=[]):
+            for user in self.users:
+                ProgressService.mark_visited(user, self.lessons[0])
+            with self.settings(PROGRESS_STORAGE="bitmap"):
+                ProgressService.mark_visited(self.users[0], self.lessons[2])
+        visited_at = dict(LessonProgress.objects.values_list("user_id", "first_visited_at"))
+        call_command("rebalance_progress", stdout=StringIO())
+        self.assertFalse(LessonProgress.objects.exists())
+        self.assertFalse(CourseProgress.objects.exists())
+        for user in self.users:
+            progress = LessonProgress.objects.using(shard_for(user.pk)).get(user=user)
+            self.assertEqual(progress.first_visited_at, visited_at[user.pk])
+        self.assertEqual(self.rows_on(shard_for(self.users[0].pk), CourseProgress), {self.users[0].pk})
+
+        with self.settings(PROGRESS_SHARDS=SHARDS[:1]):
+            call_command("rebalance_progress", "--drain", SHARDS[1], stdout=StringIO())
+        self.assertEqual(self.rows_on(SHARDS[0]), {user.pk for user in self.users})
+        self.assertEqual(self.rows_on(SHARDS[1]), set())
+
+
+# ---------------------------------------------------------------------------
+# Watch-time heartbeat tests
+# ---------------------------------------------------------------------------
+
+class HeartbeatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="hana", password="pass123")
+        self.course = Course.objects.create(title="T", short_description="S", description="D")
+        self.lesson = Lesson.objects.create(
+            course=self.course, title="L1", video_url="https://cdn.example.com/v.mp4",
+        )
+        EnrollmentService.enroll(self.user, self.course)
+        self.client.login(username="hana", password="pass123")
+        heartbeat_buffer.flush()
+
+    def _post(self, intervals, duration=100):
+        return self.client.post(
+            reverse("progress:heartbeat"),
+            data={"lesson": self.lesson.pk, "intervals": intervals, "duration": duration},
+            content_type="application/json",
+        )
+
+    def test_merge_intervals_coalesces_overlaps(self):
+        self.assertEqual(
+            merge_intervals([[10, 20], [0, 5], [15, 30], [30.5, 40], [50, 60]]),
+            [[0.0, 5.0], [10.0, 40.0], [50.0, 60.0]],
+        )
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=3600)
+    def test_heartbeats_are_buffered_then_flushed_compactly(self):
+        self._post([[0, 30]])
+        self._post([[20, 60], [80, 95]])
+        self.assertFalse(LessonProgress.objects.exists())  # nothing written yet
+
+        heartbeat_buffer.flush()
+        progress = LessonProgress.objects.get(user=self.user, lesson=self.lesson)
+        self.assertEqual(progress.watched_intervals, [[0.0, 60.0], [80.0, 95.0]])
+        self.assertEqual(progress.watch_time_seconds, 75)
+        self.assertFalse(progress.completed)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=0)
+    def test_completion_derived_from_merged_coverage(self):
+        self._post([[0, 50]])
+        self._post([[45, 92]])  # 92% of 100s covered, rewatch counted once
+        progress = LessonProgress.objects.get(user=self.user, lesson=self.lesson)
+        self.assertTrue(progress.completed)
+
+    def test_unenrolled_user_rejected(self):
+        other = User.objects.create_user(username="ivan", password="pass123")
+        self.client.force_login(other)
+        self.assertEqual(self._post([[0, 10]]).status_code, 403)
+
+    def test_malformed_heartbeat_rejected(self):
+        self.assertEqual(self._post([[10, 5]]).status_code, 400)
+
+    @override_settings(HEARTBEAT_FLUSH_INTERVAL=0)
+    def test_failed_flush_still_accepts_and_keeps_the_batch(self):
+        with mock.patch.object(ProgressService, "record_watch_batch", side_effect=RuntimeError("db down")):
+            with self.assertLogs("apps.progress.views", "ERROR"):
+                self.assertEqual(self._post([[0, 30]]).status_code, 202)
+        self.assertEqual(len(heartbeat_buffer), 1)
+
+        heartbeat_buffer.flush()
+        progress = LessonProgress.objects.get(user=self.user, lesson=self.lesson)
+        self.assertEqual(progress.watched_intervals, [[0.0, 30.0]])
+
+    def test_flush_merges_into_a_row_created_concurrently(self):
+        # mark_visited inserts the row between the flush's SELECT and its INSERT
+        bulk_create = QuerySet.bulk_create
+
+        def visit_first(objs, **kwargs):
+            LessonProgress.objects.create(
+                user=self.user, lesson=self.lesson, course=self.course, watched_intervals=[[50.0, 60.0]],
+            )
+            return bulk_create(LessonProgress.objects.all(), objs, **kwargs)
+
+        heartbeat_buffer.add(self.user.pk, self.lesson.pk, self.course.pk, [[0, 30]], 100)
+        with mock.patch.object(QuerySet, "bulk_create", side_effect=visit_first):
+            heartbeat_buffer.flush()
+        progress = LessonProgress.objects.get(user=self.user, lesson=self.lesson)
+        self.assertEqual(progress.watched_intervals, [[0.0, 30.0], [50.0, 60.0]])
+        self.assertEqual(progress.watch_time_seconds, 40)
+
+
+# ---------------------------------------------------------------------------
+# JSON API tests
+# ---------------------------------------------------------------------------
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="judy", password="pass123")
+        self.courses = [
+            Course.objects.create(title=f"Course {i}", short_description="S", description="D" * 300)
+            for i in range(3)
+        ]
+        self.lesson = Lesson.objects.create(course=self.courses[0], title="L1", content="Secret notes")
+
+    def test_catalog_sparse_fields(self):
+        response = self.client.get(reverse("api:course_list"), {"fields": "id,title"})
+        self.assertEqual(response.status_code, 200)
+        for row in response.json()["results"]:
+            self.assertEqual(set(row), {"id", "title"})
+
+    def test_catalog_rejects_unknown_field(self):
+        response = self.client.get(reverse("api:course_list"), {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_catalog_cursor_pagination_walks_all_rows(self):
+        url, seen = reverse("api:course_list") + "?limit=2&fields=id", []
+        while url:
+            page = self.client.get(url).json()
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(sorted(seen), sorted(c.pk for c in self.courses))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_etag_returns_304_when_unchanged(self):
+        first = self.client.get(reverse("api:course_list"))
+        second = self.client.get(reverse("api:course_list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_responses_are_gzipped(self):
+        response = self.client.get(reverse("api:course_list"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    def test_outline_hides_lesson_content_until_enrolled(self):
+        url = reverse("api:course_detail", kwargs={"pk": self.courses[0].pk})
+        self.client.login(username="judy", password="pass123")
+        self.assertNotIn("content", self.client.get(url).json()["lessons"][0])
+
+        EnrollmentService.enroll(self.user, self.courses[0])
+        lessons = self.client.get(url, {"lesson_fields": "id,content"}).json()["lessons"]
+        self.assertEqual(lessons, [{"id": self.lesson.pk, "content": "Secret notes"}])
+
+    def test_me_endpoints_require_authentication(self):
+        self.assertEqual(self.client.get(reverse("api:my_enrollments")).status_code, 401)
+
+    def test_my_progress_lists_visited_lessons(self):
+        EnrollmentService.enroll(self.user, self.courses[0])
+        ProgressService.mark_visited(self.user, self.lesson)
+        self.client.login(username="judy", password="pass123")
+        data = self.client.get(reverse("api:my_progress", kwargs={"course_pk": self.courses[0].pk})).json()
+        self.assertEqual(data["visited_lesson_ids"], [self.lesson.pk])
+        self.assertEqual(data["lesson_count"], 1)
+
 
 # ---------------------------------------------------------------------------
 # Course + lesson view tests
@@ -161,6 +636,22 @@ class CourseViewTests(TestCase):
         response = self.client.get(reverse("courses:detail", kwargs={"pk": self.course.pk}))
         self.assertContains(response, "You are enrolled")
 
+    def test_catalog_badges_cost_two_queries(self):
+        lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", order=i) for i in range(4)]
+        other = Course.objects.create(title="Other", short_description="x", description="x")
+        EnrollmentService.enroll(self.user, self.course)
+        ProgressService.mark_visited(self.user, lessons[0])
+        with self.assertNumQueries(2):
+            courses = {c.pk: c for c in CatalogService.courses_for(self.user)}
+        self.assertTrue(courses[self.course.pk].is_enrolled)
+        self.assertEqual(courses[self.course.pk].progress_percent, 25)
+        self.assertFalse(courses[other.pk].is_enrolled)
+
+        self.client.login(username="carol", password="pass123")
+        response = self.client.get(reverse("courses:list"))
+        self.assertContains(response, "25% complete")
+        self.assertContains(response, "Enrolled", count=1)
+
 
 class LessonDetailViewTests(TestCase):
     def setUp(self):
@@ -196,6 +687,462 @@ class LessonDetailViewTests(TestCase):
         )
         self.assertTrue(LessonProgress.objects.filter(user=self.user, lesson=self.lesson).exists())
 
+    def test_resume_pointers_follow_visits(self):
+        second = Lesson.objects.create(course=self.course, title="Lesson 2", order=1)
+        third = Lesson.objects.create(course=self.course, title="Lesson 3", order=2)
+        EnrollmentService.enroll(self.user, self.course)
+        self.client.login(username="eve", password="pass123")
+
+        self.client.get(second.get_absolute_url())
+        enrollment = Enrollment.objects.get(user=self.user)
+        self.assertEqual((enrollment.last_lesson, enrollment.next_lesson), (second, third))
+
+        self.client.get(third.get_absolute_url())  # wraps to the unvisited first lesson
+        enrollment.refresh_from_db()
+        self.assertEqual((enrollment.last_lesson, enrollment.next_lesson), (third, self.lesson))
+
+        ProgressService.mark_visited(self.user, self.lesson)
+        enrollment.refresh_from_db()
+        self.assertEqual((enrollment.last_lesson, enrollment.next_lesson), (self.lesson, None))
+
+        CourseService.tombstone_lesson(self.lesson)
+        enrollment.refresh_from_db()
+        self.assertIsNone(enrollment.last_lesson)
+
+    def test_resume_links_in_one_query_per_page(self):
+        other = Course.objects.create(title="Other", short_description="S", description="D")
+        next_lesson = Lesson.objects.create(course=self.course, title="Lesson 2", order=1)
+        for course in (self.course, other):
+            EnrollmentService.enroll(self.user, course)
+        ProgressService.mark_visited(self.user, self.lesson)
+
+        with self.assertNumQueries(1):
+            enrollments = list(
+                EnrollmentService.user_enrollments(self.user).select_related("course", "last_lesson", "next_lesson")
+            )
+            [(e.last_lesson, e.next_lesson) for e in enrollments]
+        with self.assertNumQueries(1):
+            enrollment = EnrollmentService.get_enrollment(self.user, self.course)
+            self.assertEqual(enrollment.next_lesson.title, "Lesson 2")
+
+        self.client.login(username="eve", password="pass123")
+        response = self.client.get(reverse("courses:my_courses"))
+        self.assertContains(response, f'href="{next_lesson.get_absolute_url()}" class="btn-primary">Continue: Lesson 2')
+        response = self.client.get(reverse("courses:detail", kwargs={"pk": self.course.pk}))
+        self.assertContains(response, "Continue: Lesson 2")
+
+
+# ---------------------------------------------------------------------------
+# Typeahead tests
+# ---------------------------------------------------------------------------
+
+@override_settings(TYPEAHEAD_CHECK_INTERVAL=0)
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        typeahead.index._reset()
+        self.django = Course.objects.create(title="Intro to Django", short_description="S", description="D")
+        self.cafe = Course.objects.create(title="Café Déjà-vu", short_description="S", description="D")
+        Lesson.objects.create(course=self.cafe, title="Django templates")
+
+    def titles(self, query, **kwargs):
+        return [r["title"] for r in typeahead.search(query, **kwargs)]
+
+    def test_matches_word_prefixes_courses_first(self):
+        self.assertEqual(self.titles("DJAN"), ["Intro to Django", "Django templates"])
+        self.assertEqual(self.titles("cafe deja"), ["Café Déjà-vu"])
+        self.assertEqual(self.titles("to dj"), ["Intro to Django"])
+        self.assertEqual(self.titles("zzz"), [])
+        lesson = typeahead.search("templ")[0]
+        self.assertEqual((lesson["type"], lesson["course_title"]), ("lesson", "Café Déjà-vu"))
+
+    def test_picks_up_changes_incrementally(self):
+        self.titles("dj")  # build
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django.title = "Advanced Flask"
+            self.django.save()
+        self.assertEqual(self.titles("flask"), ["Advanced Flask"])
+        self.assertEqual(self.titles("dj"), ["Django templates"])
+        with self.captureOnCommitCallbacks(execute=True):
+            CourseService.tombstone(self.cafe)
+        self.assertEqual(self.titles("dj"), [])
+        self.assertEqual(len(typeahead.index.entries), 2)  # "advanced flask", "flask"
+
+    @override_settings(TYPEAHEAD_MAX_ENTRIES=6)
+    def test_entry_cap_drops_lessons(self):
+        self.assertEqual(self.titles("dj"), ["Intro to Django"])
+
+    def test_endpoint_needs_no_queries_when_warm(self):
+        url = reverse("api:typeahead")
+        self.client.get(url, {"q": "dj"})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"q": "dj", "limit": 1})
+        self.assertEqual(response.json()["results"][0]["url"], self.django.get_absolute_url())
+        self.assertEqual(self.client.get(url, {"q": "dj", "limit": "x"}).status_code, 400)
+
+    def test_lookup_is_well_under_a_millisecond(self):
+        Lesson.objects.bulk_create(
+            Lesson(course=self.django, title=f"Lesson {i} about topic {i % 97} and more", slot=i + 1)
+            for i in range(5000)
+        )
+        typeahead.index._reset()
+        self.titles("warm")
+        start = time.perf_counter()
+        for i in range(200):
+            typeahead.search(f"topic {i % 97}")
+        self.assertLess((time.perf_counter() - start) / 200, 1e-3)
+
+
+# ---------------------------------------------------------------------------
+# Page cache tests
+# ---------------------------------------------------------------------------
+
+class ContentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cara", password="pass123")
+        self.course = Course.objects.create(title="T", short_description="S", description="D")
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f"L{i}", order=i, content=f"Para {i}\n\nmore")
+            for i in range(3)
+        ]
+
+    def test_outline_is_cached_until_a_lesson_changes(self):
+        caching.outline(self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual([lesson.title for lesson in caching.outline(self.course.pk)], ["L0", "L1", "L2"])
+        self.lessons[1].title = "Renamed"
+        self.lessons[1].save()
+        self.assertEqual(caching.outline(self.course.pk)[1].title, "Renamed")
+        CourseService.tombstone_lesson(self.lessons[2])
+        self.assertEqual(len(caching.outline(self.course.pk)), 2)
+
+    def test_enrollment_set_is_cached_and_dropped_on_enroll(self):
+        self.assertFalse(EnrollmentService.is_enrolled(self.user, self.course))
+        with self.assertNumQueries(0):
+            self.assertFalse(EnrollmentService.is_enrolled(self.user, self.course))
+        EnrollmentService.enroll(self.user, self.course)
+        self.assertTrue(EnrollmentService.is_enrolled(self.user, self.course))
+
+    def test_lesson_page_renders_cached_body(self):
+        EnrollmentService.enroll(self.user, self.course)
+        self.client.login(username="cara", password="pass123")
+        response = self.client.get(self.lessons[0].get_absolute_url())
+        self.assertContains(response, "<p>Para 0</p>\n\n<p>more</p>", html=False)
+        self.assertIsNotNone(cache.get(caching.body_key(self.lessons[0])))
+
+    def test_warm_caches_fills_hot_entries(self):
+        EnrollmentService.enroll(self.user, self.course)
+        ProgressService.mark_visited(self.user, self.lessons[0])
+        cache.clear()
+        out = StringIO()
+        call_command("warm_caches", "--workers", "1", stdout=out)
+        self.assertIn("outlines: 1 entries", out.getvalue())
+        self.assertIn("course pages: 1 entries", out.getvalue())
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.course_page(self.course.pk)["course"], self.course)
+            caching.outline(self.course.pk)
+            CatalogService.cached_courses()
+            EnrollmentService.is_enrolled(self.user, self.course)
+        for lesson in self.lessons[:2]:  # visited, and where the learner resumes
+            self.assertIsNotNone(cache.get(caching.body_key(lesson)))
+        self.assertIsNone(cache.get(caching.body_key(self.lessons[2])))
+
+    def test_warm_caches_stops_at_its_budget(self):
+        EnrollmentService.enroll(self.user, self.course)
+        out = StringIO()
+        call_command("warm_caches", "--workers", "1", "--budget", "0", stdout=out)
+        self.assertIn("batches not done", out.getvalue())
+        self.assertIsNone(cache.get(caching.outline_key(self.course.pk)))
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title="Busy", short_description="S", description="D")
+        Lesson.objects.create(course=self.course, title="L1")
+
+    def _get_concurrently(self, path: str, clients: int) -> list:
+        """`clients` anonymous GETs of course_detail started at once, sharing this test's connection."""
+        conn, barrier, responses = connections["default"], threading.Barrier(clients), []
+
+        def get():
+            connections["default"] = conn
+            request = RequestFactory().get(path)
+            request.user = AnonymousUser()
+            barrier.wait()
+            responses.append(course_views.course_detail(request, pk=self.course.pk))
+
+        threads = [threading.Thread(target=get) for _ in range(clients)]
+        conn.inc_thread_sharing()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            conn.dec_thread_sharing()
+        return responses
+
+    def test_concurrent_misses_build_the_course_page_once(self):
+        queries = []
+        for clients in (1, 4, 16):
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                responses = self._get_concurrently(self.course.get_absolute_url(), clients)
+            self.assertEqual([response.status_code for response in responses], [200] * clients)
+            queries.append(len(captured))
+        self.assertEqual(queries, [queries[0]] * 3)
+
+    def test_stale_entry_is_served_while_another_caller_rebuilds(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return len(builds)
+
+        self.assertEqual(get_or_build("test", "flight", build, timeout=60), 1)
+        value, refresh_at, _ = cache.get("flight")
+        cache.set("flight", (value, refresh_at, 1e9))  # a very slow build: refresh long before expiry
+        cache.add("flight:building", True)
+        self.assertEqual(get_or_build("test", "flight", build, timeout=60), 1)  # someone else is on it
+        cache.delete("flight:building")
+        self.assertEqual(get_or_build("test", "flight", build, timeout=60), 2)  # early refresh
+        self.assertEqual(get_or_build("test", "flight", build, timeout=60), 2)
+
+
+class LockingFileCacheTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.cache = LockingFileBasedCache(self.dir, {})
+
+    def _race(self, func, threads: int = 8) -> list:
+        barrier, results = threading.Barrier(threads), []
+
+        def run():
+            barrier.wait()
+            results.append(func())
+
+        workers = [threading.Thread(target=run) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
+
+    def test_add_has_exactly_one_winner(self):
+        for attempt in range(5):
+            self.assertEqual(self._race(lambda: self.cache.add(f"lock-{attempt}", True, 30)).count(True), 1)
+
+    def test_incr_loses_no_bumps(self):
+        self.cache.set("version", 0)
+        self._race(lambda: [self.cache.incr("version") for _ in range(25)])
+        self.assertEqual(self.cache.get("version"), 200)
+
+
+# ---------------------------------------------------------------------------
+# Course counter tests
+# ---------------------------------------------------------------------------
+
+class CourseCounterTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title="Counted", short_description="S", description="D")
+        self.other = Course.objects.create(title="Other", short_description="S", description="D")
+        self.users = [User.objects.create_user(username=f"n{i}", password="pass123") for i in range(3)]
+
+    def counts(self, course: Course) -> tuple[int, int]:
+        course.refresh_from_db(fields=["enrollment_count", "lesson_count"])
+        return course.enrollment_count, course.lesson_count
+
+    def test_counters_follow_enrollment_and_lesson_writes(self):
+        lessons = [Lesson.objects.create(course=self.course, title=f"L{i}") for i in range(3)]
+        EnrollmentService.enroll(self.users[0], self.course)
+        EnrollmentService.enroll(self.users[0], self.course)  # already enrolled
+        EnrollmentService.enroll_users(self.course, [user.pk for user in self.users])
+        self.assertEqual(self.counts(self.course), (3, 3))
+
+        CourseService.tombstone_lesson(lessons[0])
+        CourseService.tombstone_lesson(lessons[0])
+        lessons[1].course = self.other
+        lessons[1].save()
+        lessons[1].save()
+        self.users[2].delete()
+        self.assertEqual(self.counts(self.course), (2, 1))
+        self.assertEqual(self.counts(self.other), (0, 1))
+        self.assertEqual(self.counts(CourseService.duplicate(self.course)), (0, 1))
+
+    def test_bulk_enroll_counts_only_its_own_inserts(self):
+        EnrollmentService.enroll(self.users[0], self.course)
+        EnrollmentService.enroll(self.users[1], self.course)
+        filter_ = Enrollment.objects.filter
+        reads = iter([lambda qs: qs.exclude(user=self.users[1])])  # enrolled just after the first check
+
+        def racing_filter(*args, **kwargs):
+            return next(reads, lambda qs: qs)(filter_(*args, **kwargs))
+
+        with mock.patch.object(Enrollment.objects, "filter", side_effect=racing_filter):
+            added = EnrollmentService.enroll_users(self.course, [user.pk for user in self.users])
+        self.assertEqual(added, 1)
+        self.assertEqual(self.counts(self.course)[0], 3)
+
+    def test_reconcile_counters_repairs_drift(self):
+        Lesson.objects.create(course=self.course, title="L")
+        EnrollmentService.enroll(self.users[0], self.course)
+        Course.objects.filter(pk=self.course.pk).update(enrollment_count=7)
+        Course.objects.filter(pk=self.other.pk).update(lesson_count=-1)
+
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("Would fix 2 counters on 2 courses", out.getvalue())
+        self.assertEqual(self.counts(self.course), (7, 1))
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn(f"course {self.course.pk} enrollment_count: 7 → 1", out.getvalue())
+        self.assertEqual((self.counts(self.course), self.counts(self.other)), ((1, 1), (0, 0)))
+        self.assertEqual(CourseService.reconcile_counters(), [])
+
+    def test_purge_does_not_count_down_the_purged_course(self):
+        EnrollmentService.enroll_users(self.course, [user.pk for user in self.users])
+        EnrollmentService.enroll(self.users[0], self.other)
+        CourseService.tombstone(self.course)
+        with CaptureQueriesContext(connection) as queries:
+            CourseService.purge_deleted(batch_size=2)
+        self.assertFalse(Enrollment.objects.filter(course_id=self.course.pk).exists())
+        bumps = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "courses_course"')]
+        self.assertEqual(bumps, [])
+        self.users[0].delete()  # other deletes still count
+        self.assertEqual(self.counts(self.other), (0, 0))
+
+
+# ---------------------------------------------------------------------------
+# Public (shared-cache) page tests
+# ---------------------------------------------------------------------------
+
+class CachingProxy:
+    """
+    Stand-in for a reverse proxy cache in front of the app. Stores GET
+    responses marked `public` with an s-maxage that set no cookie and do
+    not vary on Cookie; passes requests with a session cookie through; and
+    evicts a path when it receives `PURGE <path>` over real HTTP.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.store = {}
+        self.hits = 0
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PURGE(self):
+                self.send_response(200 if proxy.store.pop(self.path, None) else 404)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path):
+        if settings.SESSION_COOKIE_NAME in self.client.cookies:
+            return self.client.get(path)
+        cached = self.store.get(path)
+        if cached and cached[1] > time.monotonic():
+            self.hits += 1
+            return cached[0]
+        response = self.client.get(path)
+        directives = {part.strip().split("=")[0]: part.strip() for part in response.get("Cache-Control", "").split(",")}
+        if (
+            "public" in directives and "s-maxage" in directives and not response.cookies
+            and "cookie" not in response.get("Vary", "").lower()
+        ):
+            self.store[path] = (response, time.monotonic() + int(directives["s-maxage"].split("=")[1]))
+        return response
+
+
+@override_settings(PUBLIC_CACHE_SECONDS=60)
+class PublicCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title="Public", short_description="S", description="D")
+        Lesson.objects.create(course=self.course, title="L1")
+        self.user = User.objects.create_user(username="dora", password="pass123")
+        self.proxy = CachingProxy(self.client)
+        self.addCleanup(self.proxy.close)
+
+    def test_anonymous_pages_are_shared_cacheable(self):
+        for url in (reverse("courses:list"), self.course.get_absolute_url()):
+            response = self.client.get(url)
+            self.assertEqual(response["Cache-Control"], "public, max-age=0, s-maxage=60")
+            self.assertNotIn("Cookie", response.get("Vary", ""))
+            self.assertFalse(response.cookies)
+            self.assertNotContains(response, "csrfmiddlewaretoken")
+
+    def test_logged_in_pages_are_private(self):
+        self.client.login(username="dora", password="pass123")
+        response = self.client.get(self.course.get_absolute_url())
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        self.assertContains(response, "dora")
+
+    def test_proxy_serves_page_until_a_change_purges_it(self):
+        url = self.course.get_absolute_url()
+        self.proxy.get(url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.proxy.get(url), "Public")
+        self.assertEqual(self.proxy.hits, 1)
+
+        with self.settings(PUBLIC_CACHE_PURGE_URLS=[self.proxy.url]):
+            self.course.title = "Renamed"
+            self.course.save()
+            call_command("run_worker", burst=True, stdout=StringIO())
+        self.assertNotIn(url, self.proxy.store)
+        self.assertContains(self.proxy.get(url), "Renamed")
+
+        self.client.login(username="dora", password="pass123")
+        self.assertContains(self.proxy.get(url), "dora")  # bypasses the shared copy
+
+
+class StaticSiteExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.courses = [
+            Course.objects.create(title=f"Static {i}", short_description="S", description="D") for i in range(2)
+        ]
+        self.lesson = Lesson.objects.create(course=self.courses[0], title="First steps")
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def export(self) -> str:
+        out = StringIO()
+        call_command("export_static_site", "--output", str(self.root), "--workers", "1", stdout=out)
+        return out.getvalue()
+
+    def test_exports_anonymous_pages_and_rerenders_only_changes(self):
+        self.assertIn("3 pages rendered, 0 reused", self.export())
+        current = self.root / "current"
+        first = current.resolve()
+        self.assertIn("Static 0", (current / "index.html").read_text())
+        page = (current / str(self.courses[0].pk) / "index.html").read_text()
+        self.assertIn("First steps", page)
+        self.assertIn("Log in to enroll", page)
+
+        self.assertIn("1 pages rendered, 2 reused", self.export())
+        self.assertEqual(current.resolve(), first)  # same contents, same directory
+
+        self.lesson.title = "Renamed steps"
+        self.lesson.save()
+        CourseService.tombstone(self.courses[1])
+        self.assertIn("2 pages rendered, 0 reused", self.export())
+        self.assertNotEqual(current.resolve(), first)
+        self.assertIn("Renamed steps", (current / str(self.courses[0].pk) / "index.html").read_text())
+        self.assertFalse((current / str(self.courses[1].pk)).exists())
+
 
 # ---------------------------------------------------------------------------
 # Staff management view tests
@@ -266,3 +1213,565 @@ class StaffManagementTests(TestCase):
         # Form should re-render with errors, not redirect
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Could not extract a YouTube video ID")
+
+    def test_duplicate_course_copies_lessons_in_a_few_queries(self):
+        urls = ["https://youtu.be/dQw4w9WgXcQ", "https://cdn.example.com/v.mp4", ""]
+        for i in range(200):
+            Lesson.objects.create(course=self.course, title=f"L{i}", order=i, video_url=urls[i % 3])
+        with self.assertNumQueries(7):  # SELECT lessons, INSERT course, 3 lesson batches (SQLite) + savepoint pair
+            clone = CourseService.duplicate(self.course)
+        self.assertEqual(clone.title, f"{self.course.title} (copy)")
+        copied = list(clone.lessons.all())
+        self.assertEqual([l.title for l in copied], [f"L{i}" for i in range(200)])
+        self.assertEqual([l.video_type for l in copied[:3]], ["youtube", "direct", "none"])
+
+    def test_course_delete_tombstones_then_purges_in_batches(self):
+        lessons = [Lesson.objects.create(course=self.course, title=f"L{i}", order=i) for i in range(3)]
+        student = User.objects.create_user(username="s1", password="pass123")
+        EnrollmentService.enroll(student, self.course)
+        for lesson in lessons:
+            ProgressService.mark_visited(student, lesson)
+
+        self.client.login(username="staff", password="pass123")
+        self.client.post(reverse("courses:manage_course_delete", kwargs={"pk": self.course.pk}))
+        self.assertFalse(Lesson.objects.filter(course_id=self.course.pk).exists())
+        self.assertEqual(LessonProgress.objects.count(), 3)  # nothing purged in the request
+        self.assertFalse(EnrollmentService.user_enrollments(student).exists())
+
+        out = StringIO()
+        call_command("purge_deleted", batch_size=2, stdout=out)
+        self.assertIn("Purged 8 rows", out.getvalue())
+        self.assertFalse(Course.all_objects.filter(pk=self.course.pk).exists())
+        self.assertFalse(Lesson.all_objects.exists())
+        self.assertFalse(Enrollment.objects.exists() or LessonProgress.objects.exists())
+
+    def test_lesson_delete_uses_the_same_path(self):
+        keep, gone = (Lesson.objects.create(course=self.course, title=t) for t in ("Keep", "Gone"))
+        student = User.objects.create_user(username="s1", password="pass123")
+        ProgressService.mark_visited(student, keep)
+        ProgressService.mark_visited(student, gone)
+        self.client.login(username="staff", password="pass123")
+        self.client.post(reverse("courses:manage_lesson_delete", kwargs={"course_pk": self.course.pk, "pk": gone.pk}))
+        self.assertEqual(list(self.course.lessons.all()), [keep])
+
+        call_command("purge_deleted", stdout=StringIO())
+        self.assertEqual(list(LessonProgress.objects.values_list("lesson_id", flat=True)), [keep.pk])
+        self.assertTrue(Course.objects.filter(pk=self.course.pk).exists())
+
+    def test_staff_duplicate_action_redirects_to_copy(self):
+        self.client.login(username="staff", password="pass123")
+        response = self.client.post(reverse("courses:manage_course_duplicate", kwargs={"pk": self.course.pk}))
+        clone = Course.objects.exclude(pk=self.course.pk).get()
+        self.assertRedirects(response, reverse("courses:manage_course_detail", kwargs={"pk": clone.pk}))
+
+
+# ---------------------------------------------------------------------------
+# Session / user cache tests
+# ---------------------------------------------------------------------------
+
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="frank", password="pass123")
+        Course.objects.create(title="C", short_description="S", description="D")
+
+    def test_warm_request_needs_no_auth_queries(self):
+        self.client.login(username="frank", password="pass123")
+        self.client.get(reverse("courses:list"))  # warms the user cache
+        # Only the catalog query remains: no django_session / auth_user reads
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("courses:list"))
+        self.assertContains(response, "frank")
+
+    def test_password_change_invalidates_cached_user(self):
+        self.client.login(username="frank", password="pass123")
+        self.client.get(reverse("courses:list"))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+        self.user.set_password("new-pass-456")
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        # Old session hash no longer matches — the user is logged out
+        response = self.client.get(reverse("courses:list"))
+        self.assertContains(response, "Log in")
+
+    def test_logout_invalidates_cached_user(self):
+        self.client.login(username="frank", password="pass123")
+        self.client.get(reverse("courses:list"))
+        self.client.post(reverse("accounts:logout"))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_purge_sessions_removes_only_expired(self):
+        now = timezone.now()
+        Session.objects.create(session_key="a" * 32, session_data="", expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key="b" * 32, session_data="", expire_date=now - timedelta(days=2))
+        Session.objects.create(session_key="c" * 32, session_data="", expire_date=now + timedelta(days=1))
+        call_command("purge_sessions", batch_size=1, stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["c" * 32])
+
+
+# ---------------------------------------------------------------------------
+# Request profiling tests
+# ---------------------------------------------------------------------------
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        overrides = override_settings(
+            PROFILING_DIR=self.profile_dir.name, PROFILING_MAX_PROFILES=2, PROFILING_SAMPLE_RATE=0,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.staff = User.objects.create_user(username="kim", password="pass123", is_staff=True)
+        self.student = User.objects.create_user(username="lee", password="pass123")
+        Course.objects.create(title="C", short_description="S", description="D")
+
+    def test_staff_header_captures_profile(self):
+        self.client.login(username="kim", password="pass123")
+        response = self.client.get(reverse("courses:list"), HTTP_X_PROFILE="1")
+        self.assertIn("X-Profile-Id", response)
+        [meta] = ProfileStore().list()
+        self.assertEqual(meta["view"], "courses:list")
+        self.assertGreaterEqual(meta["sql_count"], 1)
+        self.assertGreater(meta["template_ms"], 0)
+
+    def test_unwritable_profile_dir_still_serves_the_request(self):
+        self.client.login(username="kim", password="pass123")
+        with mock.patch.object(ProfileStore, "save", side_effect=OSError(28, "No space left on device")):
+            with self.assertLogs("apps.core.profiling", "ERROR"):
+                response = self.client.get(reverse("courses:list"), HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_non_staff_cannot_trigger_profiling(self):
+        self.client.login(username="lee", password="pass123")
+        response = self.client.get(reverse("courses:list") + "?_profile=1")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(ProfileStore().list(), [])
+
+    def test_ring_buffer_is_bounded(self):
+        self.client.login(username="kim", password="pass123")
+        for _ in range(3):
+            self.client.get(reverse("courses:list"), HTTP_X_PROFILE="1")
+        self.assertEqual([m["id"] for m in ProfileStore().list()], [3, 2])
+
+    def test_profiles_command_lists_aggregates_and_diffs(self):
+        self.client.login(username="kim", password="pass123")
+        for _ in range(2):
+            self.client.get(reverse("courses:list"), HTTP_X_PROFILE="1")
+        out = StringIO()
+        call_command("profiles", "list", stdout=out)
+        call_command("profiles", "top", "--view", "courses:list", stdout=out)
+        call_command("profiles", "diff", "1", "2", stdout=out)
+        self.assertIn("courses:list", out.getvalue())
+        self.assertIn("Averaged over 2 request(s)", out.getvalue())
+
+
+# ---------------------------------------------------------------------------
+# Load shedding tests
+# ---------------------------------------------------------------------------
+
+class IsolatedMetricsMixin:
+    """Point the metrics store at a fresh directory and start this process from zero."""
+
+    def setUp(self):
+        super().setUp()
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        overrides = override_settings(METRICS_DIR=metrics_dir.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        metrics.registry._reset()
+
+
+@override_settings(LOAD_SHED_QUEUE_MS_LOW=100, LOAD_SHED_QUEUE_MS_HIGH=500, LOAD_SHED_MAX_IN_FLIGHT=0)
+class LoadSheddingTests(IsolatedMetricsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(setattr, worker_load, "queue_ms", 0.0)
+        self.staff = User.objects.create_user(username="ops", password="pass123", is_staff=True)
+        self.student = User.objects.create_user(username="stu", password="pass123")
+        self.course = Course.objects.create(title="C", short_description="S", description="D")
+        self.lesson = Lesson.objects.create(course=self.course, title="L", order=1)
+        EnrollmentService.enroll(self.student, self.course)
+        self.addCleanup(heartbeat_buffer.flush)
+
+    def _heartbeat(self):
+        return self.client.post(
+            reverse("progress:heartbeat"), data={"lesson": self.lesson.pk, "intervals": [[0, 5]]},
+            content_type="application/json",
+        )
+
+    def test_queue_latency_from_request_start_header(self):
+        self.assertEqual(parse_request_start("t=1700000000.250"), 1700000000.25)
+        self.assertEqual(parse_request_start("t=1700000000250000"), 1700000000.25)
+        self.assertIsNone(parse_request_start("garbage"))
+        stamp = f"t={time.time() - 2:.3f}"
+        for _ in range(20):
+            self.client.get(reverse("courses:list"), HTTP_X_REQUEST_START=stamp)
+        self.assertGreater(worker_load.queue_ms, 500)
+
+    def test_level_one_sheds_only_anonymous_browsing(self):
+        worker_load.queue_ms = 200
+        response = self.client.get(reverse("courses:list"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+        self.client.login(username="stu", password="pass123")
+        self.assertEqual(self.client.get(reverse("courses:list")).status_code, 200)
+        self.assertEqual(self._heartbeat().status_code, 202)
+
+    def test_level_two_sheds_progress_writes_but_not_priority_traffic(self):
+        worker_load.queue_ms = 800
+        self.client.login(username="stu", password="pass123")
+        self.assertEqual(self._heartbeat().status_code, 503)
+        other = Course.objects.create(title="D", short_description="S", description="D")
+        response = self.client.post(reverse("enrollments:enroll", kwargs={"course_pk": other.pk}))
+        self.assertEqual(response.status_code, 302)
+
+        self.client.login(username="ops", password="pass123")
+        self.assertEqual(self.client.get(reverse("courses:manage_dashboard")).status_code, 200)
+        self.assertNotEqual(self._heartbeat().status_code, 503)
+        status = self.client.get(reverse("core:load_status")).json()
+        self.assertEqual(status["shed"], {"anon_browse": 0, "progress_write": 1})
+        self.assertEqual(status["worker"]["level"], 2)
+
+
+# ---------------------------------------------------------------------------
+# Metrics tests
+# ---------------------------------------------------------------------------
+
+@override_settings(METRICS_TOKEN="scrape-me")
+class MetricsTests(IsolatedMetricsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="mia", password="pass123")
+        self.course = Course.objects.create(title="C", short_description="S", description="D")
+        self.lesson = Lesson.objects.create(course=self.course, title="L")
+
+    def _scrape(self, **headers):
+        return self.client.get("/metrics", **headers)
+
+    def test_endpoint_is_protected(self):
+        self.assertEqual(self._scrape().status_code, 404)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION="Bearer wrong").status_code, 404)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION="Bearer scrape-me").status_code, 200)
+
+    def test_request_histograms_and_domain_counters(self):
+        self.client.login(username="mia", password="pass123")
+        self.client.post(reverse("enrollments:enroll", kwargs={"course_pk": self.course.pk}))
+        self.client.get(reverse("courses:lesson_detail", kwargs={"course_pk": self.course.pk, "pk": self.lesson.pk}))
+        body = self._scrape(HTTP_AUTHORIZATION="Bearer scrape-me").content.decode()
+        self.assertIn('mooc_requests_total{status="3xx",view="enrollments:enroll"} 1', body)
+        self.assertIn('mooc_request_duration_seconds_count{view="courses:lesson_detail"} 1', body)
+        self.assertIn('mooc_request_db_queries_bucket{view="courses:lesson_detail",le="+Inf"} 1', body)
+        self.assertIn("mooc_enrollments_total 1", body)
+        self.assertIn("mooc_lesson_visits_total 1", body)
+        self.assertIn('mooc_cache_requests_total{cache="auth_user",result="hit"}', body)
+
+    def test_aggregates_across_processes(self):
+        metrics.inc("mooc_enrollments_total", value=2)
+        metrics.registry.flush()
+        other = Path(settings.METRICS_DIR) / "metrics-99999-1.json"
+        other.write_text(json.dumps({
+            "counters": [["mooc_enrollments_total", "", 3]],
+            "histograms": [["mooc_request_db_queries", 'view="x"', [1] + [0] * 11 + [0]]],
+        }))
+        body = metrics.render()
+        self.assertIn("mooc_enrollments_total 5", body)
+        self.assertIn('mooc_request_db_queries_bucket{view="x",le="89"} 1', body)
+
+    def test_collection_overhead_stays_in_microseconds(self):
+        for _ in range(20):
+            self.client.get(reverse("courses:list"))
+        metrics.registry.flush()
+        counters, _ = metrics.collect()
+        per_request = counters[("mooc_metrics_overhead_seconds_total", "")] / 20
+        self.assertLess(per_request, 500e-6)
+
+
+# ---------------------------------------------------------------------------
+# Synthetic dataset generator tests
+# ---------------------------------------------------------------------------
+
+class GenerateDatasetTests(TestCase):
+    def _generate(self, seed=3):
+        call_command(
+            "generate_dataset", users=60, courses=6, lessons=8, seed=seed, batch_size=7, stdout=StringIO(),
+        )
+
+    def _snapshot(self):
+        first_user = User.objects.order_by("pk").values_list("pk", flat=True).first()
+        first_course = Course.objects.order_by("pk").values_list("pk", flat=True).first()
+        return sorted(
+            (e.user_id - first_user, e.course_id - first_course)
+            for e in Enrollment.objects.all()
+        )
+
+    def test_loads_all_tables(self):
+        self._generate()
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Course.objects.count(), 6)
+        self.assertTrue(Lesson.objects.exists())
+        self.assertGreaterEqual(Enrollment.objects.count(), 60)
+        self.assertTrue(LessonProgress.objects.exists())
+        # save() is bypassed, so video_type must have been precomputed
+        for lesson in Lesson.objects.all():
+            self.assertEqual(lesson.video_type, Lesson._classify_video_type(lesson.video_url))
+
+    def test_progress_only_covers_a_prefix_of_each_course(self):
+        self._generate()
+        for enrollment in Enrollment.objects.all():
+            lessons = list(Lesson.objects.filter(course=enrollment.course).values_list("pk", flat=True))
+            visited = set(LessonProgress.objects.filter(
+                user=enrollment.user, lesson__course=enrollment.course,
+            ).values_list("lesson_id", flat=True))
+            self.assertEqual(visited, set(lessons[:len(visited)]))
+
+    def test_same_seed_is_reproducible(self):
+        self._generate(seed=5)
+        first = self._snapshot()
+        for model in (LessonProgress, Enrollment, Lesson, Course, User):
+            model.objects.all().delete()
+        self._generate(seed=5)
+        self.assertEqual(self._snapshot(), first)
+
+
+# ---------------------------------------------------------------------------
+# Query-plan auditor tests
+# ---------------------------------------------------------------------------
+
+class AuditQueriesTests(TestCase):
+    def test_sqlite_plan_flags_scans_and_sorts(self):
+        from apps.core.management.commands.audit_queries import sqlite_problems
+        plan = "3 0 0 SCAN courses_course\n11 0 0 USE TEMP B-TREE FOR ORDER BY\n" \
+               "4 0 0 SEARCH courses_lesson USING INDEX x (course_id=?)"
+        self.assertEqual(len(sqlite_problems(plan)), 2)
+
+    def test_postgresql_plan_flags_seq_scan_sort_and_nested_loop(self):
+        from apps.core.management.commands.audit_queries import postgresql_problems
+        plan = (
+            "Sort  (cost=1.1..1.2 rows=5 width=8)\n"
+            "  ->  Nested Loop  (cost=0.1..900.0 rows=250000 width=8)\n"
+            "        ->  Seq Scan on enrollments_enrollment  (cost=0.0..1.0 rows=5 width=8)\n"
+            "        ->  Index Scan using courses_course_pkey on courses_course  (cost=0.1..0.2 rows=1 width=8)"
+        )
+        problems = postgresql_problems(plan)
+        self.assertEqual([p.split(":")[0] for p in problems],
+                         ["sort without index", "nested-loop blowup", "sequential scan"])
+
+    def test_suggests_filter_then_order_index_unless_covered(self):
+        from apps.core.management.commands.audit_queries import suggest_index
+        index = suggest_index(LessonProgress.objects.filter(user_id=1).order_by("-last_visited_at"))
+        self.assertEqual(index.fields, ["user", "-last_visited_at"])
+        # Covered by enroll_user_enrolled_idx
+        self.assertIsNone(suggest_index(Enrollment.objects.filter(user_id=1).order_by("-enrolled_at")))
+
+    def test_hot_view_queries_use_indexes(self):
+        out = StringIO()
+        call_command("audit_queries", stdout=out)
+        for view in ("courses:detail", "courses:my_courses", "courses:lesson_detail"):
+            flagged = [line for line in out.getvalue().splitlines() if "FLAG" in line and view in line]
+            self.assertEqual(flagged, [], out.getvalue())
+
+
+# ---------------------------------------------------------------------------
+# Startup tooling tests
+# ---------------------------------------------------------------------------
+
+class StartupCommandTests(TestCase):
+    databases = {"default", *SHARDS}
+
+    def test_migrate_if_needed_is_a_no_op_when_up_to_date(self):
+        out = StringIO()
+        # Table check + one read of django_migrations; no lock, no migrate
+        with self.assertNumQueries(2):
+            call_command("migrate_if_needed", stdout=out)
+        self.assertIn("default: no migrations pending", out.getvalue())
+
+    @skipUnless(SHARDS, "needs a progress shard database")
+    def test_migrate_if_needed_checks_every_shard(self):
+        out = StringIO()
+        with self.settings(PROGRESS_SHARDS=SHARDS):
+            call_command("migrate_if_needed", stdout=out)
+        for alias in ["default", *SHARDS]:
+            self.assertIn(f"{alias}: no migrations pending", out.getvalue())
+
+    def test_parse_importtime(self):
+        from apps.core.management.commands.import_profile import parse_importtime, total_us
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.utils\n"
+            "import time:       300 |        420 | django\n"
+            "import time:      1500 |       9000 | config.wsgi\n"
+        )
+        timings = parse_importtime(output)
+        self.assertEqual([(t.module, t.depth) for t in timings],
+                         [("django.utils", 1), ("django", 0), ("config.wsgi", 0)])
+        self.assertEqual(total_us(timings), 9420)
+
+
+# ---------------------------------------------------------------------------
+# Background job tests
+# ---------------------------------------------------------------------------
+
+@task(name="tests.flaky")
+def flaky_task(fail_times: int):
+    flaky_task.calls += 1
+    if flaky_task.calls <= fail_times:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        flaky_task.calls = 0
+
+    def test_claims_by_priority_then_run_at(self):
+        low = flaky_task.enqueue(priority=Job.Priority.LOW, fail_times=0)
+        normal = flaky_task.enqueue(fail_times=0)
+        high = flaky_task.enqueue(priority=Job.Priority.HIGH, fail_times=0)
+        flaky_task.enqueue(delay=60, priority=Job.Priority.HIGH, fail_times=0)  # not ready yet
+        claimed = [JobService.claim("w1").pk for _ in range(3)]
+        self.assertEqual(claimed, [high.pk, normal.pk, low.pk])
+        self.assertIsNone(JobService.claim("w1"))
+
+    def test_failures_back_off_then_fail(self):
+        job = flaky_task.enqueue(fail_times=5)
+        for attempt in (1, 2):
+            claimed = JobService.claim("w1")
+            self.assertFalse(JobService.run(claimed))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, attempt))
+            self.assertGreater(job.run_at, timezone.now())
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        JobService.run(JobService.claim("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+    def test_unique_enqueue_and_worker_runs_course_purge(self):
+        course = Course.objects.create(title="C", short_description="S", description="D")
+        Lesson.objects.create(course=course, title="L")
+        User.objects.create_user(username="boss", password="pass123", is_staff=True)
+        self.client.login(username="boss", password="pass123")
+        self.client.post(reverse("courses:manage_course_delete", kwargs={"pk": course.pk}))
+        other = Course.objects.create(title="D", short_description="S", description="D")
+        self.client.post(reverse("courses:manage_course_delete", kwargs={"pk": other.pk}))
+        self.assertEqual(Job.objects.filter(task="courses.tasks.purge_deleted").count(), 1)
+
+        call_command("run_worker", burst=True, stdout=StringIO())
+        self.assertEqual(Job.objects.get().status, Job.Status.DONE)
+        self.assertFalse(Course.all_objects.exists() or Lesson.all_objects.exists())
+        response = self.client.get(reverse("jobs:status"))
+        self.assertContains(response, "courses.tasks.purge_deleted")
+
+    def test_unique_enqueue_is_enforced_by_the_database(self):
+        first = flaky_task.enqueue(unique=True, fail_times=0)
+        self.assertIsNone(flaky_task.enqueue(unique=True, fail_times=0))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(task=first.task, kwargs=first.kwargs, unique_key=first.unique_key)
+        self.assertIsNotNone(flaky_task.enqueue(unique=True, fail_times=1))
+        JobService.claim("w1")
+        self.assertIsNotNone(flaky_task.enqueue(unique=True, fail_times=0))  # the first one is no longer queued
+        self.assertEqual(Job.objects.get(pk=first.pk).status, Job.Status.RUNNING)
+
+    def test_retrying_into_an_identical_queued_job_fails_it(self):
+        job = flaky_task.enqueue(unique=True, fail_times=5)
+        claimed = JobService.claim("w1")
+        flaky_task.enqueue(unique=True, fail_times=5)
+        JobService.run(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIn("Superseded", job.last_error)
+
+    @override_settings(JOBS_LEASE_SECONDS=0.03)
+    def test_running_job_renews_its_lease(self):
+        flaky_task.enqueue(fail_times=0)
+        job = JobService.claim("w1")
+        with mock.patch.object(JobService, "renew_lease", return_value=True) as renew, \
+                mock.patch.object(flaky_task, "func", side_effect=lambda **kw: time.sleep(0.1)):
+            self.assertTrue(JobService.run(job))
+        self.assertGreaterEqual(renew.call_count, 2)
+
+    def test_renewed_lease_is_not_requeued(self):
+        flaky_task.enqueue(fail_times=0)
+        job = JobService.claim("w1")
+        expired = timezone.now() - timedelta(seconds=settings.JOBS_LEASE_SECONDS + 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=expired)
+        self.assertTrue(JobService.renew_lease(job))
+        self.assertEqual(JobService.requeue_stale(), 0)
+        self.assertFalse(JobService.renew_lease(Job(pk=job.pk, locked_by="w2")))
+        Job.objects.filter(pk=job.pk).update(locked_at=expired)
+        self.assertEqual(JobService.requeue_stale(), 1)
+
+    def test_enrollment_service_can_enqueue(self):
+        course = Course.objects.create(title="C", short_description="S", description="D")
+        users = [User.objects.create_user(username=f"u{i}") for i in range(3)]
+        EnrollmentService.enroll(users[0], course)
+        EnrollmentService.enroll_users_later(course, [u.pk for u in users])
+        call_command("run_worker", burst=True, stdout=StringIO())
+        self.assertEqual(Enrollment.objects.filter(course=course).count(), 3)
+
+
+# ---------------------------------------------------------------------------
+# Recommendation tests
+# ---------------------------------------------------------------------------
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.python, self.django, self.sql, self.art = [
+            Course.objects.create(title=t, short_description="S", description="D")
+            for t in ("Python", "Django", "SQL", "Art")
+        ]
+        self.users = [User.objects.create_user(username=f"u{i}", password="x") for i in range(4)]
+        for user in self.users[:3]:
+            EnrollmentService.enroll(user, self.python)
+            EnrollmentService.enroll(user, self.django)
+        EnrollmentService.enroll(self.users[0], self.sql)
+        EnrollmentService.enroll(self.users[3], self.art)
+
+    def test_build_ranks_co_enrolled_courses(self):
+        RecommendationService.build()
+        self.assertEqual(RecommendationService.for_course(self.python), [self.django, self.sql])
+        self.assertEqual(RecommendationService.for_course(self.art), [])
+
+    def test_incremental_build_matches_full_build(self):
+        RecommendationService.build()
+        EnrollmentService.enroll(self.users[1], self.sql)
+        EnrollmentService.enroll(self.users[3], self.python)
+        RecommendationService.build()
+        incremental = set(CourseCooccurrence.objects.values_list("course_a", "course_b", "count"))
+
+        RecommendationService.build(full=True)
+        self.assertEqual(set(CourseCooccurrence.objects.values_list("course_a", "course_b", "count")), incremental)
+
+    def test_enrollment_committed_below_the_watermark_is_folded_in_later(self):
+        RecommendationService.build()
+        early = EnrollmentService.enroll(self.users[3], self.sql)[0].pk
+        EnrollmentService.enroll(self.users[3], self.django)
+        # `early` got its id first but commits after the next build has read past it
+        Enrollment.objects.filter(pk=early).delete()
+        RecommendationService.build()
+        self.assertEqual(RecommendationBuild.objects.get().pending_ids, [early])
+        Enrollment.objects.create(pk=early, user=self.users[3], course=self.sql)
+        RecommendationService.build()
+        self.assertEqual(RecommendationBuild.objects.get().pending_ids, [])
+        incremental = set(CourseCooccurrence.objects.values_list("course_a", "course_b", "count"))
+
+        RecommendationService.build(full=True)
+        self.assertEqual(set(CourseCooccurrence.objects.values_list("course_a", "course_b", "count")), incremental)
+
+    def test_serving_is_one_query(self):
+        RecommendationService.build()
+        with self.assertNumQueries(1):
+            RecommendationService.for_course(self.python)
+        with self.assertNumQueries(1):
+            recs = RecommendationService.for_user([self.python.pk])
+        self.assertEqual(recs, [self.django, self.sql])
+
+    def test_course_detail_shows_recommendations(self):
+        RecommendationService.build()
+        response = self.client.get(reverse("courses:detail", kwargs={"pk": self.python.pk}))
+        self.assertContains(response, "Learners also took")
+        self.assertContains(response, "Django")
@@ -22,15 +22,22 @@ INSTALLED_APPS = [
     "apps.courses.apps.CoursesConfig",
     "apps.enrollments.apps.EnrollmentsConfig",
     "apps.progress.apps.ProgressConfig",
+    "apps.recommendations.apps.RecommendationsConfig",
+    "apps.api.apps.ApiConfig",
+    "apps.core.apps.CoreConfig",
+    "apps.jobs.apps.JobsConfig",
 ]
 
 MIDDLEWARE = [
+    "apps.core.metrics.MetricsMiddleware",  # outermost, so latency covers the whole stack
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.core.loadshed.LoadSheddingMiddleware",
+    "apps.core.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -55,6 +62,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Per-process cache by default; production overrides with a cache shared
+# by all gunicorn workers.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "mooc-default",
+    }
+}
+
+# Sessions are read from cache and written through to the DB, so an
+# authenticated page view normally costs no `django_session` query.
+# Expired rows are cleaned up with `manage.py purge_sessions`.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# Serves `request.user` from cache — see apps/accounts/backends.py
+AUTHENTICATION_BACKENDS = ["apps.accounts.backends.CachedModelBackend"]
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 300))
+
+# On-demand profiling — staff send `X-Profile: 1` or `?_profile=1`.
+# See apps/core/profiling.py and `manage.py profiles`.
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))  # e.g. 0.001 = 1 in 1000 requests
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "/tmp/mooc-profiles")
+PROFILING_MAX_PROFILES = 200  # ring buffer size
+
+# Metrics — see apps/core/metrics.py. Each worker writes its values to
+# METRICS_DIR; /metrics (staff or `Authorization: Bearer $METRICS_TOKEN`) sums them.
+METRICS_DIR = os.environ.get("METRICS_DIR", "/tmp/mooc-metrics")
+METRICS_FLUSH_INTERVAL = 1.0  # seconds between a worker's snapshot writes
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Load shedding — see apps/core/loadshed.py. Queue latency comes from the
+# proxy's X-Request-Start header; in-flight limits matter for threaded workers.
+LOAD_SHED_ENABLED = os.environ.get("LOAD_SHED_ENABLED", "True") == "True"
+LOAD_SHED_QUEUE_MS_LOW = int(os.environ.get("LOAD_SHED_QUEUE_MS_LOW", 250))  # shed anonymous browsing
+LOAD_SHED_QUEUE_MS_HIGH = int(os.environ.get("LOAD_SHED_QUEUE_MS_HIGH", 1000))  # also shed progress writes
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get("LOAD_SHED_MAX_IN_FLIGHT", 0))  # per process; 0 = ignore
+LOAD_SHED_RETRY_AFTER = 5  # seconds
+
+# Background jobs — see apps/jobs/services.py and `manage.py run_worker`
+JOBS_POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", 1))  # seconds an idle worker sleeps
+JOBS_RETRY_BACKOFF = 10  # seconds before the first retry; doubles per attempt
+JOBS_LEASE_SECONDS = 300  # a running job whose lease was not renewed for this long is presumed dead and re-queued
+JOBS_KEEP_DAYS = 7  # finished jobs are pruned after this
+
+# Video watch-time heartbeats — see apps/progress/heartbeats.py
+HEARTBEAT_FLUSH_INTERVAL = int(os.environ.get("HEARTBEAT_FLUSH_INTERVAL", 30))  # min buffer age; checked per heartbeat, no timer
+HEARTBEAT_MAX_PENDING_KEYS = 1000  # flush early once this many (user, lesson) pairs are buffered
+LESSON_COMPLETION_RATIO = 0.9  # share of the video that must be watched to complete a lesson
+
+# Shared page-fragment caches (catalog, outlines, lesson bodies, enrollment
+# sets) — see apps/courses/caching.py and `manage.py warm_caches`
+CONTENT_CACHE_TIMEOUT = int(os.environ.get("CONTENT_CACHE_TIMEOUT", 600))  # seconds
+
+# Anonymous catalog and course pages served as shared-cacheable (see
+# apps/core/public_cache.py): s-maxage in seconds, 0 = off. Changes send
+# PURGE requests to every proxy base URL in PUBLIC_CACHE_PURGE_URLS.
+PUBLIC_CACHE_SECONDS = int(os.environ.get("PUBLIC_CACHE_SECONDS", 0))
+PUBLIC_CACHE_PURGE_URLS = [url for url in os.environ.get("PUBLIC_CACHE_PURGE_URLS", "").split(",") if url]
+
+# Static HTML snapshots of the public catalog — `manage.py export_static_site`.
+# Serve STATIC_SITE_ROOT/current with any static server.
+STATIC_SITE_ROOT = Path(os.environ.get("STATIC_SITE_ROOT", BASE_DIR / "static_site"))
+
+# Title typeahead — see apps/courses/typeahead.py. Each worker holds its own index.
+TYPEAHEAD_MAX_ENTRIES = int(os.environ.get("TYPEAHEAD_MAX_ENTRIES", 100_000))  # ~15 MB per worker at the cap
+TYPEAHEAD_CHECK_INTERVAL = 1.0  # seconds between a worker's checks for changed titles
+
+# Where lesson visits are stored: "rows" (one LessonProgress row per lesson) or
+# "bitmap" (one CourseProgress row per course). Switch with `manage.py convert_progress`.
+PROGRESS_STORAGE = os.environ.get("PROGRESS_STORAGE", "rows")
+
+# Optional sharding of progress rows by user id — see apps/progress/sharding.py.
+# Aliases of DATABASES entries, set by the environment settings; empty keeps
+# everything in "default". Append new shards, never reorder.
+PROGRESS_SHARDS: list[str] = []
+DATABASE_ROUTERS = ["apps.progress.sharding.ProgressShardRouter"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
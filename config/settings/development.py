@@ -1,6 +1,7 @@
 """
 Development settings — SQLite, debug on, verbose logging.
 """
+import os
 import sys
 from .base import *  # noqa
 
@@ -19,5 +20,16 @@ DATABASES = {
     }
 }
 
+# PROGRESS_SHARD_COUNT=N shards progress rows over N extra SQLite files.
+# The test run always defines two shard databases; tests that exercise
+# sharding switch them on with override_settings(PROGRESS_SHARDS=[...]).
+PROGRESS_SHARD_COUNT = int(os.environ.get("PROGRESS_SHARD_COUNT", 0))
+for i in range(max(PROGRESS_SHARD_COUNT, 2 if TESTING else 0)):
+    DATABASES[f"progress_{i}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"db-progress-{i}.sqlite3",
+    }
+PROGRESS_SHARDS = [f"progress_{i}" for i in range(PROGRESS_SHARD_COUNT)]
+
 # Show emails in console during development
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
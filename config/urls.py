@@ -1,9 +1,16 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from apps.core.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("apps.accounts.urls", namespace="accounts")),
     path("enrollments/", include("apps.enrollments.urls", namespace="enrollments")),
+    path("api/v1/", include("apps.api.urls", namespace="api")),
+    path("progress/", include("apps.progress.urls", namespace="progress")),
+    path("ops/", include("apps.core.urls", namespace="core")),
+    path("metrics", metrics_view, name="metrics"),
+    path("manage/jobs/", include("apps.jobs.urls", namespace="jobs")),
     path("", include("apps.courses.urls", namespace="courses")),
 ]
@@ -1,15 +1,42 @@
 #!/bin/sh
+# Static files are collected at build time (see Dockerfile), so startup is
+# the migration gate, a time-boxed cache warm-up and gunicorn.
+# STARTUP_BUDGET_SECONDS (default 10) is the time allowed before gunicorn
+# starts; going over it is logged so slow scale-outs are noticed.
 set -e
-echo "Collecting static files..."
-python manage.py collectstatic --noinput --settings=config.settings.production
+STARTUP_BUDGET_SECONDS="${STARTUP_BUDGET_SECONDS:-10}"
+started=$(date +%s%N)
 
-echo "Running migrations..."
-python manage.py migrate --settings=config.settings.production
+elapsed_ms() {
+    echo $(( ($(date +%s%N) - started) / 1000000 ))
+}
+
+# Per-worker metrics snapshots from a previous run (see apps/core/metrics.py)
+rm -rf "${METRICS_DIR:-/tmp/mooc-metrics}"
+
+echo "Checking migrations (default and progress shards)..."
+python manage.py migrate_if_needed --settings=config.settings.production
+
+# Fill the shared cache before traffic is admitted; bounded by its own
+# budget and never fatal (see apps/core/management/commands/warm_caches.py)
+echo "Warming caches..."
+python manage.py warm_caches --settings=config.settings.production \
+    --budget "${CACHE_WARM_BUDGET_SECONDS:-5}" || echo "Cache warming failed; starting anyway" >&2
+
+ms=$(elapsed_ms)
+if [ "$ms" -gt $((STARTUP_BUDGET_SECONDS * 1000)) ]; then
+    echo "WARNING: startup took ${ms}ms, over the ${STARTUP_BUDGET_SECONDS}s budget" >&2
+else
+    echo "Startup checks took ${ms}ms (budget ${STARTUP_BUDGET_SECONDS}s)"
+fi
 
 echo "Starting server..."
+# --preload imports the app once in the master, so the 4 workers fork
+# with Django and every app already imported instead of each doing it.
 exec gunicorn config.wsgi:application \
     --bind 0.0.0.0:8000 \
     --workers 4 \
+    --preload \
     --timeout 120 \
     --access-logfile - \
     --error-logfile -
@@ -0,0 +1,127 @@
+/*
+ * Watch-time heartbeats for the lesson player.
+ *
+ * Records which parts of the video were actually played as [start, end]
+ * second intervals, merges them locally and POSTs one small batch every
+ * SEND_INTERVAL_MS (and when the page is hidden/closed). The server
+ * coalesces batches further before writing — see apps/progress/heartbeats.py.
+ *
+ * Works with the native <video> element and the YouTube iframe player
+ * (the embed URL carries enablejsapi=1).
+ */
+(function () {
+  "use strict";
+
+  var SEND_INTERVAL_MS = 20000;
+  var POLL_INTERVAL_MS = 1000;   // YouTube has no timeupdate event
+  var MAX_STEP_SECONDS = 3;      // larger jumps are seeks, not playback
+
+  var root = document.getElementById("lesson-heartbeat");
+  if (!root) return;
+
+  var url = root.dataset.url;
+  var lessonId = parseInt(root.dataset.lesson, 10);
+  var csrfToken = root.dataset.csrf;
+
+  var pending = [];      // closed intervals not yet sent
+  var segment = null;    // currently growing interval
+  var duration = null;
+  var retryAt = 0;       // server asked us to back off (503 + Retry-After)
+
+  function merge(intervals) {
+    intervals.sort(function (a, b) { return a[0] - b[0]; });
+    var out = [];
+    intervals.forEach(function (iv) {
+      var last = out[out.length - 1];
+      if (last && iv[0] <= last[1] + 1) {
+        last[1] = Math.max(last[1], iv[1]);
+      } else {
+        out.push([iv[0], iv[1]]);
+      }
+    });
+    return out;
+  }
+
+  function track(time) {
+    if (segment && time >= segment[1] && time - segment[1] <= MAX_STEP_SECONDS) {
+      segment[1] = time;
+    } else {
+      closeSegment();
+      segment = [time, time];
+    }
+  }
+
+  function closeSegment() {
+    if (segment && segment[1] > segment[0]) {
+      pending.push([Math.floor(segment[0]), Math.ceil(segment[1])]);
+    }
+    segment = null;
+  }
+
+  function send(force) {
+    closeSegment();
+    if (!pending.length || (!force && Date.now() < retryAt)) return;
+    var batch = merge(pending);
+    var body = JSON.stringify({
+      lesson: lessonId,
+      intervals: batch,
+      duration: duration ? Math.round(duration) : null,
+    });
+    pending = [];
+    fetch(url, {
+      method: "POST",
+      body: body,
+      keepalive: true,  // lets the final batch survive page unload
+      credentials: "same-origin",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken },
+    }).then(function (response) {
+      if (response.status === 503) {
+        // Shed under load: keep the intervals for a later batch
+        pending = pending.concat(batch);
+        retryAt = Date.now() + 1000 * (parseInt(response.headers.get("Retry-After"), 10) || 5);
+      }
+    }).catch(function () { /* watch time is best-effort */ });
+  }
+
+  // ── Native <video> ──────────────────────────────────────────────────
+  var video = document.querySelector(".native-video");
+  if (video) {
+    video.addEventListener("loadedmetadata", function () { duration = video.duration; });
+    video.addEventListener("timeupdate", function () {
+      if (!video.paused && !video.seeking) track(video.currentTime);
+    });
+    ["pause", "seeking", "ended"].forEach(function (name) {
+      video.addEventListener(name, closeSegment);
+    });
+  }
+
+  // ── YouTube iframe ──────────────────────────────────────────────────
+  var iframe = document.getElementById("lesson-youtube-player");
+  if (iframe) {
+    var poll = null;
+    window.onYouTubeIframeAPIReady = function () {
+      var player = new YT.Player(iframe, {
+        events: {
+          onStateChange: function (event) {
+            clearInterval(poll);
+            if (event.data === YT.PlayerState.PLAYING) {
+              duration = player.getDuration();
+              poll = setInterval(function () { track(player.getCurrentTime()); }, POLL_INTERVAL_MS);
+            } else {
+              closeSegment();
+            }
+          },
+        },
+      });
+    };
+    var tag = document.createElement("script");
+    tag.src = "https://www.youtube.com/iframe_api";
+    document.head.appendChild(tag);
+  }
+
+  setInterval(send, SEND_INTERVAL_MS);
+  document.addEventListener("visibilitychange", function () {
+    if (document.visibilityState === "hidden") send(true);
+  });
+  window.addEventListener("pagehide", function () { send(true); });
+})();
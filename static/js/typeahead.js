@@ -0,0 +1,88 @@
+/*
+ * Title suggestions for the navbar search box.
+ *
+ * Asks /api/v1/typeahead/ as the user types (debounced, and any request
+ * still in flight is aborted when a newer one starts), then shows the
+ * results as a list of links. Up/Down move through them, Enter opens the
+ * highlighted (or first) one, Escape closes the list.
+ */
+(function () {
+  "use strict";
+
+  var DEBOUNCE_MS = 80;
+
+  var root = document.getElementById("typeahead");
+  if (!root) return;
+
+  var input = root.querySelector("input");
+  var list = root.querySelector("ul");
+  var url = root.dataset.url;
+  var timer = null;
+  var inflight = null;
+  var active = -1;
+
+  function close() {
+    list.hidden = true;
+    list.innerHTML = "";
+    active = -1;
+  }
+
+  function render(results) {
+    list.innerHTML = "";
+    active = -1;
+    results.forEach(function (item) {
+      var li = document.createElement("li");
+      var a = document.createElement("a");
+      a.href = item.url;
+      a.textContent = item.title;
+      if (item.type === "lesson") {
+        var small = document.createElement("small");
+        small.textContent = " — " + item.course_title;
+        a.appendChild(small);
+      }
+      li.appendChild(a);
+      list.appendChild(li);
+    });
+    list.hidden = results.length === 0;
+  }
+
+  function highlight(index) {
+    var items = list.querySelectorAll("li");
+    if (!items.length) return;
+    active = (index + items.length) % items.length;
+    items.forEach(function (li, i) { li.classList.toggle("active", i === active); });
+  }
+
+  function fetchSuggestions() {
+    var q = input.value.trim();
+    if (!q) { close(); return; }
+    if (inflight) inflight.abort();
+    inflight = new AbortController();
+    fetch(url + "?q=" + encodeURIComponent(q), { signal: inflight.signal, credentials: "same-origin" })
+      .then(function (response) { return response.ok ? response.json() : { results: [] }; })
+      .then(function (data) { if (input.value.trim() === q) render(data.results); })
+      .catch(function () {});  // aborted or offline: keep the current list
+  }
+
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(fetchSuggestions, DEBOUNCE_MS);
+  });
+
+  input.addEventListener("keydown", function (event) {
+    if (event.key === "ArrowDown") { highlight(active + 1); event.preventDefault(); }
+    else if (event.key === "ArrowUp") { highlight(active - 1); event.preventDefault(); }
+    else if (event.key === "Escape") { close(); }
+    else if (event.key === "Enter") {
+      var links = list.querySelectorAll("a");
+      if (links.length) {
+        window.location.href = links[Math.max(active, 0)].href;
+        event.preventDefault();
+      }
+    }
+  });
+
+  document.addEventListener("click", function (event) {
+    if (!root.contains(event.target)) close();
+  });
+})();